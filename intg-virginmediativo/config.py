@@ -22,6 +22,12 @@ class VmTivoDevice:
     name: str
     port: int
     serial: str
+    addresses: list[str] = dataclasses.field(default_factory=list)
+    latency: float | None = None
+    key_rate: float | None = None
+    coalesce_channels: bool = True
+    calibrate_key_rate: bool = False
+    buttons: dict[str, dict[str, str]] = dataclasses.field(default_factory=dict)
 
 
 class _CustomJSONEncoder(json.JSONEncoder):
@@ -143,6 +149,20 @@ class Devices:
 
         return ret
 
+    @log(_LOG, include_datetime=_LOG_INC_DATETIME)
+    def update(self, tivo: VmTivoDevice) -> bool:
+        """Replace the stored configuration for a device with the same id."""
+        ret: bool = False
+
+        for idx, itm in enumerate(self._config):
+            if itm.id == tivo.id:
+                if itm is not tivo:
+                    self._config[idx] = dataclasses.replace(tivo)
+                ret = True
+                break
+
+        return ret
+
     @log(_LOG, include_datetime=_LOG_INC_DATETIME)
     def save(self) -> bool:
         """Save configured devices to disk."""
@@ -13,6 +13,88 @@ class PollerType(StrEnum):
     STATUS = "status"
 
 
+CHANNEL_COALESCE_WINDOW: float = 0.5
+
+CONNECTION_IDLE_TIMEOUT: float = 300.0
+CONNECTION_STANDBY_IDLE_TIMEOUT: float = 10.0
+
+FLEET_CONCURRENCY: int = 32
+FLEET_DEVICE_DEADLINE: float = 5.0
+FLEET_DEVICE_ID: str = "fleet"
+
+HOLD_MAX_DURATION: float = 30.0
+HOLD_RELEASE_COMMAND: str = "RELEASE"
+
+LINEUP_SAVE_INTERVAL: float = 30.0
+
+LOG_BACKUP_COUNT: int = 3
+LOG_MAX_BYTES: int = 1024 * 1024
+LOG_QUEUE_SIZE: int = 10000
+
+LOOP_LAG_INTERVAL: float = 0.25
+LOOP_LAG_REPORT_INTERVAL: float = 60.0
+LOOP_LAG_SAMPLES: int = 1024
+LOOP_LAG_THRESHOLD: float = 0.1
+
+METRICS_HOST: str = "127.0.0.1"
+
+POLL_BUCKETS: tuple[float, ...] = (
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+
+TEXT_COMMAND_PREFIX: str = "TEXT:"
+
+PROFILE_DIRECTORY: str = "profiles"
+PROFILE_KEEP: int = 5
+PROFILE_TOP_ENTRIES: int = 50
+PROFILE_WINDOW: float = 30.0
+
+REBIND_COOLDOWN: float = 300.0
+REBIND_FAILURE_THRESHOLD: int = 3
+
+RECONCILE_DELAY: float = 3.0
+
+SETUP_CONNECT_DEADLINE: float = 5.0
+
+# longer than the longest call, a 30 second hold or a key rate calibration
+SHARD_CALL_TIMEOUT: float = 60.0
+# metrics and spans are sent to the driver in batches, keeping each message
+# well under the stream limit
+SHARD_EXPORT_BATCH: int = 256
+SHARD_READY_TIMEOUT: float = 10.0
+# messages waiting for a shard beyond this mean it has stopped reading them
+SHARD_SEND_BUFFER_LIMIT: int = 1024 * 1024
+SHARD_STREAM_LIMIT: int = 1024 * 1024
+
+SNAPSHOT_FILENAME: str = "state.json"
+
+# long enough for a connection, a slow reply and one retry on a new connection
+SUBSCRIBE_STATE_DEADLINE: float = 5.0
+
+SWEEP_CONCURRENCY: int = 64
+SWEEP_CONNECT_TIMEOUT: float = 0.5
+SWEEP_MIN_PREFIX_LENGTH: int = 22
+SWEEP_PROBE_CODE: str = "probe"
+SWEEP_PROBE_REPLIES: tuple[str, ...] = (
+    "CH_FAILED",
+    "CH_STATUS",
+    "INVALID_COMMAND",
+    "INVALID_KEY",
+)
+
+WORKER_BACKOFF: float = 1.0
+WORKER_MAX_BACKOFF: float = 60.0
+WORKER_STABLE_PERIOD: float = 60.0
+
+
 class CodeTypes(StrEnum):
     """Describe code types."""
 
@@ -1,9 +1,22 @@
 """Discover the Virgin Media TiVo devices on the network."""
 
 import asyncio
+import contextlib
+import ipaddress
 import logging
+from collections.abc import Iterable, Iterator
+from typing import Any
 
+import ifaddr
+from const import (
+    SWEEP_CONCURRENCY,
+    SWEEP_CONNECT_TIMEOUT,
+    SWEEP_MIN_PREFIX_LENGTH,
+    SWEEP_PROBE_CODE,
+    SWEEP_PROBE_REPLIES,
+)
 from logger import log, log_formatter
+from pyvmtivo.const import DEFAULT_CONNECT_PORT
 from zeroconf import ServiceStateChange, Zeroconf
 from zeroconf.asyncio import AsyncServiceBrowser, AsyncServiceInfo, AsyncZeroconf
 
@@ -12,9 +25,16 @@ _LOG_INC_DATETIME: bool = True
 
 
 @log(_LOG, include_datetime=_LOG_INC_DATETIME)
-async def devices(timeout: int = 10) -> list[dict[str, str]]:
-    """Discover devices."""
-    discovered_devices: list[dict[str, str]] = []
+async def devices(
+    timeout: int = 10, serial: str | None = None
+) -> list[dict[str, Any]]:
+    """Discover devices.
+
+    If a serial is given only the device advertising that TSN is returned and
+    discovery stops as soon as it has been found.
+    """
+    discovered_devices: list[dict[str, Any]] = []
+    found: asyncio.Event = asyncio.Event()
 
     def on_service_state_changed(
         zeroconf: Zeroconf,
@@ -46,10 +66,13 @@ async def devices(timeout: int = 10) -> list[dict[str, str]]:
             if addresses:
                 discovered_device = {
                     "address": addresses[0],
+                    "addresses": addresses,
                     "name": name.split(".")[0],
                     "port": info.port,
                     "serial": info.properties.get(b"TSN").decode("utf-8"),
                 }
+                if serial is not None and discovered_device["serial"] != serial:
+                    return
                 _LOG.debug(
                     log_formatter(
                         f"found: {discovered_device}",
@@ -57,6 +80,8 @@ async def devices(timeout: int = 10) -> list[dict[str, str]]:
                     )
                 )
                 discovered_devices.append(discovered_device)
+                if serial is not None:
+                    found.set()
         else:
             _LOG.debug(
                 log_formatter(f"no info for {name}", include_datetime=_LOG_INC_DATETIME)
@@ -70,7 +95,8 @@ async def devices(timeout: int = 10) -> list[dict[str, str]]:
             aiozc.zeroconf, services, handlers=[on_service_state_changed]
         )
 
-        await asyncio.sleep(timeout)
+        with contextlib.suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(found.wait(), timeout)
         await aiobrowser.async_cancel()
         await aiozc.async_close()
     except OSError as err:
@@ -81,3 +107,114 @@ async def devices(timeout: int = 10) -> list[dict[str, str]]:
         )
 
     return discovered_devices
+
+
+@log(_LOG, include_datetime=_LOG_INC_DATETIME)
+async def resolve_serial(serial: str, timeout: int = 5) -> dict[str, Any] | None:
+    """Find the device advertising the given serial (TSN)."""
+    discovered_devices: list[dict[str, Any]] = await devices(timeout, serial=serial)
+    return discovered_devices[0] if discovered_devices else None
+
+
+def local_networks() -> list[ipaddress.IPv4Network]:
+    """Return the IPv4 networks the host is attached to.
+
+    Loopback and link-local networks are ignored and large networks are
+    narrowed to the block surrounding the host address.
+    """
+    ret: list[ipaddress.IPv4Network] = []
+    for adapter in ifaddr.get_adapters():
+        for adapter_ip in adapter.ips:
+            if not adapter_ip.is_IPv4:
+                continue
+            address = ipaddress.IPv4Address(adapter_ip.ip)
+            if address.is_loopback or address.is_link_local:
+                continue
+            network = ipaddress.IPv4Interface(
+                f"{address}/{max(adapter_ip.network_prefix, SWEEP_MIN_PREFIX_LENGTH)}"
+            ).network
+            if network not in ret:
+                ret.append(network)
+
+    return ret
+
+
+async def _probe(address: str, port: int, timeout: float) -> bool:
+    """Check that the host is a TiVo.
+
+    A TiVo sends its status when a client connects, if it doesn't then an
+    unknown key is sent which should be rejected without having any effect.
+    """
+    try:
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(address, port), timeout
+        )
+    except (OSError, TimeoutError):
+        return False
+
+    ret: bool = False
+    try:
+        try:
+            data: bytes = await asyncio.wait_for(reader.read(1024), timeout)
+        except TimeoutError:
+            writer.write(f"IRCODE {SWEEP_PROBE_CODE}\r".upper().encode())
+            await writer.drain()
+            data = await asyncio.wait_for(reader.read(1024), timeout)
+        ret = data.decode(errors="ignore").strip().startswith(SWEEP_PROBE_REPLIES)
+    except (OSError, TimeoutError):
+        pass
+    finally:
+        writer.close()
+        with contextlib.suppress(OSError):
+            await writer.wait_closed()
+
+    return ret
+
+
+@log(_LOG, include_datetime=_LOG_INC_DATETIME)
+async def sweep(
+    networks: Iterable[ipaddress.IPv4Network | str] | None = None,
+    port: int = DEFAULT_CONNECT_PORT,
+    concurrency: int = SWEEP_CONCURRENCY,
+    timeout: float = SWEEP_CONNECT_TIMEOUT,
+) -> list[dict[str, Any]]:
+    """Sweep the local networks for devices listening on the TiVo port.
+
+    Used when multicast discovery isn't possible. Hosts are probed by a
+    bounded pool of workers so a /24 takes a couple of seconds.
+    """
+    discovered_devices: list[dict[str, Any]] = []
+    if networks is None:
+        networks = local_networks()
+
+    def hosts() -> Iterator[str]:
+        for network in networks:
+            for host in ipaddress.ip_network(network, strict=False).hosts():
+                yield str(host)
+
+    candidates: Iterator[str] = hosts()
+
+    async def worker() -> None:
+        for address in candidates:
+            if await _probe(address, port, timeout):
+                _LOG.debug(
+                    log_formatter(
+                        f"found: {address}", include_datetime=_LOG_INC_DATETIME
+                    )
+                )
+                discovered_devices.append(
+                    {
+                        "address": address,
+                        "addresses": [address],
+                        "name": address,
+                        "port": port,
+                        "serial": None,
+                    }
+                )
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+    return sorted(
+        discovered_devices,
+        key=lambda dev: ipaddress.ip_address(dev["address"]),
+    )
@@ -2,27 +2,66 @@
 """This module implements a Remote Two integration driver for Android TV devices."""
 
 import asyncio
+import contextlib
+import json
 import logging
 import os
+import signal
+import sys
+import time
 from typing import Any
 
 import config
+import discover
+import fleet
+import profiling
 import remote
+import shard
+import snapshot
+import supervisor
 import ucapi
-from const import POLLER_FUNCS, PollerType
+import watchdog
+from const import (
+    LOG_BACKUP_COUNT,
+    LOG_MAX_BYTES,
+    LOG_QUEUE_SIZE,
+    LOOP_LAG_THRESHOLD,
+    METRICS_HOST,
+    PROFILE_DIRECTORY,
+    PROFILE_WINDOW,
+    POLLER_FUNCS,
+    REBIND_COOLDOWN,
+    SNAPSHOT_FILENAME,
+    SUBSCRIBE_STATE_DEADLINE,
+    PollerType,
+)
 from decorators import attaches_to
-from logger import log, log_formatter
+from logger import log, log_formatter, start_log_pipeline
+from pyvmtivo.metrics import REGISTRY, Counter
+from pyvmtivo.tracing import TRACER
 from setup_flow import SetupFlow
 
 _BACKGROUND_POLLERS: dict[str, asyncio.Task] = {}
+_BACKGROUND_TASKS: set[asyncio.Task] = set()
 _LOG: logging.Logger = logging.getLogger("driver")
 _LOG_INC_DATETIME: bool = True
+_REBIND_ATTEMPTS: dict[str, float] = {}
+_SUPERVISOR: supervisor.Supervisor | shard.ShardRouter = supervisor.Supervisor(
+    lambda entity_id, attributes: async_on_remote_attributes_changed(
+        entity_id, attributes
+    )
+)
+_WATCHDOG: watchdog.LoopWatchdog = watchdog.LoopWatchdog()
+_ATTRIBUTE_PUSHES: Counter = REGISTRY.counter(
+    "vmtivo_attribute_pushes_total", "Attribute updates sent to the Remote"
+)
 try:
     _LOOP: asyncio.AbstractEventLoop = asyncio.get_running_loop()
 except RuntimeError:
     _LOOP: asyncio.AbstractEventLoop = asyncio.new_event_loop()
 
 _configured_tivos: dict[str, remote.TivoRemote] = {}
+_fleet: fleet.FleetRemote | None = None
 
 api = ucapi.IntegrationAPI(_LOOP)
 
@@ -39,14 +78,55 @@ def _configure_new_device(device_config: config.VmTivoDevice) -> None:
             )
         )
     else:
-        device: remote.TivoRemote = remote.TivoRemote(device_config)
+        device: remote.TivoRemote
+        if isinstance(_SUPERVISOR, shard.ShardRouter):
+            device = shard.ShardedTivoRemote(device_config, _SUPERVISOR)
+        else:
+            device = remote.TivoRemote(
+                device_config, config.devices.data_path if config.devices else None
+            )
         device.events.on(
             remote.Events.STATE_CHANGED,
             async_on_remote_attributes_changed,
         )
+        device.events.on(remote.Events.UNREACHABLE, async_on_remote_unreachable)
+        if snapshot.snapshots is not None and (
+            last_known := snapshot.snapshots.get(device_config.id)
+        ):
+            device.restore(last_known)
         _configured_tivos[device_config.id] = device
+        if device_config.calibrate_key_rate and device_config.key_rate is None:
+            task: asyncio.Task = asyncio.create_task(async_calibrate_device(device))
+            _BACKGROUND_TASKS.add(task)
+            task.add_done_callback(_BACKGROUND_TASKS.discard)
 
     api.available_entities.add(device)
+    _SUPERVISOR.add(device)
+    _configure_fleet()
+
+
+@log(_LOG, include_datetime=_LOG_INC_DATETIME)
+def _configure_fleet() -> None:
+    """Offer the entity that sends commands to all TiVos whilst there are two."""
+    global _fleet  # pylint: disable=global-statement
+
+    if _fleet is None and len(_configured_tivos) > 1:
+        _fleet = fleet.FleetRemote(lambda: list(_configured_tivos.values()))
+        api.available_entities.add(_fleet)
+    elif _fleet is not None and len(_configured_tivos) <= 1:
+        api.configured_entities.remove(_fleet.id)
+        api.available_entities.remove(_fleet.id)
+        _fleet = None
+
+
+@log(_LOG, include_datetime=_LOG_INC_DATETIME)
+async def async_calibrate_device(device: remote.TivoRemote) -> None:
+    """Calibrate the rate keys can be sent to the TiVo and store it."""
+    if (await device.async_calibrate_key_rate()) is not None and (
+        config.devices is not None
+    ):
+        config.devices.update(device.tivo_config)
+        config.devices.save()
 
 
 @api.listens_to(ucapi.Events.CONNECT)
@@ -57,6 +137,7 @@ async def async_on_remote_connect():
     We don't hold a connection to a device so just fake being connected.
     """
     await api.set_device_state(ucapi.DeviceStates.CONNECTED)
+    await async_warm_up_devices()
     await async_start_poller(PollerType.STATUS)
 
 
@@ -71,17 +152,43 @@ async def async_on_remote_disconnect():
 @api.listens_to(ucapi.Events.SUBSCRIBE_ENTITIES)
 @log(_LOG, include_datetime=_LOG_INC_DATETIME)
 async def async_on_subscribe_entities(entity_ids: list[str]) -> None:
-    """Process entities being subscribed to."""
+    """Process entities being subscribed to.
+
+    All the TiVos are asked for their state at the same time, each state is
+    sent as soon as it arrives. Probes still running at the deadline are left
+    to finish, rather than cancelled part way through reading a reply, and
+    send their state when they do.
+    """
+
+    async def _async_push_state(entity_id: str, device: remote.TivoRemote) -> None:
+        cur_state: remote.States = await device.get_state()
+        await async_on_remote_attributes_changed(
+            entity_id, {ucapi.remote.Attributes.STATE: cur_state}
+        )
+
+    probes: dict[asyncio.Task, str] = {}
     for entity_id in entity_ids:
         device_id: str | None
         if (device_id := config.device_id_from_entity_id(entity_id)) is not None:
             if device_id in _configured_tivos:
-                cur_state: remote.States = await _configured_tivos[
-                    device_id
-                ].get_state()
-                await async_on_remote_attributes_changed(
-                    entity_id, {ucapi.remote.Attributes.STATE: cur_state}
+                task: asyncio.Task = asyncio.create_task(
+                    _async_push_state(entity_id, _configured_tivos[device_id])
                 )
+                _BACKGROUND_TASKS.add(task)
+                task.add_done_callback(_BACKGROUND_TASKS.discard)
+                probes[task] = entity_id
+    if not probes:
+        return
+
+    _, pending = await asyncio.wait(probes, timeout=SUBSCRIBE_STATE_DEADLINE)
+    for task in pending:
+        _LOG.debug(
+            log_formatter(
+                f"no state for {probes[task]} within {SUBSCRIBE_STATE_DEADLINE}s,"
+                " it will be sent once known",
+                include_datetime=_LOG_INC_DATETIME,
+            )
+        )
 
 
 @api.listens_to(ucapi.Events.UNSUBSCRIBE_ENTITIES)
@@ -99,6 +206,8 @@ async def async_on_unsubscribe_entities(entity_ids: list[str]) -> None:
                     )
                 )
                 _: remote.TivoRemote = _configured_tivos.pop(device_id)
+                await _SUPERVISOR.async_remove(entity_id)
+                _configure_fleet()
 
 
 @api.listens_to(ucapi.Events.ENTER_STANDBY)
@@ -106,15 +215,34 @@ async def async_on_unsubscribe_entities(entity_ids: list[str]) -> None:
 async def async_on_remote_enter_standby() -> None:
     """Handle the remote entering standby."""
     await async_stop_poller(PollerType.STATUS)
+    await async_save_lineups()
+    await async_save_snapshots()
+    for device in _configured_tivos.values():
+        device.cool_down()
 
 
 @api.listens_to(ucapi.Events.EXIT_STANDBY)
 @log(_LOG, include_datetime=_LOG_INC_DATETIME)
 async def async_on_remote_exit_standby() -> None:
     """Handle the remote exiting standby."""
+    await async_warm_up_devices()
     await async_start_poller(PollerType.STATUS)
 
 
+@log(_LOG, include_datetime=_LOG_INC_DATETIME)
+async def async_warm_up_devices() -> None:
+    """Open connections to the subscribed TiVos ahead of the first button press.
+
+    Runs in the background so the Remote isn't kept waiting by a TiVo that
+    can't be reached.
+    """
+    for device in _configured_tivos.values():
+        if api.configured_entities.contains(device.id):
+            task: asyncio.Task = asyncio.create_task(device.async_warm_up())
+            _BACKGROUND_TASKS.add(task)
+            task.add_done_callback(_BACKGROUND_TASKS.discard)
+
+
 @log(_LOG, include_datetime=_LOG_INC_DATETIME)
 def on_device_added(device_config: config.VmTivoDevice) -> None:
     """Device has been added to the configuration."""
@@ -124,6 +252,7 @@ def on_device_added(device_config: config.VmTivoDevice) -> None:
 @log(_LOG, include_datetime=_LOG_INC_DATETIME)
 def on_device_removed(device_config: config.VmTivoDevice) -> None:
     """Device has been removed from the configuration."""
+    global _fleet  # pylint: disable=global-statement
 
     if device_config is None:
         _LOG.debug(
@@ -131,13 +260,25 @@ def on_device_removed(device_config: config.VmTivoDevice) -> None:
         )
         api.configured_entities.clear()
         api.available_entities.clear()
+        _configured_tivos.clear()
+        _fleet = None
+        task: asyncio.Task = asyncio.create_task(_SUPERVISOR.async_clear())
+        _BACKGROUND_TASKS.add(task)
+        task.add_done_callback(_BACKGROUND_TASKS.discard)
     else:
         _LOG.debug(
             log_formatter("single device removed", include_datetime=_LOG_INC_DATETIME)
         )
         if device_config.id in _configured_tivos:
-            api.configured_entities.remove(_configured_tivos[device_config.id].id)
-            api.available_entities.remove(_configured_tivos[device_config.id].id)
+            device: remote.TivoRemote = _configured_tivos.pop(device_config.id)
+            api.configured_entities.remove(device.id)
+            api.available_entities.remove(device.id)
+            task = asyncio.create_task(_SUPERVISOR.async_remove(device.id))
+            _BACKGROUND_TASKS.add(task)
+            task.add_done_callback(_BACKGROUND_TASKS.discard)
+            _configure_fleet()
+        if snapshot.snapshots is not None:
+            snapshot.snapshots.remove(device_config.id)
 
 
 @log(_LOG, include_datetime=_LOG_INC_DATETIME)
@@ -148,22 +289,63 @@ async def async_on_remote_attributes_changed(
 
     entity: ucapi.Entity | None = None
     if (entity := api.configured_entities.get(entity_id)) is not None:
+        _ATTRIBUTE_PUSHES.inc()
         api.configured_entities.update_attributes(entity.id, attributes)
 
 
+@log(_LOG, include_datetime=_LOG_INC_DATETIME)
+async def async_on_remote_unreachable(device: remote.TivoRemote) -> None:
+    """Look the TiVo up by serial and rebind it if the address has changed."""
+
+    if not device.serial:
+        return
+
+    now: float = time.monotonic()
+    if now - _REBIND_ATTEMPTS.get(device.serial, -REBIND_COOLDOWN) < REBIND_COOLDOWN:
+        return
+    _REBIND_ATTEMPTS[device.serial] = now
+
+    found: dict[str, Any] | None = await discover.resolve_serial(device.serial)
+    if found is None:
+        _LOG.debug(
+            log_formatter(
+                f"unable to find {device.serial} on the network",
+                include_datetime=_LOG_INC_DATETIME,
+            )
+        )
+        return
+
+    address: str = found.get("address")
+    if address != device.tivo_config.address or set(
+        found.get("addresses", [])
+    ) != set(device.tivo_config.addresses):
+        _LOG.info(
+            log_formatter(
+                f"{device.serial} moved from {device.tivo_config.address} to {address}",
+                include_datetime=_LOG_INC_DATETIME,
+            )
+        )
+        device.update_address(address, found.get("addresses"))
+        if config.devices is not None:
+            config.devices.update(device.tivo_config)
+            config.devices.save()
+
+
 @log(_LOG, include_datetime=_LOG_INC_DATETIME)
 @attaches_to(PollerType.STATUS)
 async def async_status_poller(interval: float) -> None:
-    """Poll the TiVo to establish status."""
+    """Poll the TiVos to establish status.
 
+    Each TiVo is polled by its own worker, so one failing doesn't stop the
+    others being polled. This keeps the state saved and reports on the workers.
+    """
+
+    _SUPERVISOR.start(interval)
     try:
         while True:
-            for _, device in _configured_tivos.items():
-                cur_state: remote.States = await device.get_state()
-                await async_on_remote_attributes_changed(
-                    device.id, {ucapi.remote.Attributes.STATE: cur_state}
-                )
             await asyncio.sleep(interval)
+            _SUPERVISOR.report()
+            await async_save_snapshots()
 
     except asyncio.CancelledError as exc:
         _LOG.debug(
@@ -172,10 +354,62 @@ async def async_status_poller(interval: float) -> None:
                 include_datetime=_LOG_INC_DATETIME,
             )
         )
-        _: asyncio.Task | None = _BACKGROUND_POLLERS.pop(PollerType.STATUS, None)
+        await _SUPERVISOR.async_stop()
         raise
 
 
+@log(_LOG, include_datetime=_LOG_INC_DATETIME)
+async def async_refresh_devices() -> None:
+    """Ask every TiVo for its state, replacing the restored state."""
+    devices: list[remote.TivoRemote] = list(_configured_tivos.values())
+    states: list[remote.States] = await asyncio.gather(
+        *(device.get_state() for device in devices)
+    )
+    for device, cur_state in zip(devices, states):
+        await async_on_remote_attributes_changed(
+            device.id, {ucapi.remote.Attributes.STATE: cur_state}
+        )
+    await async_save_snapshots()
+
+
+@log(_LOG, include_datetime=_LOG_INC_DATETIME)
+async def async_save_snapshots() -> None:
+    """Save the last known state of the TiVos if it has changed."""
+    if snapshot.snapshots is None:
+        return
+
+    changed: bool = False
+    for device_id, device in _configured_tivos.items():
+        changed |= snapshot.snapshots.update(device_id, device.snapshot())
+    if changed:
+        await asyncio.get_running_loop().run_in_executor(
+            None, snapshot.snapshots.save
+        )
+
+
+@log(_LOG, include_datetime=_LOG_INC_DATETIME)
+async def async_save_lineups() -> None:
+    """Save the channel lineups of the TiVos that have changed."""
+    await asyncio.gather(
+        *(device.async_save_lineup() for device in _configured_tivos.values())
+    )
+
+
+@log(_LOG, include_datetime=_LOG_INC_DATETIME)
+async def async_shutdown() -> None:
+    """Save what has been learned about the TiVos and stop the driver."""
+    await async_save_lineups()
+    await async_save_snapshots()
+    _LOOP.stop()
+
+
+def shutdown() -> None:
+    """Shut the driver down when asked to by a signal."""
+    task: asyncio.Task = asyncio.create_task(async_shutdown())
+    _BACKGROUND_TASKS.add(task)
+    task.add_done_callback(_BACKGROUND_TASKS.discard)
+
+
 @log(_LOG, include_datetime=_LOG_INC_DATETIME)
 async def async_start_poller(task_type: PollerType, interval: float = 10.0) -> None:
     """Start the polling process."""
@@ -185,6 +419,10 @@ async def async_start_poller(task_type: PollerType, interval: float = 10.0) -> N
             POLLER_FUNCS[task_type](interval)
         )
         _BACKGROUND_POLLERS[task_type] = polling_task
+        # forget the task however it ends, so the poller can be started again
+        polling_task.add_done_callback(
+            lambda _: _BACKGROUND_POLLERS.pop(task_type, None)
+        )
 
 
 @log(_LOG, include_datetime=_LOG_INC_DATETIME)
@@ -195,24 +433,146 @@ async def async_stop_poller(task_type: PollerType) -> None:
         task.cancel("remote went into standby")
 
 
+@log(_LOG, include_datetime=_LOG_INC_DATETIME)
+async def async_start_metrics_server(port: int) -> asyncio.Server:
+    """Serve the metrics in the Prometheus text format.
+
+    The recorded trace spans are served on /trace, in the Chrome trace event
+    format, and on /spans as a JSON list. The health of the workers is served
+    on /health. Any other path gets the metrics.
+    """
+
+    async def _handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request: bytes = await reader.readuntil(b"\r\n\r\n")
+            path: bytes = request.split(b" ", 2)[1] if b" " in request else b"/"
+            content_type: bytes = b"application/json"
+            if path == b"/trace":
+                body: bytes = TRACER.to_chrome_trace().encode()
+            elif path == b"/spans":
+                body = TRACER.to_json().encode()
+            elif path == b"/health":
+                body = json.dumps(_SUPERVISOR.health()).encode()
+            else:
+                body = REGISTRY.render().encode()
+                content_type = b"text/plain; version=0.0.4"
+            writer.write(
+                b"HTTP/1.1 200 OK\r\n"
+                b"Content-Type: %s\r\n"
+                b"Content-Length: %d\r\n"
+                b"Connection: close\r\n\r\n" % (content_type, len(body)) + body
+            )
+            await writer.drain()
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, OSError):
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(_handle, METRICS_HOST, port)
+
+
+@log(_LOG, include_datetime=_LOG_INC_DATETIME)
+def start_profiling(
+    profiler: profiling.Profiler, profile_type: profiling.ProfileType
+) -> None:
+    """Profile in the background."""
+    task: asyncio.Task = asyncio.create_task(profiler.async_profile(profile_type))
+    _BACKGROUND_TASKS.add(task)
+    task.add_done_callback(_BACKGROUND_TASKS.discard)
+
+
+@log(_LOG, include_datetime=_LOG_INC_DATETIME)
+def setup_profiling(data_path: str) -> None:
+    """Profile now if UC_PROFILE asks to and whenever signalled.
+
+    UC_PROFILE is a comma separated list of profile types. SIGUSR1 starts a
+    CPU profile and SIGUSR2 a memory profile.
+    """
+    profiler: profiling.Profiler = profiling.Profiler(
+        os.path.join(data_path, PROFILE_DIRECTORY),
+        float(os.getenv("UC_PROFILE_WINDOW", PROFILE_WINDOW)),
+    )
+    for profile_type in filter(None, os.getenv("UC_PROFILE", "").split(",")):
+        try:
+            start_profiling(profiler, profiling.ProfileType(profile_type.strip()))
+        except ValueError:
+            _LOG.warning(
+                log_formatter(
+                    f"unknown profile type: {profile_type}",
+                    include_datetime=_LOG_INC_DATETIME,
+                )
+            )
+
+    for signum, profile_type in (
+        ("SIGUSR1", profiling.ProfileType.CPU),
+        ("SIGUSR2", profiling.ProfileType.MEMORY),
+    ):
+        # not every platform has the signals or supports handling them
+        with contextlib.suppress(AttributeError, NotImplementedError, RuntimeError):
+            _LOOP.add_signal_handler(
+                getattr(signal, signum), start_profiling, profiler, profile_type
+            )
+
+
 async def async_main():
     """Start the driver."""
-    logging.basicConfig()
+    global _SUPERVISOR  # pylint: disable=global-statement
+
+    start_log_pipeline(
+        int(os.getenv("UC_LOG_QUEUE_SIZE", LOG_QUEUE_SIZE)),
+        os.getenv("UC_LOG_FILE"),
+        int(os.getenv("UC_LOG_MAX_BYTES", LOG_MAX_BYTES)),
+        LOG_BACKUP_COUNT,
+    )
 
     level = os.getenv("UC_LOG_LEVEL", "DEBUG").upper()
     logging.getLogger("button").setLevel(level)
     logging.getLogger("config").setLevel(level)
     logging.getLogger("discover").setLevel(level)
     logging.getLogger("driver").setLevel(level)
+    logging.getLogger("fleet").setLevel(level)
+    logging.getLogger("playback").setLevel(level)
+    logging.getLogger("profiling").setLevel(level)
     logging.getLogger("remote").setLevel(level)
     logging.getLogger("setup_flow").setLevel(level)
+    logging.getLogger("shard").setLevel(level)
+    logging.getLogger("snapshot").setLevel(level)
+    logging.getLogger("supervisor").setLevel(level)
+    logging.getLogger("watchdog").setLevel(level)
     logging.getLogger("pyvmtivo").setLevel(level)
 
+    lag_threshold: float = float(
+        os.getenv("UC_LOOP_LAG_THRESHOLD", LOOP_LAG_THRESHOLD * 1000)
+    )
+    if lag_threshold > 0:
+        _WATCHDOG.start(lag_threshold / 1000)
+
+    TRACER.enabled = bool(os.getenv("UC_TRACE"))
+    if metrics_port := os.getenv("UC_METRICS_PORT"):
+        await async_start_metrics_server(int(metrics_port))
+
     config.devices = config.Devices(
         api.config_dir_path, on_device_added, on_device_removed
     )
+    if (shards := int(os.getenv("UC_SHARDS", "0"))) > 1:
+        _SUPERVISOR = shard.ShardRouter(
+            shards, config.devices.data_path, async_on_remote_attributes_changed
+        )
+        _SUPERVISOR.start_processes()
+    snapshot.snapshots = snapshot.Snapshots(
+        os.path.join(config.devices.data_path, SNAPSHOT_FILENAME)
+    )
+    snapshot.snapshots.load()
     for device in config.devices.all():
         _configure_new_device(device)
+    refresh: asyncio.Task = asyncio.create_task(async_refresh_devices())
+    _BACKGROUND_TASKS.add(refresh)
+    refresh.add_done_callback(_BACKGROUND_TASKS.discard)
+    setup_profiling(config.devices.data_path)
+    for signum in ("SIGINT", "SIGTERM"):
+        # not every platform has the signals or supports handling them
+        with contextlib.suppress(AttributeError, NotImplementedError, RuntimeError):
+            _LOOP.add_signal_handler(getattr(signal, signum), shutdown)
 
     setup: SetupFlow = SetupFlow()
     await api.init(
@@ -222,5 +582,9 @@ async def async_main():
 
 
 if __name__ == "__main__":
-    _LOOP.run_until_complete(async_main())
-    _LOOP.run_forever()
+    # a frozen build is a single executable, so it runs the shards too
+    if "--shard" in sys.argv[1:]:
+        shard.main()
+    else:
+        _LOOP.run_until_complete(async_main())
+        _LOOP.run_forever()
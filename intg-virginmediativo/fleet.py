@@ -0,0 +1,146 @@
+"""Send the same command to many TiVos at once."""
+
+import asyncio
+import dataclasses
+import logging
+import time
+from collections.abc import Callable, Iterable
+from typing import Any
+
+from const import FLEET_CONCURRENCY, FLEET_DEVICE_DEADLINE, FLEET_DEVICE_ID
+from logger import log, log_formatter
+from remote import TivoRemote, UiTemplates, ui_templates
+from ucapi import EntityTypes, Remote
+from ucapi.api_definitions import StatusCodes
+from ucapi.remote import Attributes, Features, States
+
+_LOG: logging.Logger = logging.getLogger(__name__)
+_LOG_INC_DATETIME: bool = True
+
+
+@dataclasses.dataclass(frozen=True)
+class FleetResult:
+    """Outcome of a broadcast command on a single TiVo."""
+
+    device_id: str
+    status: StatusCodes
+    elapsed: float
+
+
+async def async_broadcast(
+    devices: Iterable[TivoRemote],
+    cmd_id: str,
+    params: dict[str, Any] | None = None,
+    concurrency: int = FLEET_CONCURRENCY,
+    deadline: float = FLEET_DEVICE_DEADLINE,
+) -> dict[str, FleetResult]:
+    """Run the command on each of the devices concurrently.
+
+    :param devices: the remotes to send the command to
+    :param cmd_id: the entity command, as sent by the Remote
+    :param params: the command parameters, each device gets its own copy
+    :param concurrency: the most devices to talk to at the same time
+    :param deadline: seconds each device has to carry out the command
+    :return: the result for each device, keyed by the device id
+    """
+    semaphore: asyncio.Semaphore = asyncio.Semaphore(concurrency)
+
+    async def _async_run(device: TivoRemote) -> FleetResult:
+        async with semaphore:
+            start: float = time.monotonic()
+            try:
+                status: StatusCodes = await asyncio.wait_for(
+                    device.command(cmd_id, dict(params or {})), deadline
+                )
+            except TimeoutError:
+                status = StatusCodes.TIMEOUT
+            except Exception as exc:  # pylint: disable=broad-except
+                _LOG.error(
+                    log_formatter(
+                        f"{device.id}: {exc}", include_datetime=_LOG_INC_DATETIME
+                    )
+                )
+                status = StatusCodes.SERVER_ERROR
+
+            return FleetResult(device.id, status, time.monotonic() - start)
+
+    results: list[FleetResult] = await asyncio.gather(
+        *(_async_run(device) for device in devices)
+    )
+
+    return {result.device_id: result for result in results}
+
+
+def summarise(results: dict[str, FleetResult]) -> StatusCodes:
+    """Reduce the results to a single status.
+
+    OK when every device carried out the command, otherwise the status of the
+    first device that didn't.
+    """
+    for result in results.values():
+        if result.status != StatusCodes.OK:
+            return result.status
+
+    return StatusCodes.OK
+
+
+class FleetRemote(Remote):
+    """Remote that sends each command to every configured TiVo."""
+
+    @log(_LOG, include_datetime=_LOG_INC_DATETIME)
+    def __init__(self, devices: Callable[[], Iterable[TivoRemote]]) -> None:
+        """Initialise.
+
+        :param devices: returns the remotes to send commands to
+        """
+
+        self._devices: Callable[[], Iterable[TivoRemote]] = devices
+
+        templates: UiTemplates = ui_templates()
+        super().__init__(
+            f"{EntityTypes.REMOTE.value}.{FLEET_DEVICE_ID}",
+            "All TiVos",
+            [Features.ON_OFF, Features.SEND_CMD],
+            {Attributes.STATE: States.ON},
+            button_mapping=templates.button_mapping,
+            simple_commands=templates.simple_commands,
+            ui_pages=templates.ui_pages,
+        )
+
+    @log(_LOG, include_datetime=_LOG_INC_DATETIME)
+    async def command(
+        self, cmd_id: str, params: dict[str, Any] | None = None
+    ) -> StatusCodes:
+        """Send the command to the TiVos.
+
+        An optional `devices` parameter limits the command to the listed
+        device ids.
+        """
+
+        params = dict(params or {})
+        device_ids: list[str] | None = params.pop("devices", None)
+        devices: list[TivoRemote] = [
+            device
+            for device in self._devices()
+            if device_ids is None or device.tivo_config.id in device_ids
+        ]
+        if not devices:
+            return StatusCodes.NOT_FOUND
+
+        results: dict[str, FleetResult] = await async_broadcast(
+            devices, cmd_id, params
+        )
+        if failed := [
+            f"{result.device_id} ({result.status.name})"
+            for result in results.values()
+            if result.status != StatusCodes.OK
+        ]:
+            _LOG.warning(
+                log_formatter(
+                    f"{cmd_id} failed on {len(failed)} of {len(results)}: "
+                    f"{', '.join(failed)}",
+                    include_datetime=_LOG_INC_DATETIME,
+                )
+            )
+
+        return summarise(results)
@@ -1,11 +1,23 @@
 """Logging."""
 
+import atexit
+import contextlib
 import datetime
 import inspect
+import logging
+import logging.handlers
+import queue
+import sys
 from functools import wraps
 from logging import Logger
 from typing import Any, Callable
 
+from pyvmtivo.metrics import REGISTRY, Counter
+
+_RECORDS_DROPPED: Counter = REGISTRY.counter(
+    "vmtivo_log_records_dropped_total", "Log records dropped as the queue was full"
+)
+
 
 def log_formatter(
     msg, include_datetime: bool = True, func: Callable | None = None
@@ -18,7 +30,7 @@ def log_formatter(
     ret += (
         f"{func.__module__}.{func.__qualname__}"
         if func is not None
-        else f"{inspect.getmodule(inspect.currentframe().f_back).__name__}.{inspect.currentframe().f_back.f_code.co_qualname}"
+        else f"{inspect.currentframe().f_back.f_globals['__name__']}.{inspect.currentframe().f_back.f_code.co_qualname}"
     )
     ret += f" {msg}"
 
@@ -30,6 +42,8 @@ def log(logger: Logger, include_datetime: bool = True, include_func_name: bool =
 
     def decorator(func):
         def start_log(*args, **kwargs):
+            if not logger.isEnabledFor(logging.DEBUG):
+                return
             repr_args: list[Any] = [repr(a) for a in args]
             repr_kwargs = [f"{k}={repr(v)}" for k, v in kwargs.items()]
             signature: str = ", ".join(repr_args + repr_kwargs)
@@ -40,6 +54,8 @@ def log(logger: Logger, include_datetime: bool = True, include_func_name: bool =
             )
 
         def end_log(ret: Any):
+            if not logger.isEnabledFor(logging.DEBUG):
+                return
             logger.debug(
                 log_formatter(f"exited {repr(ret)}", include_datetime, func=func)
             )
@@ -61,3 +77,85 @@ def log(logger: Logger, include_datetime: bool = True, include_func_name: bool =
         return async_wrapper if inspect.iscoroutinefunction(func) else wrapper
 
     return decorator
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Hand records to a bounded queue, dropping them when it is full.
+
+    Only the message is merged on the caller's thread, the formatting and
+    writing happen on the listener's. Dropped records are counted and a
+    warning with the count is queued once there is room again.
+    """
+
+    def __init__(self, log_queue: queue.Queue) -> None:
+        """Initialise."""
+        super().__init__(log_queue)
+        self._dropped: int = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        """Queue the record, or count it if the queue is full."""
+        try:
+            if self._dropped:
+                self.queue.put_nowait(
+                    logging.makeLogRecord(
+                        {
+                            "levelname": logging.getLevelName(logging.WARNING),
+                            "levelno": logging.WARNING,
+                            "msg": f"{self._dropped} log records dropped",
+                            "name": __name__,
+                        }
+                    )
+                )
+                self._dropped = 0
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self._dropped += 1
+            _RECORDS_DROPPED.inc()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Merge the message and arguments, leaving formatting to the listener."""
+        if record.exc_info:
+            return super().prepare(record)
+
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def start_log_pipeline(
+    queue_size: int,
+    filename: str | None = None,
+    max_bytes: int = 0,
+    backup_count: int = 0,
+) -> logging.handlers.QueueListener:
+    """Send log records to stderr, or a file, from a background thread.
+
+    :param queue_size: the most records waiting to be written
+    :param filename: file to write to instead of stderr
+    :param max_bytes: size the file is rotated at, 0 to never rotate
+    :param backup_count: the number of rotated files kept
+    """
+    handler: logging.Handler
+    if filename:
+        handler = logging.handlers.RotatingFileHandler(
+            filename, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+        )
+    else:
+        handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+
+    log_queue: queue.Queue = queue.Queue(queue_size)
+    logging.getLogger().addHandler(DroppingQueueHandler(log_queue))
+    listener: logging.handlers.QueueListener = logging.handlers.QueueListener(
+        log_queue, handler, respect_handler_level=True
+    )
+    listener.start()
+
+    def _stop() -> None:
+        # flush the queue on exit, unless already stopped
+        with contextlib.suppress(AttributeError):
+            listener.stop()
+
+    atexit.register(_stop)
+
+    return listener
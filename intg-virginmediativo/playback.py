@@ -0,0 +1,153 @@
+"""Track the playback state of the remote."""
+
+import logging
+import time
+from enum import StrEnum
+
+from logger import log_formatter
+from pyvmtivo.metrics import REGISTRY, Counter
+from ucapi.media_player import Commands as MediaPlayerCommands
+
+_LOG: logging.Logger = logging.getLogger(__name__)
+_LOG_INC_DATETIME: bool = True
+
+
+class RemoteState(StrEnum):
+    """Possible remote states.
+
+    Paused and speeding are tracked separately for live TV and recordings, so
+    playing again returns to the right one.
+    """
+
+    DVR = "dvr"
+    LIVE = "live"
+    PAUSED = "paused"
+    PAUSED_DVR = "paused_dvr"
+    SPEEDING = "speeding"
+    SPEEDING_DVR = "speeding_dvr"
+
+
+class Reply(StrEnum):
+    """Replies from the TiVo that affect the playback state."""
+
+    CHANNEL_STATUS = "channel_status"
+    CONNECTION_RESET = "connection_reset"
+
+
+PLAYING_STATES: frozenset[RemoteState] = frozenset({RemoteState.DVR, RemoteState.LIVE})
+
+# the playing, paused and speeding states for live TV and for recordings
+_LIVE_STATES: tuple[RemoteState, RemoteState, RemoteState] = (
+    RemoteState.LIVE,
+    RemoteState.PAUSED,
+    RemoteState.SPEEDING,
+)
+_DVR_STATES: tuple[RemoteState, RemoteState, RemoteState] = (
+    RemoteState.DVR,
+    RemoteState.PAUSED_DVR,
+    RemoteState.SPEEDING_DVR,
+)
+
+
+def _build_transitions() -> dict[tuple[RemoteState, str], RemoteState]:
+    """Build the transition table.
+
+    Triggers are either the command sent or the reply received. Anything not
+    in the table leaves the state as it is.
+
+    - pausing, speeding and playing stay with live TV or the recording
+    - Play/Pause pauses whilst playing and plays otherwise
+    - Live TV and Stop always go to live TV
+    - a channel status means the TiVo is showing live TV rather than a
+      recording, the connection being reset means the opposite
+    """
+    ret: dict[tuple[RemoteState, str], RemoteState] = {}
+    for states, other in ((_LIVE_STATES, _DVR_STATES), (_DVR_STATES, _LIVE_STATES)):
+        playing, paused, speeding = states
+        for state in states:
+            ret[(state, MediaPlayerCommands.FAST_FORWARD)] = speeding
+            ret[(state, MediaPlayerCommands.LIVE)] = RemoteState.LIVE
+            ret[(state, MediaPlayerCommands.REWIND)] = speeding
+            ret[(state, MediaPlayerCommands.STOP)] = RemoteState.LIVE
+            ret[(state, "PAUSE")] = paused
+            ret[(state, "PLAY")] = playing
+            ret[(state, MediaPlayerCommands.PLAY_PAUSE)] = (
+                paused if state is playing else playing
+            )
+
+        trigger: Reply = (
+            Reply.CONNECTION_RESET if states is _LIVE_STATES else Reply.CHANNEL_STATUS
+        )
+        for state, moved in zip(states, other):
+            ret[(state, trigger)] = moved
+
+    return ret
+
+
+TRANSITIONS: dict[tuple[RemoteState, str], RemoteState] = _build_transitions()
+
+
+_TIME_IN_STATE: dict[RemoteState, Counter] = {
+    state: REGISTRY.counter(
+        "vmtivo_playback_state_seconds_total",
+        "Time remotes have spent in each playback state",
+        state=state.value,
+    )
+    for state in RemoteState
+}
+_TRANSITIONS: dict[tuple[RemoteState, RemoteState], Counter] = {}
+
+
+def _transition_counter(source: RemoteState, target: RemoteState) -> Counter:
+    """Return the counter for the transition, creating it on first use."""
+    if (counter := _TRANSITIONS.get((source, target))) is None:
+        counter = _TRANSITIONS[(source, target)] = REGISTRY.counter(
+            "vmtivo_playback_transitions_total",
+            "Playback state transitions made by remotes",
+            source=source.value,
+            target=target.value,
+        )
+
+    return counter
+
+
+class PlaybackStateMachine:
+    """Playback state of a single remote.
+
+    Counts the transitions made and the time spent in each state in the
+    metrics.
+    """
+
+    def __init__(self, state: RemoteState = RemoteState.LIVE) -> None:
+        """Initialise."""
+        self._entered: float = time.monotonic()
+        self._state: RemoteState = state
+
+    def fire(self, trigger: str) -> RemoteState:
+        """Move to the next state for the given command or reply."""
+        if (next_state := TRANSITIONS.get((self._state, trigger))) is not None:
+            self.move_to(next_state, trigger)
+
+        return self._state
+
+    def move_to(self, state: RemoteState, trigger: str = "") -> None:
+        """Move to the given state, as already looked up in the table."""
+        if state is self._state:
+            return
+
+        now: float = time.monotonic()
+        _TIME_IN_STATE[self._state].inc(now - self._entered)
+        _transition_counter(self._state, state).inc()
+        _LOG.debug(
+            log_formatter(
+                f"{self._state.value} -> {state.value} ({trigger})",
+                include_datetime=_LOG_INC_DATETIME,
+            )
+        )
+        self._entered = now
+        self._state = state
+
+    @property
+    def state(self) -> RemoteState:
+        """Return the current state."""
+        return self._state
@@ -0,0 +1,146 @@
+"""Profile the running integration on demand."""
+
+import asyncio
+import cProfile
+import datetime as dt
+import glob
+import io
+import logging
+import os
+import pstats
+import tracemalloc
+from enum import StrEnum
+
+from const import PROFILE_KEEP, PROFILE_TOP_ENTRIES, PROFILE_WINDOW
+from logger import log, log_formatter
+
+_LOG: logging.Logger = logging.getLogger(__name__)
+_LOG_INC_DATETIME: bool = True
+
+
+class ProfileType(StrEnum):
+    """Available profiles."""
+
+    CPU = "cpu"
+    MEMORY = "memory"
+
+
+class Profiler:
+    """Profile the integration for a fixed window and write the results.
+
+    CPU profiles are written as a pstats dump, for loading into tools such as
+    snakeviz, along with a text summary. Memory profiles compare tracemalloc
+    snapshots taken at the start and end of the window. Only the most recent
+    few of each are kept.
+    """
+
+    def __init__(self, path: str, window: float = PROFILE_WINDOW) -> None:
+        """Initialise.
+
+        :param path: directory to write the results to
+        :param window: seconds to profile for
+        """
+        self._path: str = path
+        self._running: set[ProfileType] = set()
+        self._window: float = window
+
+    def _filename(self, profile_type: ProfileType, extension: str, stamp: str) -> str:
+        """Return the file to write to, removing the oldest files.
+
+        :param stamp: when the profile was taken, shared by all its files
+        """
+        os.makedirs(self._path, exist_ok=True)
+        existing: list[str] = sorted(
+            glob.glob(os.path.join(self._path, f"{profile_type}-*.{extension}"))
+        )
+        for filename in existing[: max(len(existing) - PROFILE_KEEP + 1, 0)]:
+            os.remove(filename)
+
+        return os.path.join(self._path, f"{profile_type}-{stamp}.{extension}")
+
+    def _write_cpu(self, profile: cProfile.Profile) -> str:
+        """Write the CPU profile and its summary."""
+        stamp: str = dt.datetime.now().strftime("%Y%m%d-%H%M%S")
+        filename: str = self._filename(ProfileType.CPU, "prof", stamp)
+        profile.dump_stats(filename)
+        summary: io.StringIO = io.StringIO()
+        pstats.Stats(profile, stream=summary).sort_stats(
+            pstats.SortKey.CUMULATIVE
+        ).print_stats(PROFILE_TOP_ENTRIES)
+        summary_filename: str = self._filename(ProfileType.CPU, "txt", stamp)
+        with open(summary_filename, "w", encoding="utf-8") as f:
+            f.write(summary.getvalue())
+
+        return filename
+
+    def _write_memory(
+        self, start: tracemalloc.Snapshot, end: tracemalloc.Snapshot
+    ) -> str:
+        """Write the growth in memory allocations over the window."""
+        filename: str = self._filename(
+            ProfileType.MEMORY, "txt", dt.datetime.now().strftime("%Y%m%d-%H%M%S")
+        )
+        current, peak = tracemalloc.get_traced_memory()
+        with open(filename, "w", encoding="utf-8") as f:
+            f.write(f"traced: {current} bytes, peak: {peak} bytes\n\n")
+            for stat in end.compare_to(start, "lineno")[:PROFILE_TOP_ENTRIES]:
+                f.write(f"{stat}\n")
+
+        return filename
+
+    @log(_LOG, include_datetime=_LOG_INC_DATETIME)
+    async def async_profile(self, profile_type: ProfileType) -> str | None:
+        """Profile for the window and write the results.
+
+        :return: the file written, None if already profiling
+        """
+        if profile_type in self._running:
+            return None
+
+        self._running.add(profile_type)
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        _LOG.info(
+            log_formatter(
+                f"{profile_type} profiling for {self._window}s",
+                include_datetime=_LOG_INC_DATETIME,
+            )
+        )
+        try:
+            if profile_type == ProfileType.CPU:
+                profile: cProfile.Profile = cProfile.Profile()
+                profile.enable()
+                try:
+                    await asyncio.sleep(self._window)
+                finally:
+                    profile.disable()
+                filename: str = await loop.run_in_executor(
+                    None, self._write_cpu, profile
+                )
+            else:
+                tracing: bool = tracemalloc.is_tracing()
+                if not tracing:
+                    tracemalloc.start()
+                try:
+                    start: tracemalloc.Snapshot = tracemalloc.take_snapshot()
+                    await asyncio.sleep(self._window)
+                    end: tracemalloc.Snapshot = tracemalloc.take_snapshot()
+                    filename = await loop.run_in_executor(
+                        None, self._write_memory, start, end
+                    )
+                finally:
+                    if not tracing:
+                        tracemalloc.stop()
+        except (OSError, ValueError) as exc:
+            # ValueError is raised if another profiler is already running
+            _LOG.error(log_formatter(exc, include_datetime=_LOG_INC_DATETIME))
+            return None
+        finally:
+            self._running.discard(profile_type)
+
+        _LOG.info(
+            log_formatter(
+                f"{profile_type} profile written to {filename}",
+                include_datetime=_LOG_INC_DATETIME,
+            )
+        )
+        return filename
@@ -0,0 +1,98 @@
+"""Stop trying to connect to a device that can't be reached."""
+
+# region #-- imports --#
+import random
+import time
+from enum import StrEnum
+
+# endregion
+
+
+class BreakerState(StrEnum):
+    """Possible circuit breaker states."""
+
+    CLOSED = "closed"
+    HALF_OPEN = "half_open"
+    OPEN = "open"
+
+
+class CircuitBreaker:
+    """Fail fast whilst a device is unreachable.
+
+    After a number of consecutive failures the circuit opens and attempts are
+    refused for a backoff period. Once that has passed a single attempt is let
+    through; success closes the circuit, failure opens it again for twice as
+    long, up to a maximum. Backoffs are shortened by a random amount so that
+    many devices don't all retry together.
+    """
+
+    def __init__(
+        self,
+        threshold: int,
+        backoff: float,
+        max_backoff: float,
+        jitter: float = 0.5,
+    ) -> None:
+        """Initialise.
+
+        :param threshold: consecutive failures that open the circuit
+        :param backoff: seconds to refuse attempts for the first time it opens
+        :param max_backoff: most seconds to refuse attempts for
+        :param jitter: largest fraction of the backoff removed at random
+        """
+        self._backoff: float = backoff
+        self._failures: int = 0
+        self._jitter: float = jitter
+        self._max_backoff: float = max_backoff
+        self._opened: int = 0
+        self._retry_at: float = 0.0
+        self._state: BreakerState = BreakerState.CLOSED
+        self._threshold: int = threshold
+
+    def allow(self) -> bool:
+        """Check whether an attempt can be made now.
+
+        When the backoff has passed this lets a single attempt through, further
+        attempts are refused until that one succeeds or fails.
+        """
+        if self._state is BreakerState.CLOSED:
+            return True
+        if self._state is BreakerState.OPEN and time.monotonic() >= self._retry_at:
+            self._state = BreakerState.HALF_OPEN
+            return True
+
+        return False
+
+    def record_failure(self) -> None:
+        """Record a failed attempt, opening the circuit if need be."""
+        self._failures += 1
+        if self._state is BreakerState.HALF_OPEN or self._failures >= self._threshold:
+            backoff: float = min(self._backoff * 2**self._opened, self._max_backoff)
+            self._opened += 1
+            self._retry_at = time.monotonic() + backoff * (
+                1 - self._jitter * random.random()
+            )
+            self._state = BreakerState.OPEN
+
+    def record_success(self) -> None:
+        """Record a successful attempt, closing the circuit."""
+        self.reset()
+
+    def reset(self) -> None:
+        """Close the circuit and forget previous failures."""
+        self._failures = 0
+        self._opened = 0
+        self._state = BreakerState.CLOSED
+
+    @property
+    def retry_in(self) -> float:
+        """Return the seconds until an attempt will be let through."""
+        if self._state is BreakerState.CLOSED:
+            return 0.0
+
+        return max(self._retry_at - time.monotonic(), 0.0)
+
+    @property
+    def state(self) -> BreakerState:
+        """Return the state of the circuit."""
+        return self._state
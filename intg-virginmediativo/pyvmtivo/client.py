@@ -5,14 +5,33 @@ import asyncio
 import contextlib
 import logging
 import re
+import time
+from collections.abc import Iterator
 from typing import Callable
 
+from .breaker import CircuitBreaker
 from .const import (
+    DEFAULT_BREAKER_BACKOFF,
+    DEFAULT_BREAKER_MAX_BACKOFF,
+    DEFAULT_BREAKER_THRESHOLD,
     DEFAULT_COMMAND_TIMEOUT,
     DEFAULT_CONNECT_PORT,
     DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_HAPPY_EYEBALLS_DELAY,
+    DEFAULT_HOLD_KEY_RATE,
+    DEFAULT_TEXT_KEY_RATE,
+    DEFAULT_TEXT_REPLY_WAIT,
+    IRCODE_CHANNEL_DOWN,
+    IRCODE_CHANNEL_UP,
+    KEY_RATE_CALIBRATION_BURST,
+    KEY_RATE_CALIBRATION_RATES,
+    KEY_RATE_CALIBRATION_RECOVERY,
+    KEY_RATE_PROBE_CODE,
+    KEY_RATE_SAFETY_MARGIN,
+    KEYBOARD_CODES,
 )
 from .exceptions import (
+    VirginMediaCircuitOpen,
     VirginMediaCommandTimeout,
     VirginMediaConnectionReset,
     VirginMediaError,
@@ -22,12 +41,52 @@ from .exceptions import (
     VirginMediaNotLive,
     format_error_message,
 )
+from .lineup import ChannelLineup
 from .logger import Logger
+from .metrics import REGISTRY, Counter, Histogram
+from .pacing import TokenBucket
+from .tracing import TRACER
 
 # endregion
 
 _LOGGER = logging.getLogger(__name__)
 
+_CIRCUIT_OPEN: Counter = REGISTRY.counter(
+    "vmtivo_circuit_open_total", "Connections refused whilst a device is unreachable"
+)
+_COMMAND_SECONDS: dict[str, Histogram] = {}
+_CONNECT_FAILURES: Counter = REGISTRY.counter(
+    "vmtivo_connect_failures_total", "Failed connection attempts"
+)
+_CONNECT_SECONDS: Histogram = REGISTRY.histogram(
+    "vmtivo_connect_seconds", "Time taken to connect to a device"
+)
+_RESETS: Counter = REGISTRY.counter(
+    "vmtivo_connection_resets_total", "Connections closed by a device"
+)
+_STALE_REPLIES: Counter = REGISTRY.counter(
+    "vmtivo_stale_replies_total", "Replies left unread on a kept open connection"
+)
+_STALE_RETRIES: Counter = REGISTRY.counter(
+    "vmtivo_stale_connection_retries_total",
+    "Commands sent again on a new connection after a kept open one failed",
+)
+_TIMEOUTS: Counter = REGISTRY.counter(
+    "vmtivo_timeouts_total", "Connections and replies that timed out"
+)
+
+
+def _command_histogram(command: str) -> Histogram:
+    """Return the histogram for the command, creating it on first use."""
+    if (histogram := _COMMAND_SECONDS.get(command)) is None:
+        histogram = _COMMAND_SECONDS[command] = REGISTRY.histogram(
+            "vmtivo_command_seconds",
+            "Time taken for a device to reply to a command",
+            command=command,
+        )
+
+    return histogram
+
 
 class Device:
     """Represents the attributes of the device."""
@@ -38,6 +97,8 @@ class Device:
         self._port: int = port
 
         self._channel_number: int | None = None
+        self._last_reply: str | None = None
+        self._lineup: ChannelLineup = ChannelLineup()
         self._prev_channel_number: int | None = None
 
     @property
@@ -45,6 +106,11 @@ class Device:
         """Return the device hostname."""
         return self._host
 
+    @host.setter
+    def host(self, value: str) -> None:
+        """Set the device hostname."""
+        self._host = value
+
     @property
     def port(self) -> int:
         """Return the port number used for connecting to the device."""
@@ -62,6 +128,26 @@ class Device:
             self._prev_channel_number = self._channel_number
             self._channel_number = value
 
+    @property
+    def lineup(self) -> ChannelLineup:
+        """Return the channel lineup learned from the device."""
+        return self._lineup
+
+    @lineup.setter
+    def lineup(self, value: ChannelLineup) -> None:
+        """Set the channel lineup, e.g. one previously saved."""
+        self._lineup = value
+
+    @property
+    def last_reply(self) -> str | None:
+        """Return the last reply received from the device."""
+        return self._last_reply
+
+    @last_reply.setter
+    def last_reply(self, value: str | None) -> None:
+        """Set the last reply received from the device."""
+        self._last_reply = value
+
     @property
     def previous_channel_number(self) -> int | None:
         """Return the previous channel number."""
@@ -77,43 +163,303 @@ class Client:
         port: int = DEFAULT_CONNECT_PORT,
         timeout: float = DEFAULT_CONNECT_TIMEOUT,
         command_timeout: float = DEFAULT_COMMAND_TIMEOUT,
+        addresses: list[str] | None = None,
+        happy_eyeballs_delay: float = DEFAULT_HAPPY_EYEBALLS_DELAY,
+        key_rate: float | None = None,
     ) -> None:
-        """Initialise."""
+        """Initialise.
+
+        :param addresses: all addresses the device is known by, these are raced
+            when connecting with the last successful one attempted first
+        :param happy_eyeballs_delay: time to wait for an attempt before starting
+            the next one
+        :param key_rate: maximum number of keys per second the device accepts,
+            None to send keys as quickly as they are requested
+        """
+        self._addresses: list[str] = []
+        self._breaker: CircuitBreaker = CircuitBreaker(
+            DEFAULT_BREAKER_THRESHOLD,
+            DEFAULT_BREAKER_BACKOFF,
+            DEFAULT_BREAKER_MAX_BACKOFF,
+        )
         self._command_timeout: float | None = command_timeout or DEFAULT_COMMAND_TIMEOUT
+        self._connect_failures: int = 0
         self._data_callback: list = []
+        self._happy_eyeballs_delay: float = happy_eyeballs_delay
         self._host: str = host
+        self._idle_close: asyncio.TimerHandle | None = None
+        self._idle_timeout: float | None = None
+        self._linger: bool = False
         self._lock_read: asyncio.Lock = asyncio.Lock()
         self._log_formatter: Logger = Logger()
+        self._pacer: TokenBucket | None = None
+        self._status_pending: bool = False
         self._port: int = port
         self._timeout: float = timeout
         self._reader: asyncio.StreamReader | None = None
+        self._reused: bool = False
+        self._rtt: float | None = None
         self._tivo: Device = Device(host=self._host, port=self._port)
+        self._users: int = 0
         self._writer: asyncio.StreamWriter | None = None
+        self.addresses = addresses or []
+        self.key_rate = key_rate
 
     async def __aenter__(self) -> "Client":
-        """Entry point for the Context Manager."""
-        await self.connect()
+        """Entry point for the Context Manager.
+
+        A connection kept open from an earlier use is reused, as long as the
+        device hasn't closed it.
+        """
+        self._cancel_idle_close()
+        if not self._is_usable:
+            await self.connect()
+        elif not self._users:
+            self._reused = True
+        self._users += 1
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
-        """Exit point for the Context Manager."""
-        await self.disconnect()
+        """Exit point for the Context Manager.
+
+        The connection is closed unless it is being kept open, in which case
+        it is closed once left idle. A connection that saw an error is always
+        closed.
+        """
+        self._users = max(self._users - 1, 0)
+        if self._users:
+            return
+        if self._idle_timeout is None or exc_type is not None:
+            await self.disconnect()
+        else:
+            self._idle_close = asyncio.get_running_loop().call_later(
+                self._idle_timeout, self._close_idle
+            )
 
     # region #-- private methods --#
-    async def _send(self, data: str, wait_for_reply: bool = True) -> None:
+    def _cancel_idle_close(self) -> None:
+        """Stop an idle connection from being closed."""
+        if self._idle_close is not None:
+            self._idle_close.cancel()
+            self._idle_close = None
+
+    def _close_idle(self) -> None:
+        """Close the connection after being left idle."""
+        _LOGGER.debug(self._log_formatter.format("closing idle connection"))
+        self._idle_close = None
+        if self._linger:
+            self._idle_timeout = None
+            self._linger = False
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = None
+        self._writer = None
+
+    @property
+    def _is_usable(self) -> bool:
+        """Check the connection is open and hasn't been closed by the device."""
+        return self.is_connected and not self._reader.at_eof()
+
+    async def _open_connection(
+        self, host: str
+    ) -> tuple[str, asyncio.StreamReader, asyncio.StreamWriter]:
+        """Open a connection to a single address."""
+        reader, writer = await asyncio.open_connection(host, self._port)
+        return host, reader, writer
+
+    async def _race_connections(
+        self,
+    ) -> tuple[str, asyncio.StreamReader, asyncio.StreamWriter]:
+        """Race connections to all known addresses (RFC 8305 style).
+
+        Attempts are started in order, each one delayed by the happy eyeballs
+        delay unless the previous attempt has already failed. The first
+        attempt to connect wins and the others are cancelled.
+        """
+        hosts: Iterator[str] = iter(self._addresses)
+        last_error: Exception | None = None
+        pending: set[asyncio.Task] = set()
+        try:
+            while True:
+                host: str | None = next(hosts, None)
+                if host is not None:
+                    pending.add(asyncio.create_task(self._open_connection(host)))
+                if not pending:
+                    break
+
+                done, pending = await asyncio.wait(
+                    pending,
+                    timeout=self._happy_eyeballs_delay if host is not None else None,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                winner: tuple | None = None
+                for task in done:
+                    if (err := task.exception()) is not None:
+                        _LOGGER.debug(
+                            self._log_formatter.format("attempt failed: %s"), err
+                        )
+                        last_error = err
+                    elif winner is None:
+                        winner = task.result()
+                    else:
+                        task.result()[2].close()
+                if winner is not None:
+                    return winner
+        finally:
+            for task in pending:
+                task.cancel()
+            for res in await asyncio.gather(*pending, return_exceptions=True):
+                if isinstance(res, tuple):
+                    res[2].close()
+
+        raise last_error or OSError(f"no addresses to connect to for {self._host}")
+
+    @staticmethod
+    def _count_invalid(reply: str) -> None:
+        """Count a reply rejecting a command."""
+        REGISTRY.counter(
+            "vmtivo_invalid_replies_total",
+            "Commands rejected by a device",
+            reply=reply.lower(),
+        ).inc()
+
+    async def _drain_stale_replies(self) -> bool:
+        """Read the replies already waiting on a kept open connection.
+
+        Replies to keys that weren't waited for, or that arrived after a
+        timeout, would otherwise be read as the reply to the next command.
+        The channel they report is kept, errors in them are for earlier
+        commands so are ignored.
+
+        :return: False if the device has closed the connection
+        """
+        if self._status_pending or self._reader is None or self._lock_read.locked():
+            return True
+
+        async with self._lock_read:
+            while True:
+                read: asyncio.Task = asyncio.ensure_future(self._reader.read(1024))
+                # the read only completes without waiting if data is buffered
+                await asyncio.sleep(0)
+                if not read.done():
+                    read.cancel()
+                    with contextlib.suppress(asyncio.CancelledError):
+                        await read
+                    return True
+                if read.exception() is not None or not (data := read.result()):
+                    return False
+
+                _STALE_REPLIES.inc()
+                _LOGGER.debug(self._log_formatter.format("stale data: %s"), data)
+                with contextlib.suppress(VirginMediaError):
+                    self._process_reply(data)
+
+    def _process_reply(self, data: bytes) -> None:
+        """Record what the device replied and let the callbacks know.
+
+        :raises VirginMediaError: if the device rejected the command
+        """
+        data = data.decode().strip()
+        self._tivo.last_reply = data
+        if data.startswith("CH_STATUS"):
+            # several statuses can arrive together, the last is the latest
+            regex = r"CH_STATUS (\d{4})"
+            regex_match: list[str] = re.findall(regex, data)
+            if regex_match:
+                self._tivo.channel_number = int(regex_match[-1])
+                self._tivo.lineup.add(self._tivo.channel_number)
+        elif data.startswith("CH_FAILED"):
+            self._count_invalid(data.split(" ")[-1])
+            raise VirginMediaError(data.split(" ")[-1])
+        elif data == "INVALID_KEY":
+            self._count_invalid(data)
+            raise VirginMediaError(data)
+        elif data == "INVALID_COMMAND":
+            self._count_invalid(data)
+            raise VirginMediaError(data)
+
+        if self._data_callback:
+            _LOGGER.debug(self._log_formatter.format("executing callbacks"))
+            for func in self._data_callback:
+                if isinstance(func, Callable):
+                    func(self._tivo)
+
+    async def _read_pending_status(self) -> None:
+        """Read the status sent on connecting, if not already read.
+
+        Ensures that the next reply read is for the command that is sent.
+        """
+        if self._status_pending:
+            with contextlib.suppress(VirginMediaCommandTimeout):
+                await self.wait_for_data()
+
+    async def _reconnect(self) -> None:
+        """Replace the connection with a new one, its status read."""
+        with contextlib.suppress(OSError):
+            await self.disconnect()
+        await self.connect()
+        await self._read_pending_status()
+
+    @TRACER.traced("client.send")
+    async def _send(
+        self, data: str, wait_for_reply: bool = True, retry_on_timeout: bool = False
+    ) -> None:
         """Send request to the device.
 
+        A request waiting for a reply on a kept open connection is sent again,
+        once, on a new connection if the device has reset the old one. Only
+        requests the device always replies to should be retried on a timeout.
+
         :param data: data to send
         :param wait_for_reply: True to wait for the reply
+        :param retry_on_timeout: True if a timeout means the request was lost
         :return: None
         """
         data = f"{data}\r".upper()
+        retry: bool = wait_for_reply and self._reused
         try:
             if self._writer:
-                self._writer.write(data.encode())
-                await self._writer.drain()
-                if wait_for_reply:
+                if wait_for_reply and not await self._drain_stale_replies():
+                    retry = False
+                    await self._reconnect()
+                start: float = time.perf_counter()
+                try:
+                    self._writer.write(data.encode())
+                    await self._writer.drain()
+                    if wait_for_reply:
+                        await self.wait_for_data()
+                except (OSError, VirginMediaError) as err:
+                    lost: bool = isinstance(
+                        err, (OSError, VirginMediaConnectionReset)
+                    ) or (
+                        retry_on_timeout and isinstance(err, VirginMediaCommandTimeout)
+                    )
+                    if not retry or not lost:
+                        raise
+                    _STALE_RETRIES.inc()
+                    _LOGGER.debug(
+                        self._log_formatter.format(
+                            "kept open connection failed (%s), sending again"
+                        ),
+                        err,
+                    )
+                    await self._reconnect()
+                    start = time.perf_counter()
+                    self._writer.write(data.encode())
+                    await self._writer.drain()
                     await self.wait_for_data()
+                if wait_for_reply:
+                    self._reused = False
+                    elapsed: float = time.perf_counter() - start
+                    _command_histogram(data.split(" ", 1)[0].lower()).observe(
+                        elapsed
+                    )
+                    # smoothed as TCP does for its round trip time
+                    self._rtt = (
+                        elapsed
+                        if self._rtt is None
+                        else self._rtt + (elapsed - self._rtt) / 8
+                    )
         except Exception as err:
             _LOGGER.debug(
                 self._log_formatter.format("type: %s, message: %s"), type(err), err
@@ -129,22 +475,38 @@ class Client:
     # endregion
 
     # region #-- public methods --#
+    @TRACER.traced("client.connect")
     async def connect(self) -> None:
-        """Create a connection to the device."""
+        """Create a connection to the device.
+
+        Whilst the device is unreachable connections aren't attempted, see
+        CircuitBreaker, and VirginMediaCircuitOpen is raised straight away.
+        """
         _LOGGER.debug(self._log_formatter.format("entered"))
+        if not self._breaker.allow():
+            _CIRCUIT_OPEN.inc()
+            raise VirginMediaCircuitOpen(self._breaker.retry_in)
+        start: float = time.perf_counter()
         try:
             _LOGGER.debug(
                 self._log_formatter.format(
                     "connecting to %s on port %d with timeout %0.1fs"
                 ),
-                self._host,
+                ", ".join(self._addresses),
                 self._port,
                 self._timeout,
             )
-            open_future = asyncio.open_connection(self._host, self._port)
-            self._reader, self._writer = await asyncio.wait_for(
+            open_future = self._race_connections()
+            host, self._reader, self._writer = await asyncio.wait_for(
                 open_future, self._timeout
             )
+            _CONNECT_SECONDS.observe(time.perf_counter() - start)
+            self._breaker.record_success()
+            self._connect_failures = 0
+            self._reused = False
+            self._status_pending = True
+            if host != self._host:
+                self.host = host
             _LOGGER.debug(
                 self._log_formatter.format("connected to %s on port %d"),
                 self._host,
@@ -154,12 +516,16 @@ class Client:
             OSError,
             ConnectionError,
             ConnectionResetError,
-            asyncio.TimeoutError,
+            TimeoutError,
         ) as err:
             _LOGGER.debug(
                 self._log_formatter.format("type: %s, message: %s"), type(err), err
             )
+            _CONNECT_FAILURES.inc()
+            self._breaker.record_failure()
+            self._connect_failures += 1
             if isinstance(err, asyncio.TimeoutError):
+                _TIMEOUTS.inc()
                 raise VirginMediaCommandTimeout from err
             raise VirginMediaError(format_error_message(err)) from err
 
@@ -168,6 +534,7 @@ class Client:
     async def disconnect(self) -> None:
         """Disconnect from the device."""
         _LOGGER.debug(self._log_formatter.format("entered"))
+        self._cancel_idle_close()
         if self._writer:
             _LOGGER.debug(
                 self._log_formatter.format("disconnecting from %s on port %d"),
@@ -192,6 +559,58 @@ class Client:
 
         _LOGGER.debug(self._log_formatter.format("exited"))
 
+    async def warm_up(self, idle_timeout: float) -> None:
+        """Open the connection ahead of it being needed and keep it open.
+
+        The connection is checked by reading the status the device sends on
+        connecting. Connections are then kept open between uses until left
+        idle for idle_timeout seconds.
+        """
+        _LOGGER.debug(self._log_formatter.format("entered"))
+        self._idle_timeout = idle_timeout
+        self._linger = False
+        async with self:
+            await self._read_pending_status()
+        _LOGGER.debug(self._log_formatter.format("exited"))
+
+    def linger(self, idle_timeout: float) -> None:
+        """Close a kept open connection once idle, then stop keeping it open.
+
+        Afterwards each use opens and closes its own connection again.
+        """
+        _LOGGER.debug(self._log_formatter.format("entered"))
+        if self._idle_timeout is None:
+            return
+        self._idle_timeout = idle_timeout
+        self._linger = True
+        if self._users == 0:
+            self._cancel_idle_close()
+            if self.is_connected:
+                self._idle_close = asyncio.get_running_loop().call_later(
+                    idle_timeout, self._close_idle
+                )
+            else:
+                self._close_idle()
+        _LOGGER.debug(self._log_formatter.format("exited"))
+
+    async def read_status(self) -> None:
+        """Read the status the device sends on connecting.
+
+        A kept open connection has already had its status read, the replies
+        waiting on it are read instead. The status is only read from a new
+        connection if the device has closed the kept open one.
+        """
+        _LOGGER.debug(self._log_formatter.format("entered"))
+        if not self._status_pending and self.is_connected:
+            if await self._drain_stale_replies():
+                _LOGGER.debug(self._log_formatter.format("exited"))
+                return
+            with contextlib.suppress(OSError):
+                await self.disconnect()
+            await self.connect()
+        await self.wait_for_data()
+        _LOGGER.debug(self._log_formatter.format("exited"))
+
     async def send_ircode(self, code: str, wait_for_reply: bool = True) -> None:
         """Send an infrared code to the device.
 
@@ -202,7 +621,30 @@ class Client:
         _LOGGER.debug(self._log_formatter.format("entered"))
         try:
             _LOGGER.debug(self._log_formatter.format("sending ircode: %s"), code)
-            await self._send(f"ircode {code}", wait_for_reply=wait_for_reply)
+            if self._pacer is not None:
+                await self._pacer.acquire()
+            channel_step: bool = wait_for_reply and code.lower() in (
+                IRCODE_CHANNEL_DOWN,
+                IRCODE_CHANNEL_UP,
+            )
+            if channel_step:
+                await self._read_pending_status()
+            before: int | None = self._tivo.channel_number
+            await self._send(
+                f"ircode {code}",
+                wait_for_reply=wait_for_reply,
+                retry_on_timeout=channel_step,
+            )
+            if (
+                channel_step
+                and before is not None
+                and self._tivo.channel_number is not None
+            ):
+                self._tivo.lineup.learn_step(
+                    before,
+                    self._tivo.channel_number,
+                    1 if code.lower() == IRCODE_CHANNEL_UP else -1,
+                )
         except VirginMediaError as err:
             if str(err).lower() == "invalid_key":
                 raise VirginMediaInvalidKey(key_code=code) from err
@@ -215,6 +657,39 @@ class Client:
 
         _LOGGER.debug(self._log_formatter.format("exited"))
 
+    async def hold_ircode(self, code: str, duration: float) -> int:
+        """Repeat an infrared code, as if the button were held down.
+
+        The code is sent at the rate the device accepts keys until the duration
+        has passed or the task is cancelled. Replies aren't waited for.
+
+        :param code: the IR code to send
+        :param duration: the maximum time, in seconds, to hold the button for
+        :return: the number of codes sent
+        """
+        _LOGGER.debug(self._log_formatter.format("entered"))
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        pacer: TokenBucket = self._pacer or TokenBucket(DEFAULT_HOLD_KEY_RATE)
+        deadline: float = loop.time() + duration
+        sent: int = 0
+        try:
+            _LOGGER.debug(
+                self._log_formatter.format("holding ircode: %s for %0.1fs"),
+                code,
+                duration,
+            )
+            while loop.time() < deadline:
+                await pacer.acquire()
+                await self._send(f"ircode {code}", wait_for_reply=False)
+                sent += 1
+        finally:
+            _LOGGER.debug(
+                self._log_formatter.format("ircode %s sent %d times"), code, sent
+            )
+
+        _LOGGER.debug(self._log_formatter.format("exited"))
+        return sent
+
     async def send_keyboard(self, code: str, wait_for_reply: bool = True) -> None:
         """Send a keyboard code to the device.
 
@@ -225,6 +700,8 @@ class Client:
         _LOGGER.debug(self._log_formatter.format("entered"))
         try:
             _LOGGER.debug(self._log_formatter.format("sending keyboard: %s"), code)
+            if self._pacer is not None:
+                await self._pacer.acquire()
             await self._send(f"keyboard {code}", wait_for_reply=wait_for_reply)
         except VirginMediaError as err:
             _LOGGER.warning(
@@ -237,6 +714,60 @@ class Client:
 
         _LOGGER.debug(self._log_formatter.format("exited"))
 
+    async def send_text(self, text: str) -> int:
+        """Type text on the device using keyboard codes.
+
+        The codes are sent one after the other, at the rate the device accepts
+        keys, without waiting for a reply to each. Sending stops as soon as the
+        device rejects a key. The connection must already be open.
+
+        :param text: the text to type
+        :return: the number of keys sent
+        """
+        _LOGGER.debug(self._log_formatter.format("entered"))
+        codes: list[str] = []
+        for char in text:
+            if (code := KEYBOARD_CODES.get(char)) is None:
+                raise VirginMediaInvalidKey(key_code=char)
+            codes.append(code)
+
+        pacer: TokenBucket = self._pacer or TokenBucket(DEFAULT_TEXT_KEY_RATE)
+        rejected: asyncio.Event = asyncio.Event()
+
+        async def watch_replies() -> None:
+            while not rejected.is_set():
+                if "INVALID_KEY" in await self.read_replies(
+                    1, timeout=DEFAULT_TEXT_REPLY_WAIT
+                ):
+                    self._count_invalid("INVALID_KEY")
+                    rejected.set()
+
+        await self._read_pending_status()
+        watcher: asyncio.Task = asyncio.create_task(watch_replies())
+        sent: int = 0
+        try:
+            _LOGGER.debug(self._log_formatter.format("sending text: %s"), text)
+            for code in codes:
+                if rejected.is_set():
+                    break
+                await pacer.acquire()
+                await self._send(f"keyboard {code}", wait_for_reply=False)
+                sent += 1
+            # give the device a moment to reject the last keys
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(rejected.wait(), DEFAULT_TEXT_REPLY_WAIT)
+        finally:
+            watcher.cancel()
+            with contextlib.suppress(asyncio.CancelledError, VirginMediaError):
+                await watcher
+
+        if rejected.is_set():
+            raise VirginMediaInvalidKey(key_code=text)
+
+        _LOGGER.debug(self._log_formatter.format("text sent: %s"), text)
+        _LOGGER.debug(self._log_formatter.format("exited"))
+        return sent
+
     async def send_teleport(self, code: str) -> None:
         """Send a teleport code to the device.
 
@@ -267,11 +798,17 @@ class Client:
                 self._log_formatter.format("setting channel number to: %d"),
                 channel_number,
             )
-            await self._send(f"setch {channel_number}")
+            if self._tivo.lineup.is_valid(channel_number) is False:
+                raise VirginMediaInvalidChannel(channel_number=channel_number)
+            await self._read_pending_status()
+            await self._send(f"setch {channel_number}", retry_on_timeout=True)
+        except VirginMediaInvalidChannel:
+            raise
         except VirginMediaError as err:
             if str(err).lower() == "no_live":
                 raise VirginMediaNotLive from err
             if str(err).lower() == "invalid_channel":
+                self._tivo.lineup.add_invalid(channel_number)
                 raise VirginMediaInvalidChannel(channel_number=channel_number) from err
             raise
         else:
@@ -281,6 +818,7 @@ class Client:
 
         _LOGGER.debug(self._log_formatter.format("exited"))
 
+    @TRACER.traced("client.wait_for_data")
     async def wait_for_data(self) -> None:
         """Process the data from the device.
 
@@ -288,6 +826,7 @@ class Client:
         """
         _LOGGER.debug(self._log_formatter.format("entered"))
         async with self._lock_read:
+            self._status_pending = False
             buffer_size = 1024
             try:
                 data_future = self._reader.read(buffer_size)
@@ -297,7 +836,11 @@ class Client:
             except Exception as err:
                 if isinstance(err, asyncio.TimeoutError):
                     # self._tivo.channel_number = None
+                    _TIMEOUTS.inc()
                     raise VirginMediaCommandTimeout from err
+                if isinstance(err, ConnectionError):
+                    _RESETS.inc()
+                    raise VirginMediaConnectionReset from err
 
                 _LOGGER.warning(
                     self._log_formatter.format("type: %s, message: %s"),
@@ -310,28 +853,92 @@ class Client:
 
             if not data:
                 # self._tivo.channel_number = None
+                _RESETS.inc()
                 raise VirginMediaConnectionReset from None
 
-            data = data.decode().strip()
-            if data.startswith("CH_STATUS"):
-                regex = r"\d{4}"
-                regex_match: re.Match = re.search(regex, data)
-                if regex_match:
-                    self._tivo.channel_number = int(regex_match.group(0))
-            elif data.startswith("CH_FAILED"):
-                raise VirginMediaError(data.split(" ")[-1])
-            elif data == "INVALID_KEY":
-                raise VirginMediaError(data)
-            elif data == "INVALID_COMMAND":
-                raise VirginMediaError(data)
-
-            if self._data_callback:
-                _LOGGER.debug(self._log_formatter.format("executing callbacks"))
-                for func in self._data_callback:
-                    if isinstance(func, Callable):
-                        func(self._tivo)
+            self._process_reply(data)
+
+        _LOGGER.debug(self._log_formatter.format("exited"))
+
+    async def read_replies(
+        self, expected: int, timeout: float | None = None
+    ) -> list[str]:
+        """Read replies until the expected number arrive or the device goes quiet.
 
+        :param expected: the number of replies to wait for
+        :param timeout: time to wait for each read, the command timeout if None
+        :return: the replies received
+        """
+        _LOGGER.debug(self._log_formatter.format("entered"))
+        buffer: str = ""
+        replies: list[str] = []
+        async with self._lock_read:
+            while len(replies) < expected:
+                try:
+                    data: bytes = await asyncio.wait_for(
+                        self._reader.read(1024), timeout or self._command_timeout
+                    )
+                except TimeoutError:
+                    break
+                if not data:
+                    raise VirginMediaConnectionReset from None
+                buffer += data.decode()
+                *lines, buffer = buffer.split("\r")
+                replies.extend(line.strip() for line in lines if line.strip())
+
+        if buffer.strip():
+            replies.append(buffer.strip())
+
+        _LOGGER.debug(self._log_formatter.format("replies: %s"), replies)
         _LOGGER.debug(self._log_formatter.format("exited"))
+        return replies
+
+    async def calibrate_key_rate(
+        self,
+        rates: tuple[float, ...] = KEY_RATE_CALIBRATION_RATES,
+        burst: int = KEY_RATE_CALIBRATION_BURST,
+    ) -> float | None:
+        """Find the highest rate the device accepts keys at.
+
+        Bursts of an unknown key are sent at increasing rates. The device
+        rejects each key it reads so any missing rejections mean that keys
+        were dropped before being read. Keys read but then dropped further
+        on can't be seen, so the rate found is an upper bound rather than a
+        rate every key is acted on at. The unknown key has no effect on the
+        device.
+
+        :param rates: the rates, in keys per second, to try in ascending order
+        :param burst: the number of keys sent at each rate
+        :return: the highest rate where no keys were dropped, less a safety
+            margin for jitter, None if keys were dropped at every rate
+        """
+        _LOGGER.debug(self._log_formatter.format("entered"))
+        ret: float | None = None
+        async with self:
+            # discard the status sent when connecting
+            await self.read_replies(1)
+            for rate in rates:
+                for idx in range(burst):
+                    if idx:
+                        await asyncio.sleep(1 / rate)
+                    await self._send(
+                        f"ircode {KEY_RATE_PROBE_CODE}", wait_for_reply=False
+                    )
+                replies: list[str] = await self.read_replies(burst)
+                accepted: int = replies.count("INVALID_KEY")
+                _LOGGER.debug(
+                    self._log_formatter.format("%0.1f keys/s: %d of %d accepted"),
+                    rate,
+                    accepted,
+                    burst,
+                )
+                if accepted < burst:
+                    break
+                ret = rate * KEY_RATE_SAFETY_MARGIN
+                await asyncio.sleep(KEY_RATE_CALIBRATION_RECOVERY)
+
+        _LOGGER.debug(self._log_formatter.format("exited"))
+        return ret
 
     def add_data_callback(self, callback: Callable) -> None:
         """Add a callback for execution after data has been retrieved."""
@@ -349,11 +956,79 @@ class Client:
     # endregion
 
     # region #-- properties --#
+    @property
+    def addresses(self) -> list[str]:
+        """Return the addresses used for connecting, preferred first."""
+        return list(self._addresses)
+
+    @addresses.setter
+    def addresses(self, value: list[str]) -> None:
+        """Set the addresses the device is known by."""
+        self._addresses = list(dict.fromkeys([self._host, *value]))
+
+    @property
+    def breaker(self) -> CircuitBreaker:
+        """Return the circuit breaker guarding connections to the device."""
+        return self._breaker
+
+    @property
+    def connect_failures(self) -> int:
+        """Return the number of consecutive failed connection attempts."""
+        return self._connect_failures
+
     @property
     def device(self) -> Device:
         """Device class."""
         return self._tivo
 
+    @property
+    def host(self) -> str:
+        """Return the host used for connecting to the device."""
+        return self._host
+
+    @host.setter
+    def host(self, value: str) -> None:
+        """Set the host used for connecting to the device.
+
+        The host becomes the preferred address and takes effect on the next
+        connection.
+        """
+        self._host = value
+        self._tivo.host = value
+        self._breaker.reset()
+        self._connect_failures = 0
+        self.addresses = self._addresses
+
+    @property
+    def key_rate(self) -> float | None:
+        """Return the maximum number of keys per second sent to the device."""
+        return self._pacer.rate if self._pacer is not None else None
+
+    @key_rate.setter
+    def key_rate(self, value: float | None) -> None:
+        """Set the maximum number of keys per second sent to the device."""
+        if value is None:
+            self._pacer = None
+        elif self._pacer is None:
+            self._pacer = TokenBucket(value)
+        else:
+            self._pacer.rate = value
+
+    @property
+    def idle_timeout(self) -> float | None:
+        """Return how long a connection is kept open unused, None if not kept."""
+        return self._idle_timeout
+
+    @property
+    def rtt(self) -> float | None:
+        """Return the smoothed time, in seconds, the device takes to reply."""
+        return self._rtt
+
+    @rtt.setter
+    def rtt(self, value: float | None) -> None:
+        """Set the smoothed reply time, e.g. one previously measured."""
+        self._rtt = value
+
     @property
     def is_connected(self) -> bool:
         """Check if the device is connected.
@@ -3,6 +3,40 @@
 PACKAGE_NAME: str = "pyvmtivo"
 PACKAGE_AUTHOR: str = "uvjim"
 
+DEFAULT_BREAKER_BACKOFF: float = 2.0
+DEFAULT_BREAKER_MAX_BACKOFF: float = 300.0
+DEFAULT_BREAKER_THRESHOLD: int = 3
 DEFAULT_COMMAND_TIMEOUT: float = 0.75
 DEFAULT_CONNECT_PORT: int = 31339
 DEFAULT_CONNECT_TIMEOUT: float = 1.0
+DEFAULT_HAPPY_EYEBALLS_DELAY: float = 0.25
+DEFAULT_HOLD_KEY_RATE: float = 5.0
+DEFAULT_TEXT_KEY_RATE: float = 10.0
+DEFAULT_TEXT_REPLY_WAIT: float = 0.2
+
+IRCODE_CHANNEL_DOWN: str = "channeldown"
+IRCODE_CHANNEL_UP: str = "channelup"
+
+KEY_RATE_CALIBRATION_BURST: int = 5
+KEY_RATE_CALIBRATION_RATES: tuple[float, ...] = (2.0, 3.0, 5.0, 8.0, 12.0, 20.0)
+KEY_RATE_CALIBRATION_RECOVERY: float = 1.0
+KEY_RATE_PROBE_CODE: str = "probe"
+KEY_RATE_SAFETY_MARGIN: float = 0.8
+
+KEYBOARD_CODES: dict[str, str] = {
+    **{chr(c): chr(c) for c in range(ord("A"), ord("Z") + 1)},
+    **{chr(c): chr(c).upper() for c in range(ord("a"), ord("z") + 1)},
+    **{str(d): f"NUM{d}" for d in range(10)},
+    " ": "SPACE",
+    "'": "QUOTE",
+    ",": "COMMA",
+    "-": "MINUS",
+    ".": "PERIOD",
+    "/": "SLASH",
+    ";": "SEMICOLON",
+    "=": "EQUALS",
+    "[": "LBRACKET",
+    "\\": "BACKSLASH",
+    "]": "RBRACKET",
+    "`": "BACKQUOTE",
+}
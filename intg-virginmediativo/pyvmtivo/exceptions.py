@@ -22,6 +22,20 @@ class VirginMediaError(Exception):
     """General error."""
 
 
+class VirginMediaCircuitOpen(VirginMediaError):
+    """Device is unreachable so no connection was attempted."""
+
+    def __init__(self, retry_in: float):
+        """Initialise."""
+        self._retry_in = retry_in
+        super().__init__(f"Device unreachable, retrying in {retry_in:0.1f}s")
+
+    @property
+    def retry_in(self) -> float:
+        """Return the seconds until a connection will be attempted."""
+        return self._retry_in
+
+
 class VirginMediaCommandTimeout(VirginMediaError):
     """Command timed out."""
 
@@ -0,0 +1,181 @@
+"""Channel lineup learned from the device."""
+
+# region #-- imports --#
+import bisect
+import json
+import logging
+import os
+
+from .logger import Logger
+
+# endregion
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class ChannelLineup:
+    """The channels available on the device.
+
+    Valid channels are learned from the channel status the device reports and
+    invalid ones from the channels it rejects. Valid channels are kept sorted
+    so the next or previous valid channel can be found with a binary search.
+
+    The order the device steps through channels in is learned from the channel
+    reported after each channel up or down, so the result of several steps can
+    be worked out without sending them.
+    """
+
+    def __init__(
+        self,
+        valid: list[int] | None = None,
+        invalid: list[int] | None = None,
+        up: dict[int, int] | None = None,
+        down: dict[int, int] | None = None,
+    ) -> None:
+        """Initialise."""
+        self._down: dict[int, int] = dict(down or {})
+        self._invalid: set[int] = set(invalid or [])
+        self._log_formatter: Logger = Logger()
+        self._up: dict[int, int] = dict(up or {})
+        self._valid: list[int] = sorted(set(valid or []))
+        self.dirty: bool = False
+
+    def add(self, channel: int) -> None:
+        """Record a channel the device has reported as showing."""
+        idx: int = bisect.bisect_left(self._valid, channel)
+        if idx == len(self._valid) or self._valid[idx] != channel:
+            self._valid.insert(idx, channel)
+            self._invalid.discard(channel)
+            self.dirty = True
+
+    def add_invalid(self, channel: int) -> None:
+        """Record a channel the device has rejected."""
+        if channel not in self._invalid:
+            idx: int = bisect.bisect_left(self._valid, channel)
+            if idx < len(self._valid) and self._valid[idx] == channel:
+                del self._valid[idx]
+            self._invalid.add(channel)
+            self.dirty = True
+
+    def is_valid(self, channel: int) -> bool | None:
+        """Check if a channel is valid.
+
+        :return: True if valid, False if rejected, None if not known
+        """
+        if channel in self._invalid:
+            return False
+
+        idx: int = bisect.bisect_left(self._valid, channel)
+        if idx < len(self._valid) and self._valid[idx] == channel:
+            return True
+
+        return None
+
+    def learn_step(self, before: int, after: int, direction: int) -> None:
+        """Record the channel a single step moved to.
+
+        :param before: the channel before the step
+        :param after: the channel the device reported after the step
+        :param direction: 1 for channel up, -1 for channel down
+        """
+        if before == after:
+            return
+
+        if direction > 0:
+            links: tuple[dict[int, int], dict[int, int]] = (self._up, self._down)
+        else:
+            links = (self._down, self._up)
+        if links[0].get(before) != after or links[1].get(after) != before:
+            links[0][before] = after
+            links[1][after] = before
+            self.dirty = True
+
+    def next_valid(self, channel: int) -> int | None:
+        """Return the lowest known valid channel above the given one."""
+        idx: int = bisect.bisect_right(self._valid, channel)
+        return self._valid[idx] if idx < len(self._valid) else None
+
+    def previous_valid(self, channel: int) -> int | None:
+        """Return the highest known valid channel below the given one."""
+        idx: int = bisect.bisect_left(self._valid, channel)
+        return self._valid[idx - 1] if idx > 0 else None
+
+    def step(self, channel: int, steps: int) -> int | None:
+        """Return the channel the given number of steps away.
+
+        Only learned steps are followed, the known valid channels can't be
+        used to fill the gaps as there may be channels that haven't been seen
+        yet in between.
+
+        :param channel: the channel to start from
+        :param steps: positive to step up, negative to step down
+        :return: the channel, None if any step along the way hasn't been learned
+        """
+        links: dict[int, int] = self._up if steps > 0 else self._down
+        for _ in range(abs(steps)):
+            if (channel := links.get(channel)) is None:
+                break
+
+        return channel
+
+    def copy(self) -> "ChannelLineup":
+        """Return a copy of the lineup."""
+        return ChannelLineup(
+            valid=self._valid, invalid=list(self._invalid), up=self._up, down=self._down
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "ChannelLineup":
+        """Load a lineup saved to disk, or an empty one if there isn't one."""
+        ret: ChannelLineup = cls()
+        try:
+            if os.path.exists(path):
+                with open(path, encoding="utf-8") as f:
+                    data = json.load(f)
+                ret = cls(
+                    valid=data.get("valid"),
+                    invalid=data.get("invalid"),
+                    up=dict(data.get("up", [])),
+                    down=dict(data.get("down", [])),
+                )
+        except (OSError, ValueError, TypeError) as err:
+            _LOGGER.warning(
+                ret._log_formatter.format("unable to load %s: %s"), path, err
+            )
+
+        return ret
+
+    def save(self, path: str) -> bool:
+        """Save the lineup to disk.
+
+        The file is written alongside and then moved into place, so a crash
+        part way through leaves the previous lineup intact.
+        """
+        ret: bool = False
+        temp_path: str = f"{path}.tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(
+                    {
+                        "valid": self._valid,
+                        "invalid": sorted(self._invalid),
+                        "up": list(self._up.items()),
+                        "down": list(self._down.items()),
+                    },
+                    f,
+                    separators=(",", ":"),
+                )
+            os.replace(temp_path, path)
+            self.dirty = False
+            ret = True
+        except OSError as err:
+            _LOGGER.warning(
+                self._log_formatter.format("unable to save %s: %s"), path, err
+            )
+
+        return ret
+
+    @property
+    def channels(self) -> list[int]:
+        """Return the known valid channels, in order."""
+        return list(self._valid)
@@ -0,0 +1,226 @@
+"""Record how the devices and the integration behave."""
+
+# region #-- imports --#
+import bisect
+import math
+from typing import Any
+
+# endregion
+
+DEFAULT_LATENCY_BUCKETS: tuple[float, ...] = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+Labels = tuple[tuple[str, str], ...]
+
+
+def _format_labels(labels: Labels, extra: str = "") -> str:
+    """Format the labels as they appear in the Prometheus text format."""
+    parts: list[str] = [f'{key}="{value}"' for key, value in labels]
+    if extra:
+        parts.append(extra)
+
+    return f"{{{','.join(parts)}}}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    """Format a value as it appears in the Prometheus text format."""
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    """A value that only goes up."""
+
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        """Initialise."""
+        self.value: float = 0
+
+    def inc(self, amount: float = 1) -> None:
+        """Add to the counter."""
+        self.value += amount
+
+    def render(self, name: str, labels: Labels) -> list[str]:
+        """Return the lines of the Prometheus text format."""
+        return [f"{name}{_format_labels(labels)} {_format_value(self.value)}"]
+
+
+class Gauge:
+    """A value that goes up and down."""
+
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        """Initialise."""
+        self.value: float = 0
+
+    def dec(self, amount: float = 1) -> None:
+        """Subtract from the gauge."""
+        self.value -= amount
+
+    def inc(self, amount: float = 1) -> None:
+        """Add to the gauge."""
+        self.value += amount
+
+    def set(self, value: float) -> None:
+        """Set the gauge."""
+        self.value = value
+
+    def render(self, name: str, labels: Labels) -> list[str]:
+        """Return the lines of the Prometheus text format."""
+        return [f"{name}{_format_labels(labels)} {_format_value(self.value)}"]
+
+
+class Histogram:
+    """Count observations into fixed buckets.
+
+    Each observation lands in a single bucket, the counts are only made
+    cumulative when rendered.
+    """
+
+    __slots__ = ("buckets", "count", "counts", "sum")
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_LATENCY_BUCKETS) -> None:
+        """Initialise.
+
+        :param buckets: upper bounds of the buckets in ascending order, values
+            above the last land in an implicit +Inf bucket
+        """
+        self.buckets: tuple[float, ...] = buckets
+        self.count: int = 0
+        self.counts: list[int] = [0] * (len(buckets) + 1)
+        self.sum: float = 0.0
+
+    def observe(self, value: float) -> None:
+        """Record an observation."""
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def render(self, name: str, labels: Labels) -> list[str]:
+        """Return the lines of the Prometheus text format."""
+        ret: list[str] = []
+        cumulative: int = 0
+        for bound, count in zip((*self.buckets, math.inf), self.counts):
+            cumulative += count
+            le: str = f'le="{_format_value(bound)}"'
+            ret.append(f"{name}_bucket{_format_labels(labels, le)} {cumulative}")
+        ret.append(f"{name}_sum{_format_labels(labels)} {_format_value(self.sum)}")
+        ret.append(f"{name}_count{_format_labels(labels)} {self.count}")
+
+        return ret
+
+
+class MetricsRegistry:
+    """Hold the metrics recorded.
+
+    Metrics are created on first use and identified by name and labels.
+    Callers on a hot path can keep hold of the metric returned to avoid the
+    lookup.
+    """
+
+    def __init__(self) -> None:
+        """Initialise."""
+        self._help: dict[str, tuple[str, str]] = {}
+        self._metrics: dict[tuple[str, Labels], Counter | Gauge | Histogram] = {}
+
+    def _get(
+        self, kind: type, name: str, help_text: str, labels: dict[str, str], *args
+    ) -> Counter | Gauge | Histogram:
+        """Return the metric, creating it if need be."""
+        key: tuple[str, Labels] = (name, tuple(sorted(labels.items())))
+        if (metric := self._metrics.get(key)) is None:
+            metric = self._metrics[key] = kind(*args)
+            self._help.setdefault(name, (kind.__name__.lower(), help_text))
+
+        return metric
+
+    def counter(self, name: str, help_text: str = "", **labels: str) -> Counter:
+        """Return the counter with the given name and labels."""
+        return self._get(Counter, name, help_text, labels)
+
+    def gauge(self, name: str, help_text: str = "", **labels: str) -> Gauge:
+        """Return the gauge with the given name and labels."""
+        return self._get(Gauge, name, help_text, labels)
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str = "",
+        buckets: tuple[float, ...] = DEFAULT_LATENCY_BUCKETS,
+        **labels: str,
+    ) -> Histogram:
+        """Return the histogram with the given name and labels."""
+        return self._get(Histogram, name, help_text, labels, buckets)
+
+    def export(self) -> list[list[Any]]:
+        """Return the metrics as plain data, to be loaded into another registry."""
+        ret: list[list[Any]] = []
+        for (name, labels), metric in self._metrics.items():
+            kind, help_text = self._help[name]
+            value: Any = (
+                [list(metric.buckets), metric.counts, metric.sum, metric.count]
+                if isinstance(metric, Histogram)
+                else metric.value
+            )
+            ret.append([kind, name, help_text, [list(itm) for itm in labels], value])
+
+        return ret
+
+    def load(self, exported: list[list[Any]], **labels: str) -> None:
+        """Set the metrics exported by another registry, adding the labels.
+
+        Used to expose the metrics recorded by another process, the labels
+        keep them apart from those recorded here.
+        """
+        for kind, name, help_text, metric_labels, value in exported:
+            all_labels: dict[str, str] = {**dict(metric_labels), **labels}
+            if kind == "histogram":
+                buckets, counts, total, count = value
+                histogram: Histogram = self.histogram(
+                    name, help_text, tuple(buckets), **all_labels
+                )
+                histogram.counts = list(counts)
+                histogram.sum = total
+                histogram.count = count
+            else:
+                self._get(
+                    Counter if kind == "counter" else Gauge,
+                    name,
+                    help_text,
+                    all_labels,
+                ).value = value
+
+    def render(self) -> str:
+        """Return a snapshot of all metrics in the Prometheus text format."""
+        lines: list[str] = []
+        current: str | None = None
+        for (name, labels), metric in sorted(
+            self._metrics.items(), key=lambda itm: itm[0]
+        ):
+            if name != current:
+                current = name
+                kind, help_text = self._help[name]
+                if help_text:
+                    lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+            lines.extend(metric.render(name, labels))
+
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY: MetricsRegistry = MetricsRegistry()
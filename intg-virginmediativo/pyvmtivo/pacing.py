@@ -0,0 +1,55 @@
+"""Pace the keys sent to the device."""
+
+# region #-- imports --#
+import asyncio
+import time
+
+# endregion
+
+
+class TokenBucket:
+    """Limit the rate that keys are sent at.
+
+    Tokens are added at the given rate up to the capacity, each key sent
+    takes one.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0) -> None:
+        """Initialise.
+
+        :param rate: number of keys per second
+        :param capacity: number of keys that can be sent back to back
+        """
+        self._capacity: float = capacity
+        self._lock: asyncio.Lock = asyncio.Lock()
+        self._rate: float = rate
+        self._tokens: float = capacity
+        self._updated: float = time.monotonic()
+
+    def _refill(self) -> None:
+        """Add the tokens accrued since the last refill."""
+        now: float = time.monotonic()
+        self._tokens = min(
+            self._capacity, self._tokens + (now - self._updated) * self._rate
+        )
+        self._updated = now
+
+    async def acquire(self) -> None:
+        """Wait until a key can be sent."""
+        async with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self._rate)
+                self._refill()
+            self._tokens -= 1
+
+    @property
+    def rate(self) -> float:
+        """Return the number of keys per second."""
+        return self._rate
+
+    @rate.setter
+    def rate(self, value: float) -> None:
+        """Set the number of keys per second."""
+        self._refill()
+        self._rate = value
@@ -0,0 +1,196 @@
+"""Trace where the time goes whilst carrying out a command."""
+
+# region #-- imports --#
+import contextlib
+import contextvars
+import functools
+import itertools
+import json
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+# endregion
+
+DEFAULT_TRACE_CAPACITY: int = 4096
+
+_CURRENT: contextvars.ContextVar["Span | None"] = contextvars.ContextVar(
+    "pyvmtivo_span", default=None
+)
+_NO_SPAN: contextlib.nullcontext = contextlib.nullcontext()
+
+
+class Span:
+    """A timed piece of work.
+
+    Spans started whilst another is current become its children and share
+    its trace id, which correlates everything done for a single command.
+    """
+
+    __slots__ = (
+        "attributes",
+        "end",
+        "name",
+        "parent_id",
+        "span_id",
+        "start",
+        "trace_id",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        trace_id: int,
+        span_id: int,
+        parent_id: int | None,
+        attributes: dict[str, Any],
+    ) -> None:
+        """Initialise."""
+        self.attributes: dict[str, Any] = attributes
+        self.end: int = 0
+        self.name: str = name
+        self.parent_id: int | None = parent_id
+        self.span_id: int = span_id
+        self.start: int = time.perf_counter_ns()
+        self.trace_id: int = trace_id
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the span as a dictionary, times in microseconds."""
+        return {
+            "attributes": self.attributes,
+            "duration_us": (self.end - self.start) / 1000,
+            "name": self.name,
+            "parent_id": self.parent_id,
+            "span_id": self.span_id,
+            "start_us": self.start / 1000,
+            "trace_id": self.trace_id,
+        }
+
+
+class _SpanContext:
+    """Make a span current whilst in the context."""
+
+    __slots__ = ("_attributes", "_name", "_span", "_token", "_tracer")
+
+    def __init__(
+        self, tracer: "Tracer", name: str, attributes: dict[str, Any]
+    ) -> None:
+        """Initialise."""
+        self._attributes: dict[str, Any] = attributes
+        self._name: str = name
+        self._span: Span | None = None
+        self._token: contextvars.Token | None = None
+        self._tracer: Tracer = tracer
+
+    def __enter__(self) -> Span:
+        """Start the span."""
+        parent: Span | None = _CURRENT.get()
+        span_id: int = next(self._tracer.ids)
+        self._span = Span(
+            self._name,
+            parent.trace_id if parent is not None else span_id,
+            span_id,
+            parent.span_id if parent is not None else None,
+            self._attributes,
+        )
+        self._token = _CURRENT.set(self._span)
+        return self._span
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        """Finish the span and keep it."""
+        self._span.end = time.perf_counter_ns()
+        if exc_type is not None:
+            self._span.attributes["error"] = exc_type.__name__
+        _CURRENT.reset(self._token)
+        self._tracer.spans.append(self._span)
+
+
+class Tracer:
+    """Keep the most recent spans in a ring buffer.
+
+    Whilst disabled no spans are created, starting one returns a shared
+    context that does nothing.
+    """
+
+    def __init__(
+        self, capacity: int = DEFAULT_TRACE_CAPACITY, enabled: bool = False
+    ) -> None:
+        """Initialise.
+
+        :param capacity: the number of spans kept, the oldest are dropped first
+        :param enabled: True to record spans
+        """
+        self.enabled: bool = enabled
+        self.ids: itertools.count = itertools.count(1)
+        self.spans: deque[Span] = deque(maxlen=capacity)
+
+    def span(
+        self, name: str, **attributes: Any
+    ) -> _SpanContext | contextlib.nullcontext:
+        """Return a context that times the work done within it."""
+        if not self.enabled:
+            return _NO_SPAN
+
+        return _SpanContext(self, name, attributes)
+
+    def traced(self, name: str) -> Callable:
+        """Wrap a coroutine function so that each call is a span."""
+
+        def decorator(func: Callable[..., Awaitable[Any]]):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return await func(*args, **kwargs)
+                with _SpanContext(self, name, {}):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        return decorator
+
+    def load(self, spans: list[dict[str, Any]], **attributes: Any) -> None:
+        """Keep spans recorded by another process, adding the attributes.
+
+        :param spans: the spans, as returned by Span.as_dict
+        """
+        for data in spans:
+            span: Span = Span(
+                data["name"],
+                data["trace_id"],
+                data["span_id"],
+                data["parent_id"],
+                {**data["attributes"], **attributes},
+            )
+            span.start = round(data["start_us"] * 1000)
+            span.end = span.start + round(data["duration_us"] * 1000)
+            self.spans.append(span)
+
+    def to_chrome_trace(self) -> str:
+        """Return the spans in the Chrome trace event format.
+
+        Load the output in chrome://tracing or https://ui.perfetto.dev, each
+        trace is shown on its own row.
+        """
+        events: list[dict[str, Any]] = [
+            {
+                "args": {**span.attributes, "span_id": span.span_id},
+                "dur": (span.end - span.start) / 1000,
+                "name": span.name,
+                "ph": "X",
+                "pid": 1,
+                "tid": span.trace_id,
+                "ts": span.start / 1000,
+            }
+            for span in self.spans
+        ]
+        return json.dumps(
+            {"displayTimeUnit": "ms", "traceEvents": events}, default=str
+        )
+
+    def to_json(self) -> str:
+        """Return the spans as a JSON list, oldest first."""
+        return json.dumps([span.as_dict() for span in self.spans], default=str)
+
+
+TRACER: Tracer = Tracer()
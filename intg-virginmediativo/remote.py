@@ -2,17 +2,55 @@
 
 # region #-- imports --#
 import asyncio
+import contextlib
+import dataclasses
+import functools
 import logging
 import math
+import os
+import time
+from collections.abc import Awaitable, Callable
 from enum import StrEnum
-from typing import Any
+from typing import Any, NamedTuple
 
 from config import VmTivoDevice
-from const import AVAILABLE_COMMANDS, CodeDefinition, CodeTypes
+from const import (
+    AVAILABLE_COMMANDS,
+    CHANNEL_COALESCE_WINDOW,
+    CONNECTION_IDLE_TIMEOUT,
+    CONNECTION_STANDBY_IDLE_TIMEOUT,
+    HOLD_MAX_DURATION,
+    HOLD_RELEASE_COMMAND,
+    LINEUP_SAVE_INTERVAL,
+    REBIND_FAILURE_THRESHOLD,
+    RECONCILE_DELAY,
+    TEXT_COMMAND_PREFIX,
+    CodeDefinition,
+    CodeTypes,
+)
 from logger import log, log_formatter
+from playback import (
+    PLAYING_STATES,
+    TRANSITIONS,
+    PlaybackStateMachine,
+    RemoteState,
+    Reply,
+)
 from pyee import AsyncIOEventEmitter
 from pyvmtivo.client import Client, Device
-from pyvmtivo.exceptions import VirginMediaCommandTimeout, VirginMediaConnectionReset
+from pyvmtivo.exceptions import (
+    VirginMediaCircuitOpen,
+    VirginMediaCommandTimeout,
+    VirginMediaConnectionReset,
+    VirginMediaError,
+    VirginMediaInvalidChannel,
+    VirginMediaInvalidKey,
+    VirginMediaNotLive,
+)
+from pyvmtivo.lineup import ChannelLineup
+from pyvmtivo.metrics import REGISTRY, Counter, Histogram
+from pyvmtivo.tracing import TRACER
+from snapshot import DeviceSnapshot
 from ucapi import EntityTypes, Remote
 from ucapi.api_definitions import StatusCodes
 from ucapi.media_player import Commands as MediaPlayerCommands
@@ -37,333 +75,483 @@ class Events(StrEnum):
     """Available events."""
 
     STATE_CHANGED = "uvjim_state_changed"
+    UNREACHABLE = "uvjim_unreachable"
 
 
-class RemoteState(StrEnum):
-    """Possible remote states."""
+class Dispatch(NamedTuple):
+    """How a command is carried out in a given remote state."""
 
-    DVR = "dvr"
-    LIVE = "live"
-    PAUSED = "paused"
-    SPEEDING = "speeding"
+    handler: Callable[..., Awaitable[None]]
+    args: tuple[Any, ...]
+    code_def: CodeDefinition
+    next_state: RemoteState | None
+    suppress_timeout: bool
 
 
-class TivoRemote(Remote):
-    """TiVo remote representation."""
+WorkerRun = Callable[[Callable[[], Awaitable[Any]]], Awaitable[Any]]
 
-    @log(_LOG, include_datetime=_LOG_INC_DATETIME)
-    def __init__(self, device_config: VmTivoDevice) -> None:
-        """Initialise."""
+_CHANNEL_STEPS: dict[str, int] = {
+    MediaPlayerCommands.CHANNEL_DOWN: -1,
+    MediaPlayerCommands.CHANNEL_UP: 1,
+}
+_COMMAND_RESULTS: dict[tuple[str, StatusCodes], Counter] = {}
+_COMMAND_SECONDS: dict[str, Histogram] = {}
+_DIRECT_COMMAND_IDS: frozenset[str] = frozenset({Commands.OFF, Commands.ON})
 
-        self._remote_state: RemoteState = RemoteState.LIVE
-        self._tivo_config: VmTivoDevice = device_config
-        self._client: Client = Client(self._tivo_config.address, self._tivo_config.port)
-        self._client.add_data_callback(self._data_callback)
 
-        self.events: AsyncIOEventEmitter = AsyncIOEventEmitter(
-            asyncio.get_running_loop()
+def _command_result_counter(cmd_id: str, status: StatusCodes) -> Counter:
+    """Return the counter for the command result, creating it on first use."""
+    if (counter := _COMMAND_RESULTS.get((cmd_id, status))) is None:
+        counter = _COMMAND_RESULTS[(cmd_id, status)] = REGISTRY.counter(
+            "vmtivo_entity_commands_total",
+            "Commands from the Remote by result",
+            cmd_id=cmd_id,
+            status=status.name.lower(),
         )
 
-        attributes: dict[str, Any] = {
-            Attributes.STATE: (
-                States.ON if self._client.device.channel_number else States.UNKNOWN
+    return counter
+
+
+def _command_histogram(cmd_id: str) -> Histogram:
+    """Return the histogram for the command, creating it on first use."""
+    if (histogram := _COMMAND_SECONDS.get(cmd_id)) is None:
+        histogram = _COMMAND_SECONDS[cmd_id] = REGISTRY.histogram(
+            "vmtivo_entity_command_seconds",
+            "Time taken to carry out a command from the Remote",
+            command=cmd_id,
+        )
+
+    return histogram
+
+
+def _build_dispatch_table() -> dict[tuple[str, RemoteState], Dispatch]:
+    """Resolve every available command for every remote state.
+
+    Play/Pause acts as pause whilst playing and as play otherwise.
+    """
+    ret: dict[tuple[str, RemoteState], Dispatch] = {}
+    for command in AVAILABLE_COMMANDS:
+        for state in RemoteState:
+            resolved: str = command
+            if (
+                command == MediaPlayerCommands.PLAY_PAUSE
+                and state not in PLAYING_STATES
+            ):
+                resolved = "PLAY"
+            code_def: CodeDefinition = AVAILABLE_COMMANDS[resolved]
+
+            if code_def.type == CodeTypes.TELEPORT:
+                handler = Client.send_teleport
+                args = (code_def.code,)
+            else:
+                handler = Client.send_ircode
+                args = (code_def.code, code_def.wait and state is RemoteState.LIVE)
+
+            ret[(command, state)] = Dispatch(
+                handler=handler,
+                args=args,
+                code_def=code_def,
+                next_state=TRANSITIONS.get((state, command)),
+                suppress_timeout=resolved.lower().startswith("digit_"),
             )
-        }
-        button_mapping: list[DeviceButtonMapping] = [
-            DeviceButtonMapping(
-                button=Buttons.BACK,
-                short_press=EntityCommand(cmd_id=MediaPlayerCommands.PREVIOUS),
-                long_press=EntityCommand(
-                    cmd_id="remote.send_cmd", params={"command": "CLEAR"}
-                ),
-            ),
-            DeviceButtonMapping(
-                button=Buttons.BLUE,
-                short_press=EntityCommand(cmd_id=MediaPlayerCommands.FUNCTION_BLUE),
-            ),
-            DeviceButtonMapping(
-                button=Buttons.CHANNEL_DOWN,
-                short_press=EntityCommand(cmd_id=MediaPlayerCommands.CHANNEL_DOWN),
-            ),
-            DeviceButtonMapping(
-                button=Buttons.CHANNEL_UP,
-                short_press=EntityCommand(cmd_id=MediaPlayerCommands.CHANNEL_UP),
-            ),
-            DeviceButtonMapping(
-                button=Buttons.DPAD_DOWN,
-                short_press=EntityCommand(cmd_id=MediaPlayerCommands.CURSOR_DOWN),
-            ),
-            DeviceButtonMapping(
-                button=Buttons.DPAD_LEFT,
-                short_press=EntityCommand(cmd_id=MediaPlayerCommands.CURSOR_LEFT),
-            ),
-            DeviceButtonMapping(
-                button=Buttons.DPAD_MIDDLE,
-                short_press=EntityCommand(cmd_id=MediaPlayerCommands.CURSOR_ENTER),
-            ),
-            DeviceButtonMapping(
-                button=Buttons.DPAD_RIGHT,
-                short_press=EntityCommand(cmd_id=MediaPlayerCommands.CURSOR_RIGHT),
-            ),
-            DeviceButtonMapping(
-                button=Buttons.DPAD_UP,
-                short_press=EntityCommand(cmd_id=MediaPlayerCommands.CURSOR_UP),
-            ),
-            DeviceButtonMapping(
-                button=Buttons.GREEN,
-                short_press=EntityCommand(cmd_id=MediaPlayerCommands.FUNCTION_GREEN),
-            ),
-            DeviceButtonMapping(
-                button=Buttons.HOME,
-                short_press=EntityCommand(cmd_id=MediaPlayerCommands.HOME),
-            ),
-            DeviceButtonMapping(
-                button=Buttons.NEXT,
-                short_press=EntityCommand(cmd_id=MediaPlayerCommands.FAST_FORWARD),
-            ),
-            DeviceButtonMapping(
-                button=Buttons.PLAY,
-                short_press=EntityCommand(cmd_id=MediaPlayerCommands.PLAY_PAUSE),
-                long_press=EntityCommand(cmd_id=MediaPlayerCommands.STOP),
-            ),
-            DeviceButtonMapping(
-                button=Buttons.PREV,
-                short_press=EntityCommand(cmd_id=MediaPlayerCommands.REWIND),
+
+    return ret
+
+
+DISPATCH_TABLE: dict[tuple[str, RemoteState], Dispatch] = _build_dispatch_table()
+
+
+@dataclasses.dataclass(frozen=True)
+class UiTemplates:
+    """Definitions shared by all remotes.
+
+    The items are plain dictionaries, as sent to the Remote, and must be treated
+    as read-only.
+    """
+
+    button_mapping: tuple[dict[str, Any], ...]
+    simple_commands: tuple[str, ...]
+    ui_pages: tuple[dict[str, Any], ...]
+
+
+@functools.cache
+def ui_templates() -> UiTemplates:
+    """Build the button mapping, simple commands and UI pages.
+
+    These are the same for every TiVo so are built once, on first use, and then
+    shared by all remotes.
+    """
+
+    button_mapping: list[DeviceButtonMapping] = [
+        DeviceButtonMapping(
+            button=Buttons.BACK,
+            short_press=EntityCommand(cmd_id=MediaPlayerCommands.PREVIOUS),
+            long_press=EntityCommand(
+                cmd_id="remote.send_cmd", params={"command": "CLEAR"}
             ),
-            DeviceButtonMapping(
-                button=Buttons.RED,
-                short_press=EntityCommand(cmd_id=MediaPlayerCommands.FUNCTION_RED),
+        ),
+        DeviceButtonMapping(
+            button=Buttons.BLUE,
+            short_press=EntityCommand(cmd_id=MediaPlayerCommands.FUNCTION_BLUE),
+        ),
+        DeviceButtonMapping(
+            button=Buttons.CHANNEL_DOWN,
+            short_press=EntityCommand(cmd_id=MediaPlayerCommands.CHANNEL_DOWN),
+        ),
+        DeviceButtonMapping(
+            button=Buttons.CHANNEL_UP,
+            short_press=EntityCommand(cmd_id=MediaPlayerCommands.CHANNEL_UP),
+        ),
+        DeviceButtonMapping(
+            button=Buttons.DPAD_DOWN,
+            short_press=EntityCommand(cmd_id=MediaPlayerCommands.CURSOR_DOWN),
+        ),
+        DeviceButtonMapping(
+            button=Buttons.DPAD_LEFT,
+            short_press=EntityCommand(cmd_id=MediaPlayerCommands.CURSOR_LEFT),
+        ),
+        DeviceButtonMapping(
+            button=Buttons.DPAD_MIDDLE,
+            short_press=EntityCommand(cmd_id=MediaPlayerCommands.CURSOR_ENTER),
+        ),
+        DeviceButtonMapping(
+            button=Buttons.DPAD_RIGHT,
+            short_press=EntityCommand(cmd_id=MediaPlayerCommands.CURSOR_RIGHT),
+        ),
+        DeviceButtonMapping(
+            button=Buttons.DPAD_UP,
+            short_press=EntityCommand(cmd_id=MediaPlayerCommands.CURSOR_UP),
+        ),
+        DeviceButtonMapping(
+            button=Buttons.GREEN,
+            short_press=EntityCommand(cmd_id=MediaPlayerCommands.FUNCTION_GREEN),
+        ),
+        DeviceButtonMapping(
+            button=Buttons.HOME,
+            short_press=EntityCommand(cmd_id=MediaPlayerCommands.HOME),
+        ),
+        DeviceButtonMapping(
+            button=Buttons.NEXT,
+            short_press=EntityCommand(cmd_id=MediaPlayerCommands.FAST_FORWARD),
+        ),
+        DeviceButtonMapping(
+            button=Buttons.PLAY,
+            short_press=EntityCommand(cmd_id=MediaPlayerCommands.PLAY_PAUSE),
+            long_press=EntityCommand(cmd_id=MediaPlayerCommands.STOP),
+        ),
+        DeviceButtonMapping(
+            button=Buttons.PREV,
+            short_press=EntityCommand(cmd_id=MediaPlayerCommands.REWIND),
+        ),
+        DeviceButtonMapping(
+            button=Buttons.RED,
+            short_press=EntityCommand(cmd_id=MediaPlayerCommands.FUNCTION_RED),
+        ),
+        DeviceButtonMapping(
+            button=Buttons.YELLOW,
+            short_press=EntityCommand(cmd_id=MediaPlayerCommands.FUNCTION_YELLOW),
+        ),
+    ]
+    simple_commands: list[str] = [
+        simple_command
+        for simple_command in AVAILABLE_COMMANDS
+        if not isinstance(simple_command, MediaPlayerCommands)
+    ]
+    simple_commands.append(HOLD_RELEASE_COMMAND)
+
+    # region #-- define UI pages --#
+    pg_digits: list[UiItem] = [
+        UiItem(
+            command=EntityCommand(cmd_id=f"digit_{i}"),
+            location=Location(x=(i - 1) % 3, y=math.floor((i - 1) / 3)),
+            size=Size(width=1, height=1),
+            text=str(i),
+            type="text",
+        )
+        for i in range(1, 10)
+    ]
+    pg_digits.extend(
+        [
+            UiItem(
+                command=EntityCommand(cmd_id=MediaPlayerCommands.RECORD),
+                location=Location(x=0, y=3),
+                size=Size(width=1, height=1),
+                text="REC",
+                type="text",
             ),
-            DeviceButtonMapping(
-                button=Buttons.YELLOW,
-                short_press=EntityCommand(cmd_id=MediaPlayerCommands.FUNCTION_YELLOW),
+            UiItem(
+                command=EntityCommand(cmd_id=MediaPlayerCommands.DIGIT_0),
+                location=Location(x=1, y=3),
+                size=Size(width=1, height=1),
+                text="0",
+                type="text",
             ),
-        ]
-        features: list[Features] = [Features.ON_OFF, Features.SEND_CMD]
-        simple_commands: list[str] = [
-            simple_command
-            for simple_command in AVAILABLE_COMMANDS
-            if not isinstance(simple_command, MediaPlayerCommands)
-        ]
-
-        # region #-- define UI pages --#
-        pg_digits: list[UiItem] = [
             UiItem(
-                command=EntityCommand(cmd_id=f"digit_{i}"),
-                location=Location(x=(i - 1) % 3, y=math.floor((i - 1) / 3)),
+                command=EntityCommand(cmd_id=MediaPlayerCommands.INFO),
+                location=Location(x=2, y=3),
                 size=Size(width=1, height=1),
-                text=str(i),
+                text="INFO",
                 type="text",
-            )
-            for i in range(1, 10)
+            ),
         ]
-        pg_digits.extend(
-            [
+    )
+
+    ui_pages: list[UiPage] = [
+        UiPage(
+            grid=Size(width=3, height=4),
+            items=pg_digits,
+            name="Numbers",
+            page_id="digits",
+        ),
+        UiPage(
+            grid=Size(width=6, height=9),
+            items=[
+                # region #-- first row --#
                 UiItem(
-                    command=EntityCommand(cmd_id=MediaPlayerCommands.RECORD),
-                    location=Location(x=0, y=3),
+                    command=EntityCommand(cmd_id=MediaPlayerCommands.MY_RECORDINGS),
+                    location=Location(x=0, y=0),
                     size=Size(width=1, height=1),
-                    text="REC",
+                    text="DVR",
                     type="text",
                 ),
                 UiItem(
-                    command=EntityCommand(cmd_id=MediaPlayerCommands.DIGIT_0),
-                    location=Location(x=1, y=3),
-                    size=Size(width=1, height=1),
-                    text="0",
+                    command=EntityCommand(cmd_id=MediaPlayerCommands.LIVE),
+                    location=Location(x=1, y=0),
+                    size=Size(width=2, height=1),
+                    text="LIVE",
+                    type="text",
+                ),
+                UiItem(
+                    command=EntityCommand(cmd_id=MediaPlayerCommands.GUIDE),
+                    location=Location(x=3, y=0),
+                    size=Size(width=2, height=1),
+                    text="GUIDE",
                     type="text",
                 ),
                 UiItem(
                     command=EntityCommand(cmd_id=MediaPlayerCommands.INFO),
-                    location=Location(x=2, y=3),
+                    location=Location(x=5, y=0),
                     size=Size(width=1, height=1),
                     text="INFO",
                     type="text",
                 ),
-            ]
-        )
-
-        ui_pages: list[UiPage] = [
-            UiPage(
-                grid=Size(width=3, height=4),
-                items=pg_digits,
-                name="Numbers",
-                page_id="digits",
-            ),
-            UiPage(
-                grid=Size(width=6, height=9),
-                items=[
-                    # region #-- first row --#
-                    UiItem(
-                        command=EntityCommand(cmd_id=MediaPlayerCommands.MY_RECORDINGS),
-                        location=Location(x=0, y=0),
-                        size=Size(width=1, height=1),
-                        text="DVR",
-                        type="text",
-                    ),
-                    UiItem(
-                        command=EntityCommand(cmd_id=MediaPlayerCommands.LIVE),
-                        location=Location(x=1, y=0),
-                        size=Size(width=2, height=1),
-                        text="LIVE",
-                        type="text",
-                    ),
-                    UiItem(
-                        command=EntityCommand(cmd_id=MediaPlayerCommands.GUIDE),
-                        location=Location(x=3, y=0),
-                        size=Size(width=2, height=1),
-                        text="GUIDE",
-                        type="text",
-                    ),
-                    UiItem(
-                        command=EntityCommand(cmd_id=MediaPlayerCommands.INFO),
-                        location=Location(x=5, y=0),
-                        size=Size(width=1, height=1),
-                        text="INFO",
-                        type="text",
-                    ),
-                    # endregion
-                    # region #-- spacer --#
-                    UiItem(
-                        location=Location(x=0, y=1),
-                        size=Size(width=6, height=1),
-                        text="",
-                        type="text",
-                    ),
-                    # endregion
-                    # region # -- second row --#
-                    UiItem(
-                        command=EntityCommand(cmd_id=MediaPlayerCommands.REWIND),
-                        icon="uc:bw",
-                        location=Location(x=0, y=2),
-                        size=Size(width=2, height=1),
-                        type="icon",
-                    ),
-                    UiItem(
-                        command=EntityCommand(
-                            cmd_id="remote.send_cmd", params={"command": "PLAY"}
-                        ),
-                        icon="uc:play",
-                        location=Location(x=2, y=2),
-                        size=Size(width=2, height=1),
-                        type="icon",
-                    ),
-                    UiItem(
-                        command=EntityCommand(cmd_id=MediaPlayerCommands.FAST_FORWARD),
-                        icon="uc:ff",
-                        location=Location(x=4, y=2),
-                        size=Size(width=2, height=1),
-                        type="icon",
-                    ),
-                    # endregion
-                    # region #-- third row --#
-                    UiItem(
-                        command=EntityCommand(cmd_id=MediaPlayerCommands.RECORD),
-                        icon="uc:rec",
-                        location=Location(x=0, y=3),
-                        size=Size(width=2, height=1),
-                        type="icon",
-                    ),
-                    UiItem(
-                        command=EntityCommand(
-                            cmd_id="remote.send_cmd", params={"command": "PAUSE"}
-                        ),
-                        icon="uc:pause",
-                        location=Location(x=2, y=3),
-                        size=Size(width=2, height=1),
-                        type="icon",
-                    ),
-                    UiItem(
-                        command=EntityCommand(cmd_id=MediaPlayerCommands.STOP),
-                        icon="uc:stop",
-                        location=Location(x=4, y=3),
-                        size=Size(width=2, height=1),
-                        type="icon",
-                    ),
-                    # endregion
-                    # region #-- spacer --#
-                    UiItem(
-                        location=Location(x=0, y=4),
-                        size=Size(width=6, height=1),
-                        text="",
-                        type="text",
-                    ),
-                    # endregion
-                    # region  #-- fourth row --#
-                    UiItem(
-                        command=EntityCommand(
-                            cmd_id="remote.send_cmd", params={"command": "CLEAR"}
-                        ),
-                        location=Location(x=0, y=5),
-                        size=Size(width=1, height=1),
-                        text="CLEAR",
-                        type="text",
-                    ),
-                    UiItem(
-                        command=EntityCommand(
-                            cmd_id="remote.send_cmd", params={"command": "THUMBSDOWN"}
-                        ),
-                        location=Location(x=1, y=5),
-                        size=Size(width=2, height=1),
-                        text="ThDown",
-                        type="text",
-                    ),
-                    UiItem(
-                        command=EntityCommand(
-                            cmd_id="remote.send_cmd", params={"command": "THUMBSUP"}
-                        ),
-                        location=Location(x=3, y=5),
-                        size=Size(width=2, height=1),
-                        text="ThUp",
-                        type="text",
+                # endregion
+                # region #-- spacer --#
+                UiItem(
+                    location=Location(x=0, y=1),
+                    size=Size(width=6, height=1),
+                    text="",
+                    type="text",
+                ),
+                # endregion
+                # region # -- second row --#
+                UiItem(
+                    command=EntityCommand(cmd_id=MediaPlayerCommands.REWIND),
+                    icon="uc:bw",
+                    location=Location(x=0, y=2),
+                    size=Size(width=2, height=1),
+                    type="icon",
+                ),
+                UiItem(
+                    command=EntityCommand(
+                        cmd_id="remote.send_cmd", params={"command": "PLAY"}
                     ),
-                    UiItem(
-                        command=EntityCommand(cmd_id=MediaPlayerCommands.HOME),
-                        location=Location(x=5, y=5),
-                        size=Size(width=1, height=1),
-                        text="HOME",
-                        type="text",
+                    icon="uc:play",
+                    location=Location(x=2, y=2),
+                    size=Size(width=2, height=1),
+                    type="icon",
+                ),
+                UiItem(
+                    command=EntityCommand(cmd_id=MediaPlayerCommands.FAST_FORWARD),
+                    icon="uc:ff",
+                    location=Location(x=4, y=2),
+                    size=Size(width=2, height=1),
+                    type="icon",
+                ),
+                # endregion
+                # region #-- third row --#
+                UiItem(
+                    command=EntityCommand(cmd_id=MediaPlayerCommands.RECORD),
+                    icon="uc:rec",
+                    location=Location(x=0, y=3),
+                    size=Size(width=2, height=1),
+                    type="icon",
+                ),
+                UiItem(
+                    command=EntityCommand(
+                        cmd_id="remote.send_cmd", params={"command": "PAUSE"}
                     ),
-                    # region #-- spacer --#
-                    UiItem(
-                        location=Location(x=0, y=6),
-                        size=Size(width=6, height=1),
-                        text="",
-                        type="text",
+                    icon="uc:pause",
+                    location=Location(x=2, y=3),
+                    size=Size(width=2, height=1),
+                    type="icon",
+                ),
+                UiItem(
+                    command=EntityCommand(cmd_id=MediaPlayerCommands.STOP),
+                    icon="uc:stop",
+                    location=Location(x=4, y=3),
+                    size=Size(width=2, height=1),
+                    type="icon",
+                ),
+                # endregion
+                # region #-- spacer --#
+                UiItem(
+                    location=Location(x=0, y=4),
+                    size=Size(width=6, height=1),
+                    text="",
+                    type="text",
+                ),
+                # endregion
+                # region  #-- fourth row --#
+                UiItem(
+                    command=EntityCommand(
+                        cmd_id="remote.send_cmd", params={"command": "CLEAR"}
                     ),
-                    # endregion
-                    # region #-- fifth row --#
-                    UiItem(
-                        command=EntityCommand(cmd_id=MediaPlayerCommands.OFF),
-                        location=Location(x=0, y=7),
-                        size=Size(width=1, height=1),
-                        text="OFF",
-                        type="text",
+                    location=Location(x=0, y=5),
+                    size=Size(width=1, height=1),
+                    text="CLEAR",
+                    type="text",
+                ),
+                UiItem(
+                    command=EntityCommand(
+                        cmd_id="remote.send_cmd", params={"command": "THUMBSDOWN"}
                     ),
-                    UiItem(
-                        command=EntityCommand(cmd_id=MediaPlayerCommands.ON),
-                        location=Location(x=5, y=7),
-                        size=Size(width=1, height=1),
-                        text="ON",
-                        type="text",
+                    location=Location(x=1, y=5),
+                    size=Size(width=2, height=1),
+                    text="ThDown",
+                    type="text",
+                ),
+                UiItem(
+                    command=EntityCommand(
+                        cmd_id="remote.send_cmd", params={"command": "THUMBSUP"}
                     ),
-                    # endregion
-                ],
-                name="Misc.",
-                page_id="misc",
-            ),
-        ]
-        # endregion
+                    location=Location(x=3, y=5),
+                    size=Size(width=2, height=1),
+                    text="ThUp",
+                    type="text",
+                ),
+                UiItem(
+                    command=EntityCommand(cmd_id=MediaPlayerCommands.HOME),
+                    location=Location(x=5, y=5),
+                    size=Size(width=1, height=1),
+                    text="HOME",
+                    type="text",
+                ),
+                # region #-- spacer --#
+                UiItem(
+                    location=Location(x=0, y=6),
+                    size=Size(width=6, height=1),
+                    text="",
+                    type="text",
+                ),
+                # endregion
+                # region #-- fifth row --#
+                UiItem(
+                    command=EntityCommand(cmd_id=MediaPlayerCommands.OFF),
+                    location=Location(x=0, y=7),
+                    size=Size(width=1, height=1),
+                    text="OFF",
+                    type="text",
+                ),
+                UiItem(
+                    command=EntityCommand(cmd_id=MediaPlayerCommands.ON),
+                    location=Location(x=5, y=7),
+                    size=Size(width=1, height=1),
+                    text="ON",
+                    type="text",
+                ),
+                # endregion
+            ],
+            name="Misc.",
+            page_id="misc",
+        ),
+    ]
+    # endregion
+
+    return UiTemplates(
+        button_mapping=tuple(dataclasses.asdict(itm) for itm in button_mapping),
+        simple_commands=tuple(simple_commands),
+        ui_pages=tuple(dataclasses.asdict(itm) for itm in ui_pages),
+    )
+
+
+class TivoRemote(Remote):
+    """TiVo remote representation."""
+
+    @log(_LOG, include_datetime=_LOG_INC_DATETIME)
+    def __init__(
+        self, device_config: VmTivoDevice, data_path: str | None = None
+    ) -> None:
+        """Initialise.
+
+        :param data_path: directory to keep the learned channel lineup in
+        """
+
+        self._channel_burst: asyncio.Task | None = None
+        self._channel_deadline: float = 0.0
+        self._channel_sending: bool = False
+        self._channel_steps: int = 0
+        self._hold_task: asyncio.Task | None = None
+        self._playback: PlaybackStateMachine = PlaybackStateMachine()
+        self._reconcile_task: asyncio.Task | None = None
+        self._run: WorkerRun | None = None
+        self._submit: (
+            Callable[[str, dict[str, Any] | None], Awaitable[StatusCodes]] | None
+        ) = None
+        self._tivo_config: VmTivoDevice = device_config
+        self._client: Client = Client(
+            self._tivo_config.address,
+            self._tivo_config.port,
+            addresses=self._tivo_config.addresses,
+            key_rate=self._tivo_config.key_rate,
+        )
+        self._client.add_data_callback(self._data_callback)
+        self._lineup_path: str | None = None
+        self._lineup_saved: float = 0.0
+        self._lineup_saving: asyncio.Task | None = None
+        if data_path is not None:
+            self._lineup_path = os.path.join(
+                data_path, f"lineup_{self._tivo_config.id}.json"
+            )
+            self._client.device.lineup = ChannelLineup.load(self._lineup_path)
+
+        self.events: AsyncIOEventEmitter = AsyncIOEventEmitter(
+            asyncio.get_running_loop()
+        )
+
+        attributes: dict[str, Any] = {
+            Attributes.STATE: (
+                States.ON if self._client.device.channel_number else States.UNKNOWN
+            )
+        }
+        templates: UiTemplates = ui_templates()
+        features: list[Features] = [Features.ON_OFF, Features.SEND_CMD]
 
         super().__init__(
             f"{EntityTypes.REMOTE.value}.{self._tivo_config.id}",
             self._tivo_config.name,
             features,
             attributes,
-            button_mapping=button_mapping,
-            simple_commands=simple_commands,
-            ui_pages=ui_pages,
+            button_mapping=templates.button_mapping,
+            simple_commands=templates.simple_commands,
+            ui_pages=templates.ui_pages,
         )
+        for button, presses in self._tivo_config.buttons.items():
+            self.override_button(
+                button,
+                **{
+                    press: EntityCommand(
+                        cmd_id="remote.send_cmd", params={"command": command}
+                    )
+                    for press, command in presses.items()
+                    if press in ("short_press", "long_press")
+                },
+            )
+
+    def _check_reachable(self) -> None:
+        """Signal that the device looks to have moved address."""
+        if self._client.connect_failures >= REBIND_FAILURE_THRESHOLD:
+            self.events.emit(Events.UNREACHABLE, self)
 
     @log(_LOG, include_datetime=_LOG_INC_DATETIME)
     def _data_callback(
@@ -374,6 +562,15 @@ class TivoRemote(Remote):
         cur_state: States = States.UNKNOWN
         if device.channel_number is not None:
             cur_state = States.ON
+        if device.last_reply is not None and device.last_reply.startswith("CH_STATUS"):
+            self._playback.fire(Reply.CHANNEL_STATUS)
+        if (
+            self._lineup_path is not None
+            and device.lineup.dirty
+            and self._lineup_saving is None
+            and time.monotonic() - self._lineup_saved >= LINEUP_SAVE_INTERVAL
+        ):
+            self._lineup_saving = asyncio.create_task(self.async_save_lineup())
 
         self.events.emit(
             Events.STATE_CHANGED,
@@ -385,122 +582,160 @@ class TivoRemote(Remote):
     async def command(
         self, cmd_id: str, params: dict[str, Any] | None = None
     ) -> StatusCodes:
-        """Process commands received from the remote."""
+        """Process commands received from the remote.
+
+        Whilst a worker is attached the command is queued for it, so commands
+        reach the TiVo in the order they were received.
+        """
+        if self._submit is None:
+            return await self.async_run_command(cmd_id, params)
+
+        # a held button is let go now rather than once the command's turn comes
+        if self._hold_task is not None:
+            await self.async_release()
+        return await self._submit(cmd_id, params)
 
+    async def async_run_command(
+        self, cmd_id: str, params: dict[str, Any] | None = None
+    ) -> StatusCodes:
+        """Carry out a command received from the remote."""
+
+        start: float = time.perf_counter()
         repeat: int = params.get("repeat", 1)
         ret: StatusCodes = StatusCodes.OK
-        for _ in range(0, repeat):
-            ret = await self.async_handle_command(cmd_id, params)
+        with TRACER.span("remote.command", entity=self.id, cmd_id=cmd_id):
+            for _ in range(0, repeat):
+                ret = await self.async_handle_command(cmd_id, params)
+
+        _command_histogram(cmd_id).observe(time.perf_counter() - start)
+        _command_result_counter(cmd_id, ret).inc()
 
         return ret
 
+    @TRACER.traced("remote.handle_command")
     @log(_LOG, include_datetime=_LOG_INC_DATETIME)
     async def async_handle_command(
-        self, cmd_id: str, params: dict[str, Any] | None = None
+        self,
+        cmd_id: str,
+        params: dict[str, Any] | None = None,
+        *,
+        hold_inline: bool = False,
     ) -> StatusCodes:
-        """Process the actual commands received from the remote."""
+        """Process the actual commands received from the remote.
+
+        :param hold_inline: True to hold a button before returning, rather than
+            in the background
+        """
 
         _LOG.debug(
             log_formatter(
-                f"on entry remote is: {self._remote_state.value}",
+                f"on entry remote is: {self._playback.state.value}",
                 include_datetime=_LOG_INC_DATETIME,
             )
         )
 
         delay: int = int(params.get("delay", 0)) / 1000
         command: str | None
-        if cmd_id == Commands.OFF:
-            command = MediaPlayerCommands.OFF
-        elif cmd_id == Commands.ON:
-            command = MediaPlayerCommands.ON
-        elif cmd_id == Commands.SEND_CMD:
-            if params is not None:
-                command = params.get("command")
-                if command not in AVAILABLE_COMMANDS:
-                    return StatusCodes.NOT_IMPLEMENTED
+        if cmd_id == Commands.SEND_CMD:
+            command = params.get("command")
+        elif cmd_id in _DIRECT_COMMAND_IDS:
+            command = cmd_id
         elif cmd_id == Commands.SEND_CMD_SEQUENCE:
             cmd_sequence: list[MediaPlayerCommands | str] = params.get("sequence", [])
             for cmd in cmd_sequence:
+                # let each held button finish before moving on to the next
                 ret: StatusCodes = await self.async_handle_command(
                     Commands.SEND_CMD.value,
                     {"command": cmd, "delay": delay, "hold": params.get("hold", 0)},
+                    hold_inline=True,
                 )
             return ret
         else:
             return StatusCodes.NOT_IMPLEMENTED
 
-        code_def: CodeDefinition | None
-        err: bool = False
-        try:
-            if (code_def := AVAILABLE_COMMANDS.get(command, None)) is None:
-                return StatusCodes.NOT_IMPLEMENTED
-
-            if command == MediaPlayerCommands.PLAY_PAUSE:
-                if self._remote_state != RemoteState.LIVE:
-                    _LOG.debug(
-                        log_formatter(
-                            "switching command to PLAY",
-                            include_datetime=_LOG_INC_DATETIME,
-                        )
-                    )
-                    command = "PLAY"
-                    code_def = AVAILABLE_COMMANDS.get(command, None)
-
-            if code_def.type == CodeTypes.IRCODE:
-                args = [
-                    code_def.code,
-                    (
-                        code_def.wait
-                        if self._remote_state is RemoteState.LIVE
-                        else False
-                    ),
-                ]
-                func = self._client.send_ircode
+        channel_step: int | None = (
+            _CHANNEL_STEPS.get(command) if self._tivo_config.coalesce_channels else None
+        )
+        # channel presses waiting in a burst go out before any other command
+        if channel_step is None:
+            await self._async_flush_channel_burst()
 
-            if code_def.type == CodeTypes.TELEPORT:
-                args = [code_def.code]
-                func = self._client.send_teleport
+        # any command releases a held button
+        await self.async_release()
+        if command == HOLD_RELEASE_COMMAND:
+            return StatusCodes.OK
+        if isinstance(command, str) and command.startswith(TEXT_COMMAND_PREFIX):
+            return await self._async_send_text(command[len(TEXT_COMMAND_PREFIX) :])
+
+        # presses whilst a channel burst is open are added up and sent together
+        if channel_step is not None and self._channel_burst is not None:
+            self._channel_steps += channel_step
+            self._channel_deadline = (
+                asyncio.get_running_loop().time() + CHANNEL_COALESCE_WINDOW
+            )
+            return StatusCodes.OK
+
+        dispatch: Dispatch | None
+        if (dispatch := DISPATCH_TABLE.get((command, self._playback.state))) is None:
+            return StatusCodes.NOT_IMPLEMENTED
+
+        code_def: CodeDefinition = dispatch.code_def
+        hold: float = min(int(params.get("hold", 0)) / 1000, HOLD_MAX_DURATION)
+        if hold > 0 and code_def.type == CodeTypes.IRCODE:
+            if dispatch.next_state is not None:
+                self._playback.move_to(dispatch.next_state, command)
+            if hold_inline:
+                await self._async_hold(code_def, hold)
+            else:
+                self._hold_task = asyncio.create_task(self._async_hold(code_def, hold))
+            return StatusCodes.OK
+
+        # show the new state straight away, a probe shortly after confirms it
+        previous_state: States | None = self.attributes.get(Attributes.STATE)
+        if code_def.state:
+            self._emit_state(code_def.state)
 
+        try:
             async with self._client:
                 for idx_repeat in range(1, code_def.repeat + 1):
-                    await func(*args)
+                    await dispatch.handler(self._client, *dispatch.args)
+                    # the hand-tuned wait is the least, a slower key rate stretches it
                     if (
                         idx_repeat != code_def.repeat
                         and code_def.wait_repeat is not None
                     ):
-                        _LOG.debug(log_formatter(f"sleeping {code_def.wait_repeat}s"))
-                        await asyncio.sleep(code_def.wait_repeat)
+                        wait_repeat: float = code_def.wait_repeat
+                        if self._client.key_rate:
+                            wait_repeat = max(wait_repeat, 1 / self._client.key_rate)
+                        _LOG.debug(log_formatter(f"sleeping {wait_repeat}s"))
+                        with TRACER.span("remote.wait_repeat"):
+                            await asyncio.sleep(wait_repeat)
 
             if code_def.state:
-                self.events.emit(
-                    Events.STATE_CHANGED,
-                    self.id,
-                    {Attributes.STATE: code_def.state},
-                )
+                self._schedule_reconcile(code_def.state)
 
         except Exception as exc:
-            if code_def.wait:
-                if str(command).lower().startswith("digit_") and isinstance(
-                    exc, VirginMediaCommandTimeout
-                ):
-                    _LOG.debug(
-                        log_formatter(
-                            "suppressing timeout", include_datetime=_LOG_INC_DATETIME
-                        )
-                    )
-            else:
+            if code_def.state and previous_state is not None:
+                self._emit_state(previous_state)
+            self._check_reachable()
+            if not code_def.wait:
                 _LOG.error(log_formatter(exc, include_datetime=_LOG_INC_DATETIME))
-                err = True
+                return StatusCodes.SERVICE_UNAVAILABLE
+            if dispatch.suppress_timeout and isinstance(exc, VirginMediaCommandTimeout):
+                _LOG.debug(
+                    log_formatter(
+                        "suppressing timeout", include_datetime=_LOG_INC_DATETIME
+                    )
+                )
 
-        if err:
-            return StatusCodes.SERVICE_UNAVAILABLE
+        if dispatch.next_state is not None:
+            self._playback.move_to(dispatch.next_state, command)
 
-        if command in [MediaPlayerCommands.LIVE, "PLAY", MediaPlayerCommands.STOP]:
-            self._remote_state = RemoteState.LIVE
-        elif command in [MediaPlayerCommands.FAST_FORWARD, MediaPlayerCommands.REWIND]:
-            self._remote_state = RemoteState.SPEEDING
-        elif command == MediaPlayerCommands.PLAY_PAUSE:
-            self._remote_state = RemoteState.PAUSED
+        if channel_step is not None:
+            self._channel_deadline = (
+                asyncio.get_running_loop().time() + CHANNEL_COALESCE_WINDOW
+            )
+            self._channel_burst = asyncio.create_task(self._async_channel_burst())
 
         if delay > 0:
             _LOG.debug(
@@ -509,39 +744,218 @@ class TivoRemote(Remote):
                     include_datetime=_LOG_INC_DATETIME,
                 )
             )
-            await asyncio.sleep(delay)
+            with TRACER.span("remote.delay"):
+                await asyncio.sleep(delay)
 
         _LOG.debug(
             log_formatter(
-                f"on exit remote is: {self._remote_state.value}",
+                f"on exit remote is: {self._playback.state.value}",
                 include_datetime=_LOG_INC_DATETIME,
             )
         )
 
         return StatusCodes.OK
 
+    def _emit_state(self, state: States) -> None:
+        """Let the driver know the state of the remote."""
+        self.events.emit(Events.STATE_CHANGED, self.id, {Attributes.STATE: state})
+
+    def _schedule_reconcile(self, expected: States) -> None:
+        """Probe the TiVo shortly to confirm the state shown is right."""
+        if self._reconcile_task is not None:
+            self._reconcile_task.cancel()
+        self._reconcile_task = asyncio.create_task(self._async_reconcile(expected))
+
+    @log(_LOG, include_datetime=_LOG_INC_DATETIME)
+    async def _async_reconcile(self, expected: States) -> None:
+        """Confirm the state shown after a command, correcting it if wrong."""
+        try:
+            await asyncio.sleep(RECONCILE_DELAY)
+            actual: States = await self.get_state()
+            if actual not in (expected, States.UNKNOWN):
+                _LOG.debug(
+                    log_formatter(
+                        f"expected {expected}, rolling back to {actual}",
+                        include_datetime=_LOG_INC_DATETIME,
+                    )
+                )
+                self._emit_state(actual)
+        finally:
+            if self._reconcile_task is asyncio.current_task():
+                self._reconcile_task = None
+
+    @log(_LOG, include_datetime=_LOG_INC_DATETIME)
+    async def _async_channel_burst(self) -> None:
+        """Send the channel steps pressed after the first of a burst.
+
+        The steps are sent once no more presses arrive within the window.
+        """
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        try:
+            while True:
+                while (remaining := self._channel_deadline - loop.time()) > 0:
+                    await asyncio.sleep(remaining)
+
+                if not self._channel_steps:
+                    break
+                await self._exclusive(self._async_send_channel_steps)
+        finally:
+            self._channel_burst = None
+
+    async def _async_send_channel_steps(self) -> None:
+        """Send the channel steps pressed so far.
+
+        The steps are turned into a single channel change using the steps
+        learned from the TiVo, which skip the channels it doesn't have. If any
+        of the steps hasn't been learned, or live TV isn't showing, the steps
+        are sent as IR codes instead.
+        """
+        steps: int = self._channel_steps
+        self._channel_steps = 0
+        if steps == 0:
+            return
+
+        self._channel_sending = True
+        try:
+            device: Device = self._client.device
+            live: bool = self._playback.state is RemoteState.LIVE
+            target: int | None = None
+            if live and device.channel_number is not None:
+                target = device.lineup.step(device.channel_number, steps)
+
+            try:
+                async with self._client:
+                    if target is not None:
+                        _LOG.debug(
+                            log_formatter(
+                                f"coalesced {steps} steps into channel {target}",
+                                include_datetime=_LOG_INC_DATETIME,
+                            )
+                        )
+                        try:
+                            await self._client.set_channel(target)
+                        except (VirginMediaInvalidChannel, VirginMediaNotLive):
+                            target = None
+                    if target is None:
+                        code_def: CodeDefinition = AVAILABLE_COMMANDS[
+                            MediaPlayerCommands.CHANNEL_UP
+                            if steps > 0
+                            else MediaPlayerCommands.CHANNEL_DOWN
+                        ]
+                        for _ in range(abs(steps)):
+                            await self._client.send_ircode(code_def.code, live)
+            except VirginMediaError as exc:
+                self._check_reachable()
+                _LOG.error(log_formatter(exc, include_datetime=_LOG_INC_DATETIME))
+        finally:
+            self._channel_sending = False
+
+    async def _async_flush_channel_burst(self) -> None:
+        """Send the channel presses waiting in a burst straight away."""
+        if (burst := self._channel_burst) is None:
+            return
+
+        if self._channel_sending:
+            # part way through sending, so the burst is left to finish
+            self._channel_deadline = 0.0
+            with contextlib.suppress(asyncio.CancelledError):
+                await burst
+            return
+
+        burst.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await burst
+        await self._exclusive(self._async_send_channel_steps)
+
+    async def _exclusive(self, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Call func whilst nothing else talks to the TiVo.
+
+        With a worker attached func waits for the commands queued before it,
+        otherwise it is called straight away.
+        """
+        if self._run is None:
+            return await func()
+
+        return await self._run(func)
+
+    @log(_LOG, include_datetime=_LOG_INC_DATETIME)
+    async def _async_send_text(self, text: str) -> StatusCodes:
+        """Type the text on the TiVo."""
+        try:
+            async with self._client:
+                await self._client.send_text(text)
+        except VirginMediaInvalidKey as exc:
+            _LOG.error(log_formatter(exc, include_datetime=_LOG_INC_DATETIME))
+            return StatusCodes.BAD_REQUEST
+        except VirginMediaError as exc:
+            self._check_reachable()
+            _LOG.error(log_formatter(exc, include_datetime=_LOG_INC_DATETIME))
+            return StatusCodes.SERVICE_UNAVAILABLE
+
+        return StatusCodes.OK
+
+    @log(_LOG, include_datetime=_LOG_INC_DATETIME)
+    async def _async_hold(self, code_def: CodeDefinition, duration: float) -> None:
+        """Hold the button down for the duration, or until released."""
+
+        async def _async_send() -> None:
+            async with self._client:
+                await self._client.hold_ircode(code_def.code, duration)
+
+        try:
+            await self._exclusive(_async_send)
+        except VirginMediaError as exc:
+            self._check_reachable()
+            _LOG.error(log_formatter(exc, include_datetime=_LOG_INC_DATETIME))
+
+    @log(_LOG, include_datetime=_LOG_INC_DATETIME)
+    async def async_release(self) -> None:
+        """Release a held button, stopping the repeats immediately."""
+        if self._hold_task is not None:
+            self._hold_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._hold_task
+            self._hold_task = None
+
     async def get_state(self, connect: bool = True) -> States:
         """Determine the current state of the TiVo."""
+        # the connection is in use whilst a button is held and the TiVo is on
+        if self._hold_task is not None and not self._hold_task.done():
+            return States.ON
+
+        return await self._exclusive(functools.partial(self._async_get_state, connect))
+
+    async def _async_get_state(self, connect: bool) -> States:
+        """Ask the TiVo for its state."""
         ret = States.OFF
         try:
             if connect:
-                async with self._client:
-                    await self._client.wait_for_data()
+                try:
+                    async with self._client:
+                        await self._client.read_status()
+                finally:
+                    self._check_reachable()
             # if self._client.device.channel_number is not None:
             ret = States.ON
         except VirginMediaConnectionReset as exc:
             if self.attributes.get(Attributes.STATE) != States.OFF:
-                if self._remote_state != RemoteState.DVR:
-                    _LOG.debug(
-                        log_formatter(
-                            f"assuming on: {exc} (possibly on DVR)",
-                            include_datetime=_LOG_INC_DATETIME,
-                        )
+                _LOG.debug(
+                    log_formatter(
+                        f"assuming on: {exc} (possibly on DVR)",
+                        include_datetime=_LOG_INC_DATETIME,
                     )
-                    self._remote_state = RemoteState.DVR
+                )
+                self._playback.fire(Reply.CONNECTION_RESET)
                 ret = States.ON
             else:
                 ret = States.OFF
+        except VirginMediaCircuitOpen as exc:
+            _LOG.debug(
+                log_formatter(
+                    f"keeping state: {exc}", include_datetime=_LOG_INC_DATETIME
+                )
+            )
+            ret = self.attributes.get(Attributes.STATE, States.UNKNOWN)
         except VirginMediaCommandTimeout as exc:
             _LOG.debug(
                 log_formatter(
@@ -554,3 +968,180 @@ class TivoRemote(Remote):
             ret = States.UNKNOWN
 
         return ret
+
+    def override_button(
+        self,
+        button: str,
+        short_press: EntityCommand | None = None,
+        long_press: EntityCommand | None = None,
+    ) -> None:
+        """Change what a button does on this remote only.
+
+        The shared mapping for the button is copied before it is changed, the
+        rest of this remote's mapping stays shared.
+        """
+        button_mapping: list[dict[str, Any]] = self.options["button_mapping"]
+        for idx, itm in enumerate(button_mapping):
+            if itm.get("button") == button:
+                mapping: dict[str, Any] = dict(itm)
+                button_mapping[idx] = mapping
+                break
+        else:
+            mapping = {"button": button, "short_press": None, "long_press": None}
+            button_mapping.append(mapping)
+        if short_press is not None:
+            mapping["short_press"] = dataclasses.asdict(short_press)
+        if long_press is not None:
+            mapping["long_press"] = dataclasses.asdict(long_press)
+
+    @log(_LOG, include_datetime=_LOG_INC_DATETIME)
+    async def async_calibrate_key_rate(self) -> float | None:
+        """Find the highest rate the TiVo accepts keys at and use it."""
+        calibration_client: Client = Client(
+            self._client.host, self._tivo_config.port, addresses=self._client.addresses
+        )
+        try:
+            if (key_rate := await calibration_client.calibrate_key_rate()) is not None:
+                self._tivo_config.key_rate = key_rate
+                self._client.key_rate = key_rate
+        except VirginMediaError as exc:
+            _LOG.debug(
+                log_formatter(
+                    f"unable to calibrate: {exc}", include_datetime=_LOG_INC_DATETIME
+                )
+            )
+            key_rate = None
+
+        return key_rate
+
+    @log(_LOG, include_datetime=_LOG_INC_DATETIME)
+    async def async_warm_up(self) -> None:
+        """Open the connection to the TiVo ready for the first button press."""
+        try:
+            await self._exclusive(
+                functools.partial(self._client.warm_up, CONNECTION_IDLE_TIMEOUT)
+            )
+        except VirginMediaError as exc:
+            self._check_reachable()
+            _LOG.debug(
+                log_formatter(
+                    f"unable to warm up: {exc}", include_datetime=_LOG_INC_DATETIME
+                )
+            )
+
+    @log(_LOG, include_datetime=_LOG_INC_DATETIME)
+    async def async_save_lineup(self) -> None:
+        """Save the learned channel lineup if it has changed since last saved.
+
+        A copy is written in an executor, so the lineup can go on learning
+        whilst the file is written.
+        """
+        saving: asyncio.Task | None = self._lineup_saving
+        if saving is not None and saving is not asyncio.current_task():
+            await saving
+
+        lineup: ChannelLineup = self._client.device.lineup
+        try:
+            if self._lineup_path is None or not lineup.dirty:
+                return
+
+            lineup.dirty = False
+            self._lineup_saved = time.monotonic()
+            if not await asyncio.get_running_loop().run_in_executor(
+                None, lineup.copy().save, self._lineup_path
+            ):
+                lineup.dirty = True
+        finally:
+            if self._lineup_saving is asyncio.current_task():
+                self._lineup_saving = None
+
+    def attach_worker(
+        self,
+        submit: Callable[[str, dict[str, Any] | None], Awaitable[StatusCodes]] | None,
+        run: WorkerRun | None = None,
+    ) -> None:
+        """Send commands to the worker for this TiVo, or directly if None.
+
+        :param submit: queues a command for the worker
+        :param run: calls a function in turn with the queued commands, anything
+            else that talks to the TiVo is passed to it
+        """
+        self._submit = submit
+        self._run = run
+
+    @log(_LOG, include_datetime=_LOG_INC_DATETIME)
+    def cool_down(self) -> None:
+        """Let the connection to the TiVo close once it has been left idle."""
+        self._client.linger(CONNECTION_STANDBY_IDLE_TIMEOUT)
+
+    @log(_LOG, include_datetime=_LOG_INC_DATETIME)
+    def update_address(self, address: str, addresses: list[str] | None = None) -> None:
+        """Point the remote at a new address for the TiVo."""
+        self._tivo_config.address = address
+        self._tivo_config.addresses = addresses or []
+        self._client.host = address
+        self._client.addresses = self._tivo_config.addresses
+
+    def restore(self, snapshot: DeviceSnapshot) -> None:
+        """Use the last known state until the TiVo can be asked.
+
+        States that aren't known, from an old or edited file, are skipped.
+        """
+        device: Device = self._client.device
+        # setting the channel twice leaves the first as the previous channel
+        if snapshot.channel is not None:
+            if snapshot.previous_channel is not None:
+                device.channel_number = snapshot.previous_channel
+            device.channel_number = snapshot.channel
+        if snapshot.key_rate is not None and self._client.key_rate is None:
+            self._client.key_rate = snapshot.key_rate
+        if snapshot.power is not None:
+            try:
+                self.attributes[Attributes.STATE] = States(snapshot.power)
+            except ValueError:
+                _LOG.warning(
+                    log_formatter(
+                        f"ignoring unknown power state: {snapshot.power}",
+                        include_datetime=_LOG_INC_DATETIME,
+                    )
+                )
+        if snapshot.remote_state is not None:
+            try:
+                self._playback.move_to(RemoteState(snapshot.remote_state), "restore")
+            except ValueError:
+                _LOG.warning(
+                    log_formatter(
+                        f"ignoring unknown remote state: {snapshot.remote_state}",
+                        include_datetime=_LOG_INC_DATETIME,
+                    )
+                )
+        if snapshot.rtt is not None and self._client.rtt is None:
+            self._client.rtt = snapshot.rtt
+
+    def snapshot(self) -> DeviceSnapshot:
+        """Return the current state, for restoring after a restart."""
+        device: Device = self._client.device
+        state: States | None = self.attributes.get(Attributes.STATE)
+        return DeviceSnapshot(
+            channel=device.channel_number,
+            key_rate=self._client.key_rate,
+            power=States(state).value if state is not None else None,
+            previous_channel=device.previous_channel_number,
+            remote_state=self._playback.state.value,
+            rtt=round(self._client.rtt, 4) if self._client.rtt is not None else None,
+        )
+
+    @property
+    def playback(self) -> PlaybackStateMachine:
+        """Return the playback state machine."""
+        return self._playback
+
+    @property
+    def serial(self) -> str | None:
+        """Return the serial number (TSN) of the TiVo."""
+        return self._tivo_config.serial
+
+    @property
+    def tivo_config(self) -> VmTivoDevice:
+        """Return the configuration of the TiVo."""
+        return self._tivo_config
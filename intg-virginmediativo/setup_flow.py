@@ -1,10 +1,14 @@
 """Handle the setup flow for the integration."""
 
+import asyncio
 import logging
+import time
 import uuid
+from typing import Any
 
 import config
 import discover
+from const import SETUP_CONNECT_DEADLINE
 from logger import log, log_formatter
 from pyvmtivo.client import DEFAULT_CONNECT_PORT, Client
 from ucapi import (
@@ -22,6 +26,8 @@ from ucapi import (
 _LOG: logging.Logger = logging.getLogger(__name__)
 _LOG_INC_DATETIME: bool = True
 
+SELECT_ALL_DEVICES: str = "all"
+
 
 class SetupFlow:
     """Manage the setup."""
@@ -120,16 +126,38 @@ class SetupFlow:
                         }
                     },
                 },
+                {
+                    "field": {
+                        "checkbox": {
+                            "value": False,
+                        }
+                    },
+                    "id": "sweep",
+                    "label": {
+                        "en": "Scan the local network if no devices are discovered",
+                    },
+                },
             ],
         )
 
     @log(_LOG, include_datetime=_LOG_INC_DATETIME)
     async def async_step_discovery(
-        self, msg: DriverSetupRequest
+        self, msg: UserDataResponse
     ) -> RequestUserInput | SetupError:
         """Discovery step."""
 
         self._discovered_devices = await discover.devices()
+        if (
+            len(self._discovered_devices) == 0
+            and str(msg.input_values.get("sweep", "false")).lower() == "true"
+        ):
+            _LOG.debug(
+                log_formatter(
+                    "nothing discovered, scanning the local network",
+                    include_datetime=_LOG_INC_DATETIME,
+                )
+            )
+            self._discovered_devices = await discover.sweep()
 
         if len(self._discovered_devices) == 0:
             return await self.async_step_no_devices(msg)
@@ -153,6 +181,7 @@ class SetupFlow:
             }
             for dev in self._discovered_devices
         ]
+        selections.append({"id": SELECT_ALL_DEVICES, "label": {"en": "All devices"}})
         return RequestUserInput(
             {
                 "en": "Multiple devices found.",
@@ -200,11 +229,14 @@ class SetupFlow:
                 )
             )
 
+            selected_device: dict[str, str] | None = None
             if len(self._discovered_devices) == 1:
                 selected_device = self._discovered_devices[0]
+            elif msg.input_values.get("device") == SELECT_ALL_DEVICES:
+                _devices.extend(self._discovered_devices)
             elif len(self._discovered_devices) > 1:
                 # only a single selection allowed so get it from the discovered devices
-                selected_device: dict[str, str] = next(
+                selected_device = next(
                     (
                         item
                         for item in self._discovered_devices
@@ -225,39 +257,59 @@ class SetupFlow:
                 }
             ]
 
-        device: dict[str, str] = {}
         err: bool = False
         _LOG.debug(
             log_formatter(f"_devices: {_devices}", include_datetime=_LOG_INC_DATETIME)
         )
-        for device in _devices:
-            try:
-                client: Client = Client(device.get("address"), device.get("port"))
-                await client.connect()
-                await client.disconnect()
-                tivo_device: config.VmTivoDevice = config.VmTivoDevice(
-                    address=device.get("address"),
-                    id=uuid.uuid4().hex,
-                    name=f"{device.get('name', '')} TiVo",
-                    port=device.get("port"),
-                    serial=device.get("serial"),
-                )
-                config.devices.add(tivo_device)
-                config.devices.save()
-                _LOG.info(
+
+        async def verify(device: dict[str, Any]) -> config.VmTivoDevice:
+            """Connect to the device, measuring how long it takes."""
+            client: Client = Client(
+                device.get("address"),
+                device.get("port"),
+                addresses=device.get("addresses"),
+            )
+            started: float = time.monotonic()
+            await client.connect()
+            latency: float = time.monotonic() - started
+            await client.disconnect()
+            return config.VmTivoDevice(
+                address=client.host,
+                addresses=device.get("addresses", []),
+                id=uuid.uuid4().hex,
+                name=f"{device.get('name', '')} TiVo",
+                port=device.get("port"),
+                serial=device.get("serial"),
+                latency=latency,
+            )
+
+        results: list[config.VmTivoDevice | BaseException] = await asyncio.gather(
+            *(
+                asyncio.wait_for(verify(device), SETUP_CONNECT_DEADLINE)
+                for device in _devices
+            ),
+            return_exceptions=True,
+        )
+        for device, result in zip(_devices, results):
+            if isinstance(result, BaseException):
+                _LOG.error(
                     log_formatter(
-                        f"successfully configured device {device.get('address')} on port {device.get('port')}",
+                        f"error connecting to {device.get('address')} on port {device.get('port')} ({result!r})",
                         include_datetime=_LOG_INC_DATETIME,
                     )
                 )
-            except Exception as exc:
-                _LOG.error(
+                err = True
+            else:
+                config.devices.add(result)
+                _LOG.info(
                     log_formatter(
-                        f"error connecting to {device.get('address')} on port {device.get('port')} ({exc})",
+                        f"successfully configured device {result.address} on port {result.port} ({result.latency:0.3f}s)",
                         include_datetime=_LOG_INC_DATETIME,
                     )
                 )
-                err = True
+
+        if not all(isinstance(result, BaseException) for result in results):
+            config.devices.save()
 
         if err:
             return SetupError(IntegrationSetupError.NOT_FOUND)
@@ -0,0 +1,733 @@
+#!/usr/bin/env python3
+"""Spread the TiVos across worker processes.
+
+Each shard process looks after the TiVos whose id hashes to it, with their
+own connections, workers and polling. The driver keeps the connection to the
+Remote and passes commands, and the state coming back, over the shard's stdin
+and stdout as lines of JSON.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import dataclasses
+import functools
+import itertools
+import json
+import logging
+import os
+import random
+import signal
+import sys
+import zlib
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+import remote
+import supervisor
+from config import VmTivoDevice
+from const import (
+    LOG_BACKUP_COUNT,
+    LOG_MAX_BYTES,
+    LOG_QUEUE_SIZE,
+    SHARD_CALL_TIMEOUT,
+    SHARD_EXPORT_BATCH,
+    SHARD_READY_TIMEOUT,
+    SHARD_SEND_BUFFER_LIMIT,
+    SHARD_STREAM_LIMIT,
+    WORKER_BACKOFF,
+    WORKER_MAX_BACKOFF,
+    WORKER_STABLE_PERIOD,
+)
+from logger import log, log_formatter, start_log_pipeline
+from pyvmtivo.metrics import REGISTRY
+from pyvmtivo.tracing import TRACER
+from snapshot import DeviceSnapshot
+from ucapi.api_definitions import StatusCodes
+from ucapi.remote import Attributes, States
+
+_LOG: logging.Logger = logging.getLogger(__name__)
+_LOG_INC_DATETIME: bool = True
+
+StateCallback = Callable[[str, dict[str, Any]], Awaitable[None]]
+
+
+def shard_for(device_id: str, shards: int) -> int:
+    """Return the shard that looks after the TiVo.
+
+    The same id always maps to the same shard for a given number of shards.
+    """
+    return zlib.crc32(device_id.encode()) % shards
+
+
+def _encode(message: dict[str, Any]) -> bytes:
+    """Return the message as a line of JSON."""
+    return json.dumps(message, separators=(",", ":")).encode() + b"\n"
+
+
+class ShardedTivoRemote(remote.TivoRemote):
+    """A TiVo looked after by a shard process.
+
+    The entity is offered to the Remote as normal, anything that talks to the
+    TiVo is passed to the shard instead.
+    """
+
+    def __init__(self, device_config: VmTivoDevice, router: "ShardRouter") -> None:
+        """Initialise.
+
+        :param router: passes calls to the shard looking after the TiVo
+        """
+        super().__init__(device_config)
+        self._last_snapshot: DeviceSnapshot | None = None
+        self._router: ShardRouter = router
+
+    async def get_state(self, connect: bool = True) -> States:
+        """Ask the shard for the current state of the TiVo."""
+        try:
+            return States(await self._router.async_call(self.id, "get_state", connect))
+        except ConnectionError:
+            return self.attributes.get(Attributes.STATE, States.UNKNOWN)
+
+    async def async_calibrate_key_rate(self) -> float | None:
+        """Have the shard find the highest rate the TiVo accepts keys at."""
+        try:
+            key_rate: float | None = await self._router.async_call(self.id, "calibrate")
+        except ConnectionError:
+            return None
+
+        if key_rate is not None:
+            self.tivo_config.key_rate = key_rate
+        return key_rate
+
+    async def async_warm_up(self) -> None:
+        """Have the shard open the connection to the TiVo."""
+        with contextlib.suppress(ConnectionError):
+            await self._router.async_call(self.id, "warm_up")
+
+    async def async_save_lineup(self) -> None:
+        """Have the shard save the channel lineup if it has changed."""
+        with contextlib.suppress(ConnectionError):
+            await self._router.async_call(self.id, "save_lineup")
+
+    def cool_down(self) -> None:
+        """Have the shard let the connection to the TiVo close when idle."""
+        self._router.notify(self.id, "cool_down")
+
+    def update_address(self, address: str, addresses: list[str] | None = None) -> None:
+        """Point the remote, and the shard, at a new address for the TiVo."""
+        super().update_address(address, addresses)
+        self._router.notify(self.id, "update_address", address, addresses)
+
+    def restore(self, snapshot: DeviceSnapshot) -> None:
+        """Use the last known state, passing it to the shard."""
+        super().restore(snapshot)
+        self._last_snapshot = snapshot
+
+    def snapshot(self) -> DeviceSnapshot:
+        """Return the state last reported by the shard."""
+        if self._last_snapshot is not None:
+            return self._last_snapshot
+
+        return super().snapshot()
+
+    @property
+    def last_snapshot(self) -> DeviceSnapshot | None:
+        """Return the state last reported by the shard, if any."""
+        return self._last_snapshot
+
+    @last_snapshot.setter
+    def last_snapshot(self, value: DeviceSnapshot) -> None:
+        """Record the state reported by the shard."""
+        self._last_snapshot = value
+
+
+class _ShardProcess:
+    """A shard process and what the driver knows of it."""
+
+    def __init__(self, index: int) -> None:
+        """Initialise."""
+        self.health: dict[str, dict[str, Any]] = {}
+        self.index: int = index
+        self.last_error: str | None = None
+        self.pending: dict[tuple[str, str], dict[str, Any]] = {}
+        self.process: asyncio.subprocess.Process | None = None
+        self.ready: asyncio.Event = asyncio.Event()
+        self.restarts: int = 0
+
+    def send(self, message: dict[str, Any]) -> bool:
+        """Send the message to the shard.
+
+        A shard that has stopped reading its messages is killed, to be
+        restarted, rather than letting them build up.
+
+        :return: False if the shard isn't running
+        """
+        if not self.ready.is_set() or self.process is None:
+            return False
+
+        if (
+            self.process.stdin.transport.get_write_buffer_size()
+            > SHARD_SEND_BUFFER_LIMIT
+        ):
+            _LOG.warning(
+                log_formatter(
+                    f"shard {self.index} isn't reading its messages, restarting it",
+                    include_datetime=_LOG_INC_DATETIME,
+                )
+            )
+            self.ready.clear()
+            self.process.kill()
+            return False
+
+        self.process.stdin.write(_encode(message))
+        return True
+
+
+class ShardRouter:
+    """Run the shard processes and route calls to them.
+
+    Offers the same interface as the supervisor of in-process workers. A shard
+    process that exits is restarted, after a growing delay, and given its
+    TiVos again.
+    """
+
+    def __init__(
+        self, shards: int, data_path: str | None, on_state: StateCallback
+    ) -> None:
+        """Initialise.
+
+        :param shards: the number of shard processes
+        :param data_path: directory the shards keep their files in
+        :param on_state: called with the entity id and attributes from a shard
+        """
+        self._data_path: str | None = data_path
+        self._devices: dict[str, ShardedTivoRemote] = {}
+        self._ids: itertools.count = itertools.count(1)
+        self._interval: float | None = None
+        self._on_state: StateCallback = on_state
+        self._pending: dict[int, tuple[int, asyncio.Future]] = {}
+        self._shards: list[_ShardProcess] = [
+            _ShardProcess(idx) for idx in range(shards)
+        ]
+        self._tasks: list[asyncio.Task] = []
+
+    def _shard(self, entity_id: str) -> _ShardProcess:
+        """Return the shard looking after the TiVo."""
+        device: ShardedTivoRemote = self._devices[entity_id]
+        return self._shards[shard_for(device.tivo_config.id, len(self._shards))]
+
+    def _add_message(self, device: ShardedTivoRemote) -> dict[str, Any]:
+        """Return the message giving the TiVo to its shard."""
+        return {
+            "op": "add",
+            "device": dataclasses.asdict(device.tivo_config),
+            "snapshot": (
+                dataclasses.asdict(device.last_snapshot)
+                if device.last_snapshot is not None
+                else None
+            ),
+        }
+
+    async def _async_dispatch(self, shard: _ShardProcess, message: dict) -> None:
+        """Act on a message from a shard."""
+        op: str = message.get("op")
+        if op == "reply":
+            _, future = self._pending.pop(message["id"], (None, None))
+            if future is not None and not future.done():
+                if "error" in message:
+                    future.set_exception(
+                        ConnectionError(f"shard {shard.index}: {message['error']}")
+                    )
+                else:
+                    future.set_result(message.get("result"))
+            return
+
+        if op == "health":
+            shard.health = message["workers"]
+            return
+
+        if op == "metrics":
+            REGISTRY.load(message["metrics"], shard=str(shard.index))
+            return
+
+        if op == "spans":
+            if TRACER.enabled:
+                TRACER.load(message["spans"], shard=shard.index)
+            return
+
+        if (device := self._devices.get(message.get("entity_id"))) is None:
+            return
+
+        if op == "state":
+            await self._on_state(
+                device.id, {Attributes.STATE: States(message["state"])}
+            )
+        elif op == "snapshot":
+            device.last_snapshot = DeviceSnapshot(**message["snapshot"])
+        elif op == "unreachable":
+            device.events.emit(remote.Events.UNREACHABLE, device)
+
+    async def _async_run_shard(self, shard: _ShardProcess) -> None:
+        """Run the shard process until it exits.
+
+        The shard is only given its TiVos once it has said hello, anything
+        else means the process isn't a working shard.
+        """
+        args: list[str] = ["--shard", str(shard.index)]
+        if not getattr(sys, "frozen", False):
+            # a frozen build is started with the driver's own entry point
+            args.insert(0, os.path.abspath(__file__))
+        if self._data_path is not None:
+            args += ["--data-path", self._data_path]
+        shard.process = await asyncio.create_subprocess_exec(
+            sys.executable,
+            *args,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            limit=SHARD_STREAM_LIMIT,
+        )
+
+        try:
+            hello: Any = None
+            with contextlib.suppress(TimeoutError, ValueError):
+                hello = json.loads(
+                    await asyncio.wait_for(
+                        shard.process.stdout.readline(), SHARD_READY_TIMEOUT
+                    )
+                )
+            if not isinstance(hello, dict) or hello.get("op") != "hello":
+                raise ConnectionError("didn't start as a shard")
+
+            shard.ready.set()
+            for device in self._devices.values():
+                if self._shard(device.id) is shard:
+                    shard.send(self._add_message(device))
+            if self._interval is not None:
+                shard.send({"op": "start", "interval": self._interval})
+            for (entity_id, _), message in shard.pending.items():
+                if entity_id in self._devices:
+                    shard.send(message)
+            shard.pending.clear()
+
+            while line := await shard.process.stdout.readline():
+                await self._async_dispatch(shard, json.loads(line))
+        finally:
+            shard.ready.clear()
+            shard.health = {}
+            for request_id, (index, future) in list(self._pending.items()):
+                if index == shard.index:
+                    del self._pending[request_id]
+                    if not future.done():
+                        future.set_exception(
+                            ConnectionError(f"shard {shard.index} exited")
+                        )
+            if shard.process.returncode is None:
+                shard.process.kill()
+            await shard.process.wait()
+
+    async def _async_supervise(self, shard: _ShardProcess) -> None:
+        """Run the shard process, restarting it with a growing delay."""
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        backoff: float = WORKER_BACKOFF
+        while True:
+            started: float = loop.time()
+            try:
+                await self._async_run_shard(shard)
+                shard.last_error = f"exited with {shard.process.returncode}"
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:  # pylint: disable=broad-exception-caught
+                shard.last_error = f"{type(exc).__name__}: {exc}"
+            shard.restarts += 1
+            REGISTRY.counter(
+                "vmtivo_shard_restarts_total",
+                "Times a shard process was restarted",
+                shard=str(shard.index),
+            ).inc()
+            if loop.time() - started >= WORKER_STABLE_PERIOD:
+                backoff = WORKER_BACKOFF
+            delay: float = backoff * random.uniform(0.5, 1.0)
+            _LOG.warning(
+                log_formatter(
+                    f"shard {shard.index} {shard.last_error}, restarting in"
+                    f" {delay:0.1f}s",
+                    include_datetime=_LOG_INC_DATETIME,
+                )
+            )
+            await asyncio.sleep(delay)
+            backoff = min(backoff * 2, WORKER_MAX_BACKOFF)
+
+    async def _async_command(
+        self, entity_id: str, cmd_id: str, params: dict[str, Any] | None = None
+    ) -> StatusCodes:
+        """Have the shard carry out the command."""
+        try:
+            return StatusCodes(
+                await self.async_call(entity_id, "command", cmd_id, params)
+            )
+        except ConnectionError:
+            return StatusCodes.SERVICE_UNAVAILABLE
+
+    async def async_call(self, entity_id: str, method: str, *args: Any) -> Any:
+        """Call the method for the TiVo in its shard and return the result.
+
+        :raises ConnectionError: if the shard isn't running or doesn't reply
+            in time
+        """
+        shard: _ShardProcess = self._shard(entity_id)
+        try:
+            await asyncio.wait_for(shard.ready.wait(), SHARD_READY_TIMEOUT)
+        except TimeoutError as exc:
+            raise ConnectionError(f"shard {shard.index} isn't running") from exc
+
+        request_id: int = next(self._ids)
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = (shard.index, future)
+        try:
+            if not shard.send(
+                {
+                    "op": "call",
+                    "id": request_id,
+                    "entity_id": entity_id,
+                    "method": method,
+                    "args": args,
+                }
+            ):
+                raise ConnectionError(f"shard {shard.index} isn't running")
+            return await asyncio.wait_for(future, SHARD_CALL_TIMEOUT)
+        except TimeoutError as exc:
+            raise ConnectionError(
+                f"shard {shard.index} didn't reply to {method} in time"
+            ) from exc
+        finally:
+            self._pending.pop(request_id, None)
+
+    def notify(self, entity_id: str, method: str, *args: Any) -> None:
+        """Call the method for the TiVo in its shard, without waiting.
+
+        Whilst the shard is restarting the call is kept, only the latest for
+        each method, and made once it is running again.
+        """
+        shard: _ShardProcess = self._shard(entity_id)
+        message: dict[str, Any] = {
+            "op": "call",
+            "entity_id": entity_id,
+            "method": method,
+            "args": args,
+        }
+        if not shard.send(message):
+            shard.pending[(entity_id, method)] = message
+
+    def start_processes(self) -> None:
+        """Start the shard processes."""
+        if not self._tasks:
+            self._tasks = [
+                asyncio.create_task(self._async_supervise(shard))
+                for shard in self._shards
+            ]
+
+    async def async_close(self) -> None:
+        """Stop the shard processes."""
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+        self._tasks = []
+
+    def add(self, device: ShardedTivoRemote) -> None:
+        """Give the TiVo to its shard."""
+        if device.id in self._devices:
+            return
+
+        self._devices[device.id] = device
+        device.attach_worker(functools.partial(self._async_command, device.id))
+        self._shard(device.id).send(self._add_message(device))
+
+    async def async_remove(self, entity_id: str) -> None:
+        """Take the TiVo away from its shard."""
+        if entity_id not in self._devices:
+            return
+
+        self._shard(entity_id).send({"op": "remove", "entity_id": entity_id})
+        self._devices.pop(entity_id).attach_worker(None)
+
+    async def async_clear(self) -> None:
+        """Take all the TiVos away from the shards."""
+        for entity_id in list(self._devices):
+            await self.async_remove(entity_id)
+
+    def start(self, interval: float) -> None:
+        """Start the workers in every shard.
+
+        :param interval: seconds between polls of each TiVo
+        """
+        self._interval = interval
+        for shard in self._shards:
+            shard.send({"op": "start", "interval": interval})
+
+    async def async_stop(self) -> None:
+        """Stop the workers in every shard."""
+        self._interval = None
+        for shard in self._shards:
+            shard.send({"op": "stop"})
+
+    def health(self) -> dict[str, dict[str, Any]]:
+        """Return the health of each worker, keyed by entity id."""
+        ret: dict[str, dict[str, Any]] = {}
+        for entity_id in self._devices:
+            shard: _ShardProcess = self._shard(entity_id)
+            ret[entity_id] = {
+                **shard.health.get(
+                    entity_id, {"health": supervisor.WorkerHealth.STOPPED.value}
+                ),
+                "shard": shard.index,
+            }
+
+        return ret
+
+    @log(_LOG, include_datetime=_LOG_INC_DATETIME)
+    def report(self) -> None:
+        """Record the number of workers in each state and warn of any failing."""
+        counts: dict[str, int] = dict.fromkeys(supervisor.WorkerHealth, 0)
+        for entity_id, status in self.health().items():
+            counts[supervisor.WorkerHealth(status["health"])] += 1
+            if status["health"] == supervisor.WorkerHealth.BACKING_OFF:
+                _LOG.warning(
+                    log_formatter(
+                        f"worker for {entity_id} is restarting after"
+                        f" {status['restarts']} failures: {status['last_error']}",
+                        include_datetime=_LOG_INC_DATETIME,
+                    )
+                )
+        for shard in self._shards:
+            if not shard.ready.is_set():
+                _LOG.warning(
+                    log_formatter(
+                        f"shard {shard.index} isn't running: {shard.last_error}",
+                        include_datetime=_LOG_INC_DATETIME,
+                    )
+                )
+        for health, count in counts.items():
+            REGISTRY.gauge(
+                "vmtivo_workers", "Workers in each state", health=health.value
+            ).set(count)
+
+
+class _Shard:
+    """Look after the TiVos given to this shard process."""
+
+    def __init__(self, data_path: str | None) -> None:
+        """Initialise.
+
+        :param data_path: directory to keep the learned channel lineups in
+        """
+        self._data_path: str | None = data_path
+        self._devices: dict[str, remote.TivoRemote] = {}
+        self._reported: dict[str, DeviceSnapshot] = {}
+        self._reporter: asyncio.Task | None = None
+        self._supervisor: supervisor.Supervisor = supervisor.Supervisor(
+            self._async_on_state
+        )
+        self._tasks: set[asyncio.Task] = set()
+        self._writer: asyncio.StreamWriter | None = None
+
+    def _send(self, message: dict[str, Any]) -> None:
+        """Send the message to the driver."""
+        self._writer.write(_encode(message))
+
+    async def _async_on_state(self, entity_id: str, attributes: dict[str, Any]) -> None:
+        """Pass the state of the TiVo to the driver."""
+        # there is no connection to the Remote here to keep the entity updated
+        if (device := self._devices.get(entity_id)) is not None:
+            device.attributes.update(attributes)
+        if (state := attributes.get(Attributes.STATE)) is not None:
+            self._send(
+                {"op": "state", "entity_id": entity_id, "state": States(state).value}
+            )
+
+    async def _async_on_unreachable(self, device: remote.TivoRemote) -> None:
+        """Let the driver look for the TiVo at another address."""
+        self._send({"op": "unreachable", "entity_id": device.id})
+
+    def _report(self) -> None:
+        """Send the health of the workers and any changed state to the driver.
+
+        The metrics, and any spans recorded since the last report, are sent
+        too so the driver can serve them.
+        """
+        self._send({"op": "health", "workers": self._supervisor.health()})
+        if os.getenv("UC_METRICS_PORT"):
+            metrics: list[list[Any]] = REGISTRY.export()
+            for idx in range(0, len(metrics), SHARD_EXPORT_BATCH):
+                self._send(
+                    {
+                        "op": "metrics",
+                        "metrics": metrics[idx : idx + SHARD_EXPORT_BATCH],
+                    }
+                )
+        if TRACER.enabled:
+            spans: list[dict[str, Any]] = [span.as_dict() for span in TRACER.spans]
+            TRACER.spans.clear()
+            for idx in range(0, len(spans), SHARD_EXPORT_BATCH):
+                self._send(
+                    {"op": "spans", "spans": spans[idx : idx + SHARD_EXPORT_BATCH]}
+                )
+        for entity_id, device in self._devices.items():
+            if (current := device.snapshot()) != self._reported.get(entity_id):
+                self._reported[entity_id] = current
+                self._send(
+                    {
+                        "op": "snapshot",
+                        "entity_id": entity_id,
+                        "snapshot": dataclasses.asdict(current),
+                    }
+                )
+
+    async def _async_report(self, interval: float) -> None:
+        """Report to the driver every interval."""
+        while True:
+            await asyncio.sleep(interval)
+            self._report()
+
+    async def _async_save_lineups(self) -> None:
+        """Save the channel lineups that have changed."""
+        await asyncio.gather(
+            *(device.async_save_lineup() for device in self._devices.values())
+        )
+
+    async def _async_call(self, message: dict[str, Any]) -> None:
+        """Call the method on the TiVo and reply with the result."""
+        reply: dict[str, Any] = {"op": "reply", "id": message.get("id")}
+        try:
+            reply["result"] = await self._async_call_device(message)
+        except Exception as exc:  # pylint: disable=broad-exception-caught
+            _LOG.exception(log_formatter(exc, include_datetime=_LOG_INC_DATETIME))
+            reply["error"] = f"{type(exc).__name__}: {exc}"
+
+        if "id" in message:
+            self._send(reply)
+
+    async def _async_call_device(self, message: dict[str, Any]) -> Any:
+        """Call the method on the TiVo and return the result."""
+        if (device := self._devices.get(message["entity_id"])) is None:
+            if message["method"] == "command":
+                return int(StatusCodes.NOT_FOUND)
+            return None
+
+        args: list[Any] = message.get("args", [])
+        match message["method"]:
+            case "command":
+                return int(await device.command(*args))
+            case "get_state":
+                return (await device.get_state(*args)).value
+            case "calibrate":
+                return await device.async_calibrate_key_rate()
+            case "warm_up":
+                await device.async_warm_up()
+            case "cool_down":
+                device.cool_down()
+            case "save_lineup":
+                await device.async_save_lineup()
+            case "update_address":
+                device.update_address(*args)
+
+        return None
+
+    async def _async_dispatch(self, message: dict[str, Any]) -> None:
+        """Act on a message from the driver."""
+        match message["op"]:
+            case "add":
+                device: remote.TivoRemote = remote.TivoRemote(
+                    VmTivoDevice(**message["device"]), self._data_path
+                )
+                device.events.on(remote.Events.STATE_CHANGED, self._async_on_state)
+                device.events.on(remote.Events.UNREACHABLE, self._async_on_unreachable)
+                if message.get("snapshot") is not None:
+                    device.restore(DeviceSnapshot(**message["snapshot"]))
+                self._devices[device.id] = device
+                self._supervisor.add(device)
+            case "remove":
+                await self._supervisor.async_remove(message["entity_id"])
+                self._devices.pop(message["entity_id"], None)
+                self._reported.pop(message["entity_id"], None)
+            case "start":
+                self._supervisor.start(message["interval"])
+                if self._reporter is None:
+                    self._reporter = asyncio.create_task(
+                        self._async_report(message["interval"])
+                    )
+            case "stop":
+                if self._reporter is not None:
+                    self._reporter.cancel()
+                    self._reporter = None
+                await self._supervisor.async_stop()
+                await self._async_save_lineups()
+                self._report()
+            case "call":
+                task: asyncio.Task = asyncio.create_task(self._async_call(message))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+
+    async def async_run(self) -> None:
+        """Act on messages from the driver until it goes away."""
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        # keep stdout for the driver, anything else written to it goes to stderr
+        ipc_out = os.fdopen(os.dup(sys.stdout.fileno()), "wb")
+        os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+
+        reader: asyncio.StreamReader = asyncio.StreamReader(limit=SHARD_STREAM_LIMIT)
+        await loop.connect_read_pipe(
+            lambda: asyncio.StreamReaderProtocol(reader), sys.stdin
+        )
+        transport, protocol = await loop.connect_write_pipe(
+            asyncio.streams.FlowControlMixin, ipc_out
+        )
+        self._writer = asyncio.StreamWriter(transport, protocol, reader, loop)
+        self._send({"op": "hello"})
+
+        while line := await reader.readline():
+            await self._async_dispatch(json.loads(line))
+
+        await self._supervisor.async_stop()
+        await self._async_save_lineups()
+
+
+def main() -> None:
+    """Run a shard process."""
+    parser = argparse.ArgumentParser(description="Run a shard of TiVos.")
+    parser.add_argument("--shard", type=int, required=True)
+    parser.add_argument("--data-path", default=None)
+    args = parser.parse_args()
+
+    filename: str | None = os.getenv("UC_LOG_FILE")
+    if filename:
+        root, ext = os.path.splitext(filename)
+        filename = f"{root}-shard{args.shard}{ext}"
+    start_log_pipeline(
+        int(os.getenv("UC_LOG_QUEUE_SIZE", LOG_QUEUE_SIZE)),
+        filename,
+        int(os.getenv("UC_LOG_MAX_BYTES", LOG_MAX_BYTES)),
+        LOG_BACKUP_COUNT,
+    )
+    level = os.getenv("UC_LOG_LEVEL", "DEBUG").upper()
+    logging.getLogger("playback").setLevel(level)
+    logging.getLogger("remote").setLevel(level)
+    logging.getLogger("shard").setLevel(level)
+    logging.getLogger("supervisor").setLevel(level)
+    logging.getLogger("pyvmtivo").setLevel(level)
+
+    # span ids are offset by shard so they don't clash once in the driver
+    TRACER.enabled = bool(os.getenv("UC_TRACE"))
+    TRACER.ids = itertools.count((args.shard + 1) << 32)
+
+    # signals meant for the driver are ignored, the shard saves what it has
+    # learned and exits once the driver closes its end of the pipe
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, signal.SIG_IGN)
+
+    asyncio.run(_Shard(args.data_path).async_run())
+
+
+if __name__ == "__main__":
+    main()
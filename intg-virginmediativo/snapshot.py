@@ -0,0 +1,111 @@
+"""Keep the last known state of each TiVo across restarts."""
+
+import dataclasses
+import json
+import logging
+import os
+
+from logger import log, log_formatter
+
+_LOG: logging.Logger = logging.getLogger(__name__)
+_LOG_INC_DATETIME: bool = True
+
+
+@dataclasses.dataclass
+class DeviceSnapshot:
+    """Last known state of a TiVo."""
+
+    channel: int | None = None
+    key_rate: float | None = None
+    power: str | None = None
+    previous_channel: int | None = None
+    remote_state: str | None = None
+    rtt: float | None = None
+
+
+class Snapshots:
+    """Last known state of all TiVos, keyed by device id."""
+
+    def __init__(self, path: str) -> None:
+        """Initialise.
+
+        :param path: file the snapshots are kept in
+        """
+        self._path: str = path
+        self._snapshots: dict[str, DeviceSnapshot] = {}
+
+    def get(self, device_id: str) -> DeviceSnapshot | None:
+        """Return the snapshot for the device, if there is one."""
+        return self._snapshots.get(device_id)
+
+    @log(_LOG, include_datetime=_LOG_INC_DATETIME)
+    def load(self) -> bool:
+        """Load the snapshots from disk."""
+        ret: bool = False
+        try:
+            if os.path.exists(self._path):
+                with open(self._path, encoding="utf-8") as f:
+                    data = json.load(f)
+                self._snapshots = {
+                    device_id: DeviceSnapshot(**itm) for device_id, itm in data.items()
+                }
+            ret = True
+        except (OSError, ValueError, TypeError) as exc:
+            _LOG.warning(
+                log_formatter(
+                    f"unable to load {self._path}: {exc}",
+                    include_datetime=_LOG_INC_DATETIME,
+                )
+            )
+
+        return ret
+
+    def remove(self, device_id: str) -> None:
+        """Forget the snapshot for the device."""
+        self._snapshots.pop(device_id, None)
+
+    @log(_LOG, include_datetime=_LOG_INC_DATETIME)
+    def save(self) -> bool:
+        """Save the snapshots to disk.
+
+        Safe to call from another thread whilst snapshots are being updated.
+        The file is written alongside and then moved into place, so a crash
+        part way through leaves the previous snapshots intact.
+        """
+        ret: bool = False
+        temp_path: str = f"{self._path}.tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(
+                    {
+                        device_id: dataclasses.asdict(itm)
+                        for device_id, itm in list(self._snapshots.items())
+                    },
+                    f,
+                    separators=(",", ":"),
+                )
+            os.replace(temp_path, self._path)
+            ret = True
+        except OSError as exc:
+            _LOG.warning(
+                log_formatter(
+                    f"unable to save {self._path}: {exc}",
+                    include_datetime=_LOG_INC_DATETIME,
+                )
+            )
+
+        return ret
+
+    def update(self, device_id: str, snapshot: DeviceSnapshot) -> bool:
+        """Store the snapshot for the device.
+
+        :return: True if it differs from the one already stored
+        """
+        if self._snapshots.get(device_id) == snapshot:
+            return False
+
+        self._snapshots[device_id] = snapshot
+        return True
+
+
+snapshots: Snapshots | None = None
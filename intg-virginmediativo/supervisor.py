@@ -0,0 +1,295 @@
+"""Run a supervised worker for each TiVo."""
+
+import asyncio
+import contextlib
+import functools
+import logging
+import random
+import time
+from collections.abc import Awaitable, Callable
+from enum import StrEnum
+from typing import Any
+
+import remote
+import ucapi
+from const import (
+    POLL_BUCKETS,
+    WORKER_BACKOFF,
+    WORKER_MAX_BACKOFF,
+    WORKER_STABLE_PERIOD,
+)
+from logger import log, log_formatter
+from pyvmtivo.metrics import REGISTRY, Histogram
+from ucapi.api_definitions import StatusCodes
+
+_LOG: logging.Logger = logging.getLogger(__name__)
+_LOG_INC_DATETIME: bool = True
+
+_POLL_SECONDS: Histogram = REGISTRY.histogram(
+    "vmtivo_device_poll_seconds",
+    "Time taken to poll a TiVo for its state",
+    buckets=POLL_BUCKETS,
+)
+
+Job = Callable[[], Awaitable[Any]]
+StateCallback = Callable[[str, dict[str, Any]], Awaitable[None]]
+
+
+class WorkerHealth(StrEnum):
+    """States of a worker."""
+
+    BACKING_OFF = "backing_off"
+    RUNNING = "running"
+    STOPPED = "stopped"
+
+
+class DeviceWorker:
+    """Carry out the commands for a TiVo, in order, and poll it for its state.
+
+    Commands, and everything else that talks to the TiVo whilst the worker
+    runs, such as held buttons, channel bursts and state probes, take their
+    turn in its queue, so only one of them uses the connection at a time. The
+    worker is restarted, after a growing delay, if it fails.
+    """
+
+    def __init__(self, device: remote.TivoRemote, on_state: StateCallback) -> None:
+        """Initialise.
+
+        :param device: the TiVo to work for
+        :param on_state: called with the entity id and attributes after each poll
+        """
+        self._current: asyncio.Future | None = None
+        self._device: remote.TivoRemote = device
+        self._interval: float = 0.0
+        self._next_poll: float = 0.0
+        self._on_state: StateCallback = on_state
+        self._queue: asyncio.Queue[tuple[Job, asyncio.Future]] = asyncio.Queue()
+        self._task: asyncio.Task | None = None
+        self.health: WorkerHealth = WorkerHealth.STOPPED
+        self.last_error: str | None = None
+        self.last_poll: float | None = None
+        self.restarts: int = 0
+
+    async def _async_poll(self) -> None:
+        """Ask the TiVo for its state and pass it on."""
+        start: float = time.perf_counter()
+        cur_state: remote.States = await self._device.get_state()
+        _POLL_SECONDS.observe(time.perf_counter() - start)
+        self.last_poll = time.time()
+        await self._on_state(
+            self._device.id, {ucapi.remote.Attributes.STATE: cur_state}
+        )
+
+    async def _async_run(self) -> None:
+        """Carry out queued jobs, polling whenever the interval is up."""
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        while True:
+            if (timeout := self._next_poll - loop.time()) <= 0:
+                self._next_poll = loop.time() + self._interval
+                await self._async_poll()
+                continue
+
+            try:
+                job, future = await asyncio.wait_for(self._queue.get(), timeout)
+            except TimeoutError:
+                continue
+
+            # the caller may have given up whilst the job was queued
+            if future.done():
+                continue
+            self._current = future
+            ret: Any = await job()
+            self._current = None
+            if not future.done():
+                future.set_result(ret)
+
+    async def _async_supervise(self) -> None:
+        """Run the worker, restarting it with a growing delay when it fails."""
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        backoff: float = WORKER_BACKOFF
+        while True:
+            started: float = loop.time()
+            self.health = WorkerHealth.RUNNING
+            try:
+                await self._async_run()
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:  # pylint: disable=broad-exception-caught
+                if self._current is not None and not self._current.done():
+                    self._current.set_result(StatusCodes.SERVER_ERROR)
+                self._current = None
+                self.last_error = f"{type(exc).__name__}: {exc}"
+                self.restarts += 1
+                REGISTRY.counter(
+                    "vmtivo_worker_restarts_total",
+                    "Times the worker for a TiVo was restarted after failing",
+                    device=self._device.tivo_config.id,
+                ).inc()
+                if loop.time() - started >= WORKER_STABLE_PERIOD:
+                    backoff = WORKER_BACKOFF
+                delay: float = backoff * random.uniform(0.5, 1.0)
+                _LOG.exception(
+                    log_formatter(
+                        f"worker for {self._device.id} failed, restarting in"
+                        f" {delay:0.1f}s",
+                        include_datetime=_LOG_INC_DATETIME,
+                    )
+                )
+                self.health = WorkerHealth.BACKING_OFF
+                await asyncio.sleep(delay)
+                backoff = min(backoff * 2, WORKER_MAX_BACKOFF)
+
+    def start(self, interval: float) -> None:
+        """Start the worker.
+
+        The first poll is at a random point in the interval, so the TiVos
+        aren't all polled at once.
+
+        :param interval: seconds between polls
+        """
+        if self._task is not None:
+            return
+
+        self._interval = interval
+        self._next_poll = asyncio.get_running_loop().time() + random.uniform(
+            0, interval
+        )
+        self._task = asyncio.create_task(self._async_supervise())
+        self._device.attach_worker(self.submit, self.run)
+
+    async def async_stop(self) -> None:
+        """Stop the worker, failing any commands still queued."""
+        self._device.attach_worker(None)
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        if self._current is not None and not self._current.done():
+            self._current.set_result(StatusCodes.SERVICE_UNAVAILABLE)
+        self._current = None
+        while not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_result(StatusCodes.SERVICE_UNAVAILABLE)
+        self.health = WorkerHealth.STOPPED
+
+    def status(self) -> dict[str, Any]:
+        """Return the health of the worker."""
+        return {
+            "health": self.health.value,
+            "last_error": self.last_error,
+            "last_poll": self.last_poll,
+            "queued": self._queue.qsize(),
+            "restarts": self.restarts,
+        }
+
+    async def submit(
+        self, cmd_id: str, params: dict[str, Any] | None = None
+    ) -> StatusCodes:
+        """Queue the command and wait for it to be carried out."""
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait(
+            (functools.partial(self._device.async_run_command, cmd_id, params), future)
+        )
+        return await future
+
+    async def run(self, func: Job) -> Any:
+        """Call func once the jobs queued before it are done.
+
+        Nothing else is sent to the TiVo until func returns. It is called from
+        the caller's own task, so cancelling the caller stops it, and straight
+        away if called from the worker itself or the worker isn't running.
+        """
+        if self._task is None or asyncio.current_task() is self._task:
+            return await func()
+
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        turn: asyncio.Future = loop.create_future()
+        finished: asyncio.Future = loop.create_future()
+
+        async def _async_hand_over() -> None:
+            turn.set_result(None)
+            await finished
+
+        self._queue.put_nowait((_async_hand_over, turn))
+        try:
+            await turn
+            return await func()
+        finally:
+            if not finished.done():
+                finished.set_result(None)
+
+
+class Supervisor:
+    """Keep a worker for each TiVo and report on their health."""
+
+    def __init__(self, on_state: StateCallback) -> None:
+        """Initialise.
+
+        :param on_state: called with the entity id and attributes after each poll
+        """
+        self._interval: float | None = None
+        self._on_state: StateCallback = on_state
+        self._workers: dict[str, DeviceWorker] = {}
+
+    def add(self, device: remote.TivoRemote) -> None:
+        """Add a worker for the TiVo, starting it if the others are running."""
+        if device.id in self._workers:
+            return
+
+        worker: DeviceWorker = DeviceWorker(device, self._on_state)
+        self._workers[device.id] = worker
+        if self._interval is not None:
+            worker.start(self._interval)
+
+    async def async_remove(self, entity_id: str) -> None:
+        """Stop and forget the worker for the TiVo."""
+        if (worker := self._workers.pop(entity_id, None)) is not None:
+            await worker.async_stop()
+
+    async def async_clear(self) -> None:
+        """Stop and forget all the workers."""
+        for entity_id in list(self._workers):
+            await self.async_remove(entity_id)
+
+    def start(self, interval: float) -> None:
+        """Start all the workers.
+
+        :param interval: seconds between polls of each TiVo
+        """
+        self._interval = interval
+        for worker in self._workers.values():
+            worker.start(interval)
+
+    async def async_stop(self) -> None:
+        """Stop all the workers."""
+        self._interval = None
+        await asyncio.gather(
+            *(worker.async_stop() for worker in self._workers.values())
+        )
+
+    def health(self) -> dict[str, dict[str, Any]]:
+        """Return the health of each worker, keyed by entity id."""
+        return {
+            entity_id: worker.status() for entity_id, worker in self._workers.items()
+        }
+
+    @log(_LOG, include_datetime=_LOG_INC_DATETIME)
+    def report(self) -> None:
+        """Record the number of workers in each state and warn of any failing."""
+        counts: dict[WorkerHealth, int] = dict.fromkeys(WorkerHealth, 0)
+        for entity_id, worker in self._workers.items():
+            counts[worker.health] += 1
+            if worker.health == WorkerHealth.BACKING_OFF:
+                _LOG.warning(
+                    log_formatter(
+                        f"worker for {entity_id} is restarting after"
+                        f" {worker.restarts} failures: {worker.last_error}",
+                        include_datetime=_LOG_INC_DATETIME,
+                    )
+                )
+        for health, count in counts.items():
+            REGISTRY.gauge(
+                "vmtivo_workers", "Workers in each state", health=health.value
+            ).set(count)
@@ -0,0 +1,146 @@
+"""Watch for the event loop being blocked."""
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+
+from const import (
+    LOOP_LAG_INTERVAL,
+    LOOP_LAG_REPORT_INTERVAL,
+    LOOP_LAG_SAMPLES,
+    LOOP_LAG_THRESHOLD,
+)
+from logger import log_formatter
+from pyvmtivo.metrics import REGISTRY, Histogram
+
+_LOG: logging.Logger = logging.getLogger(__name__)
+_LOG_INC_DATETIME: bool = True
+
+_LOOP_LAG_SECONDS: Histogram = REGISTRY.histogram(
+    "vmtivo_loop_lag_seconds", "How late the event loop ran a scheduled callback"
+)
+
+
+class LoopWatchdog:
+    """Measure event loop lag and report what is blocking it.
+
+    A task on the loop measures how late its sleeps wake up. A thread checks
+    that the task keeps waking and, when it doesn't, logs the stack of the
+    loop's thread and the task running on it, which is the code blocking the
+    loop.
+    """
+
+    def __init__(
+        self,
+        interval: float = LOOP_LAG_INTERVAL,
+        threshold: float = LOOP_LAG_THRESHOLD,
+        samples: int = LOOP_LAG_SAMPLES,
+    ) -> None:
+        """Initialise.
+
+        :param interval: seconds between measurements
+        :param threshold: lag, in seconds, that is reported
+        :param samples: the number of recent measurements kept for percentiles
+        """
+        self._heartbeat: float = time.monotonic()
+        self._interval: float = interval
+        self._lags: deque[float] = deque(maxlen=samples)
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread_id: int | None = None
+        self._stop: threading.Event = threading.Event()
+        self._task: asyncio.Task | None = None
+        self._thread: threading.Thread | None = None
+        self._threshold: float = threshold
+
+    async def _async_measure(self) -> None:
+        """Measure how late each sleep wakes up."""
+        reported: float = self._loop.time()
+        while True:
+            expected: float = self._loop.time() + self._interval
+            await asyncio.sleep(self._interval)
+            now: float = self._loop.time()
+            self._heartbeat = time.monotonic()
+            lag: float = max(now - expected, 0.0)
+            self._lags.append(lag)
+            _LOOP_LAG_SECONDS.observe(lag)
+            if now - reported >= LOOP_LAG_REPORT_INTERVAL:
+                reported = now
+                _LOG.debug(
+                    log_formatter(
+                        ", ".join(
+                            f"{name} {value * 1000:0.1f}ms"
+                            for name, value in self.percentiles().items()
+                        ),
+                        include_datetime=_LOG_INC_DATETIME,
+                    )
+                )
+
+    def _watch(self) -> None:
+        """Report the code running on the loop whilst it is blocked."""
+        reported: float | None = None
+        while not self._stop.wait(self._threshold / 2):
+            heartbeat: float = self._heartbeat
+            stalled: float = time.monotonic() - heartbeat - self._interval
+            if stalled < self._threshold or reported == heartbeat:
+                continue
+            reported = heartbeat
+            # pylint: disable-next=protected-access
+            frame = sys._current_frames().get(self._loop_thread_id)
+            task: asyncio.Task | None = asyncio.current_task(self._loop)
+            _LOG.warning(
+                log_formatter(
+                    f"event loop blocked for over {stalled * 1000:0.0f}ms"
+                    f" by {task.get_coro() if task is not None else 'a callback'}:\n"
+                    + "".join(traceback.format_stack(frame) if frame else []),
+                    include_datetime=_LOG_INC_DATETIME,
+                )
+            )
+
+    def percentiles(self) -> dict[str, float]:
+        """Return the lag percentiles over the recent measurements."""
+        if not self._lags:
+            return {}
+
+        lags: list[float] = sorted(self._lags)
+        return {
+            name: lags[min(int(len(lags) * pct), len(lags) - 1)]
+            for name, pct in (
+                ("p50", 0.5),
+                ("p90", 0.9),
+                ("p99", 0.99),
+                ("max", 1.0),
+            )
+        }
+
+    def start(self, threshold: float | None = None) -> None:
+        """Start watching the running loop.
+
+        :param threshold: lag, in seconds, that is reported, if changing it
+        """
+        if self._task is not None:
+            return
+
+        if threshold is not None:
+            self._threshold = threshold
+
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stop.clear()
+        self._task = self._loop.create_task(self._async_measure())
+        self._thread = threading.Thread(
+            target=self._watch, name="loop-watchdog", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop watching."""
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self._thread = None
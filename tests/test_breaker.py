@@ -0,0 +1,109 @@
+"""Tests for the circuit breaker."""
+
+import types
+
+import pytest
+from pyvmtivo import breaker
+from pyvmtivo.breaker import BreakerState, CircuitBreaker
+
+
+class _Clock:
+    """A clock that is moved on by hand."""
+
+    def __init__(self) -> None:
+        """Initialise."""
+        self.now: float = 100.0
+
+    def monotonic(self) -> float:
+        """Return the current time."""
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> _Clock:
+    """Run the circuit breaker against a fake clock."""
+    ret: _Clock = _Clock()
+    monkeypatch.setattr(breaker, "time", types.SimpleNamespace(monotonic=ret.monotonic))
+    return ret
+
+
+def _open(circuit: CircuitBreaker, failures: int) -> None:
+    """Record the number of failures."""
+    for _ in range(failures):
+        circuit.record_failure()
+
+
+def test_opens_after_threshold(clock: _Clock) -> None:
+    """Consecutive failures up to the threshold open the circuit."""
+    circuit: CircuitBreaker = CircuitBreaker(3, 2.0, 300.0, jitter=0)
+    _open(circuit, 2)
+
+    assert circuit.state is BreakerState.CLOSED
+    assert circuit.allow()
+    assert circuit.retry_in == 0.0
+
+    circuit.record_failure()
+
+    assert circuit.state is BreakerState.OPEN
+    assert not circuit.allow()
+    assert circuit.retry_in == pytest.approx(2.0)
+
+
+def test_success_resets_failures(clock: _Clock) -> None:
+    """A success in between means the failures aren't consecutive."""
+    circuit: CircuitBreaker = CircuitBreaker(3, 2.0, 300.0, jitter=0)
+    _open(circuit, 2)
+    circuit.record_success()
+    _open(circuit, 2)
+
+    assert circuit.state is BreakerState.CLOSED
+
+
+def test_half_open_lets_one_attempt_through(clock: _Clock) -> None:
+    """Once the backoff has passed a single attempt is allowed."""
+    circuit: CircuitBreaker = CircuitBreaker(1, 2.0, 300.0, jitter=0)
+    circuit.record_failure()
+    clock.now += 2.0
+
+    assert circuit.allow()
+    assert circuit.state is BreakerState.HALF_OPEN
+    assert not circuit.allow()
+
+    circuit.record_success()
+
+    assert circuit.state is BreakerState.CLOSED
+    assert circuit.allow()
+
+
+def test_backoff_doubles_up_to_maximum(clock: _Clock) -> None:
+    """Each failed retry doubles the backoff, up to the maximum."""
+    circuit: CircuitBreaker = CircuitBreaker(1, 2.0, 10.0, jitter=0)
+    backoffs: list[float] = []
+    circuit.record_failure()
+    for _ in range(4):
+        backoffs.append(circuit.retry_in)
+        clock.now += circuit.retry_in
+        assert circuit.allow()
+        circuit.record_failure()
+
+    assert backoffs == pytest.approx([2.0, 4.0, 8.0, 10.0])
+
+
+def test_jitter_shortens_backoff(clock: _Clock, monkeypatch) -> None:
+    """The backoff is shortened by up to the jitter fraction."""
+    monkeypatch.setattr(breaker.random, "random", lambda: 1.0)
+    circuit: CircuitBreaker = CircuitBreaker(1, 4.0, 300.0, jitter=0.5)
+    circuit.record_failure()
+
+    assert circuit.retry_in == pytest.approx(2.0)
+
+
+def test_reset_closes_circuit(clock: _Clock) -> None:
+    """Resetting forgets the failures and the backoff."""
+    circuit: CircuitBreaker = CircuitBreaker(1, 2.0, 300.0, jitter=0)
+    _open(circuit, 3)
+    circuit.reset()
+
+    assert circuit.state is BreakerState.CLOSED
+    circuit.record_failure()
+    assert circuit.retry_in == pytest.approx(2.0)
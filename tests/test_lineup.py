@@ -0,0 +1,129 @@
+"""Tests for the channel lineup."""
+
+from pyvmtivo.lineup import ChannelLineup
+
+
+def test_step_unlearned_link_returns_none() -> None:
+    """Known valid channels aren't used to fill steps that haven't been learned."""
+    lineup: ChannelLineup = ChannelLineup(valid=[101, 110], up={110: 101})
+
+    assert lineup.step(110, 1) == 101
+    assert lineup.step(110, 5) is None
+
+
+def test_save_replaces_file(tmp_path) -> None:
+    """The lineup is written to a temporary file and moved into place."""
+    path = tmp_path / "lineup.json"
+    path.write_text("{}", encoding="utf-8")
+
+    assert ChannelLineup(valid=[101]).save(str(path))
+    assert ChannelLineup.load(str(path)).channels == [101]
+    assert [itm.name for itm in tmp_path.iterdir()] == ["lineup.json"]
+
+
+def test_add_keeps_channels_sorted() -> None:
+    """Channels are kept in order however they are reported."""
+    lineup: ChannelLineup = ChannelLineup()
+    for channel in (105, 101, 110, 101):
+        lineup.add(channel)
+
+    assert lineup.channels == [101, 105, 110]
+    assert lineup.dirty
+    assert lineup.next_valid(105) == 110
+    assert lineup.next_valid(110) is None
+    assert lineup.previous_valid(105) == 101
+    assert lineup.previous_valid(101) is None
+
+
+def test_invalid_channels() -> None:
+    """Rejected channels are known invalid until reported as showing."""
+    lineup: ChannelLineup = ChannelLineup(valid=[101, 102])
+    lineup.add_invalid(102)
+    lineup.add_invalid(999)
+
+    assert lineup.is_valid(101) is True
+    assert lineup.is_valid(102) is False
+    assert lineup.is_valid(999) is False
+    assert lineup.is_valid(103) is None
+    assert lineup.channels == [101]
+
+    lineup.add(102)
+
+    assert lineup.is_valid(102) is True
+
+
+def test_learn_step_links_both_ways() -> None:
+    """A step up is also learned as the step down back again."""
+    lineup: ChannelLineup = ChannelLineup()
+    lineup.learn_step(101, 102, 1)
+    lineup.learn_step(103, 102, -1)
+
+    assert lineup.dirty
+    assert lineup.step(101, 2) == 103
+    assert lineup.step(101, 3) is None
+    assert lineup.step(101, 1) == 102
+    assert lineup.step(102, -1) == 101
+    assert lineup.step(102, 1) == 103
+    assert lineup.step(103, -2) == 101
+
+
+def test_learn_step_ignores_no_change() -> None:
+    """A step that didn't change channel, or was already known, is ignored."""
+    lineup: ChannelLineup = ChannelLineup(up={101: 102}, down={102: 101})
+    lineup.learn_step(101, 101, 1)
+    lineup.learn_step(101, 102, 1)
+
+    assert not lineup.dirty
+
+
+def test_step_wraps_round() -> None:
+    """Learned steps are followed, even from the last channel to the first."""
+    lineup: ChannelLineup = ChannelLineup()
+    for before, after in ((101, 105), (105, 110), (110, 101)):
+        lineup.learn_step(before, after, 1)
+
+    assert lineup.step(105, 2) == 101
+    assert lineup.step(101, -1) == 110
+    assert lineup.step(101, 0) == 101
+
+
+def test_save_and_load_round_trip(tmp_path) -> None:
+    """Everything learned is the same once loaded again."""
+    path: str = str(tmp_path / "lineup.json")
+    lineup: ChannelLineup = ChannelLineup(valid=[101, 105], invalid=[103])
+    lineup.learn_step(101, 105, 1)
+
+    assert lineup.save(path)
+    assert not lineup.dirty
+
+    loaded: ChannelLineup = ChannelLineup.load(path)
+
+    assert loaded.channels == [101, 105]
+    assert loaded.is_valid(103) is False
+    assert loaded.step(101, 1) == 105
+    assert loaded.step(105, -1) == 101
+    assert not loaded.dirty
+
+
+def test_load_missing_or_corrupt(tmp_path) -> None:
+    """A lineup that can't be read loads as an empty one."""
+    path = tmp_path / "lineup.json"
+
+    assert ChannelLineup.load(str(path)).channels == []
+
+    path.write_text('{"valid": [101', encoding="utf-8")
+
+    assert ChannelLineup.load(str(path)).channels == []
+
+
+def test_copy_is_independent() -> None:
+    """Changes to the lineup aren't seen in a copy."""
+    lineup: ChannelLineup = ChannelLineup(valid=[101])
+    copy: ChannelLineup = lineup.copy()
+    lineup.add(102)
+    lineup.add_invalid(103)
+    lineup.learn_step(101, 102, 1)
+
+    assert copy.channels == [101]
+    assert copy.is_valid(103) is None
+    assert copy.step(101, 1) is None
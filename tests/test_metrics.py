@@ -0,0 +1,70 @@
+"""Tests for the metrics registry."""
+
+from pyvmtivo.metrics import Histogram, MetricsRegistry
+
+
+def test_render_counter_and_gauge() -> None:
+    """Counters and gauges render with their help, type and labels."""
+    registry: MetricsRegistry = MetricsRegistry()
+    registry.counter("requests_total", "Requests", status="ok").inc(3)
+    registry.counter("requests_total", status="error").inc()
+    registry.gauge("workers").set(2.5)
+
+    assert registry.render() == (
+        "# HELP requests_total Requests\n"
+        "# TYPE requests_total counter\n"
+        'requests_total{status="error"} 1\n'
+        'requests_total{status="ok"} 3\n'
+        "# TYPE workers gauge\n"
+        "workers 2.5\n"
+    )
+
+
+def test_render_histogram() -> None:
+    """Histogram buckets are cumulative and end with +Inf."""
+    registry: MetricsRegistry = MetricsRegistry()
+    histogram: Histogram = registry.histogram(
+        "reply_seconds", "Replies", (0.1, 1.0), cmd="a"
+    )
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value)
+
+    assert registry.render() == (
+        "# HELP reply_seconds Replies\n"
+        "# TYPE reply_seconds histogram\n"
+        'reply_seconds_bucket{cmd="a",le="0.1"} 2\n'
+        'reply_seconds_bucket{cmd="a",le="1"} 3\n'
+        'reply_seconds_bucket{cmd="a",le="+Inf"} 4\n'
+        'reply_seconds_sum{cmd="a"} 3.65\n'
+        'reply_seconds_count{cmd="a"} 4\n'
+    )
+
+
+def test_same_name_and_labels_is_same_metric() -> None:
+    """Metrics are identified by name and labels, whatever the label order."""
+    registry: MetricsRegistry = MetricsRegistry()
+
+    assert registry.counter("x", a="1", b="2") is registry.counter("x", b="2", a="1")
+    assert registry.counter("x", a="1") is not registry.counter("x", a="2")
+
+
+def test_load_exported_adds_labels() -> None:
+    """Metrics exported by another registry are loaded with the extra labels."""
+    source: MetricsRegistry = MetricsRegistry()
+    source.counter("requests_total", "Requests").inc(2)
+    source.histogram("reply_seconds", "Replies", (1.0,)).observe(0.5)
+    target: MetricsRegistry = MetricsRegistry()
+    target.load(source.export(), shard="0")
+    target.load(source.export(), shard="0")
+
+    assert target.render() == (
+        "# HELP reply_seconds Replies\n"
+        "# TYPE reply_seconds histogram\n"
+        'reply_seconds_bucket{shard="0",le="1"} 1\n'
+        'reply_seconds_bucket{shard="0",le="+Inf"} 1\n'
+        'reply_seconds_sum{shard="0"} 0.5\n'
+        'reply_seconds_count{shard="0"} 1\n'
+        "# HELP requests_total Requests\n"
+        "# TYPE requests_total counter\n"
+        'requests_total{shard="0"} 2\n'
+    )
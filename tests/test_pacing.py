@@ -0,0 +1,91 @@
+"""Tests for pacing the keys sent to a TiVo."""
+
+import asyncio
+import types
+
+import pytest
+from pyvmtivo import pacing
+from pyvmtivo.pacing import TokenBucket
+
+
+class _Clock:
+    """A clock that only moves when slept on."""
+
+    def __init__(self) -> None:
+        """Initialise."""
+        self.now: float = 100.0
+        self.sleeps: list[float] = []
+
+    def monotonic(self) -> float:
+        """Return the current time."""
+        return self.now
+
+    async def sleep(self, delay: float) -> None:
+        """Move the clock on without waiting."""
+        self.sleeps.append(delay)
+        self.now += delay
+
+
+@pytest.fixture
+def clock(monkeypatch) -> _Clock:
+    """Run the token bucket against a fake clock."""
+    ret: _Clock = _Clock()
+    monkeypatch.setattr(pacing, "time", types.SimpleNamespace(monotonic=ret.monotonic))
+    monkeypatch.setattr(
+        pacing, "asyncio", types.SimpleNamespace(Lock=asyncio.Lock, sleep=ret.sleep)
+    )
+    return ret
+
+
+def _acquire(bucket: TokenBucket, times: int) -> None:
+    """Take a token from the bucket the number of times."""
+
+    async def _run() -> None:
+        for _ in range(times):
+            await bucket.acquire()
+
+    asyncio.run(_run())
+
+
+def test_first_key_is_not_delayed(clock: _Clock) -> None:
+    """A full bucket lets a key through straight away."""
+    _acquire(TokenBucket(rate=4.0), 1)
+
+    assert clock.sleeps == []
+
+
+def test_keys_are_paced_at_the_rate(clock: _Clock) -> None:
+    """Keys back to back wait for a token each."""
+    _acquire(TokenBucket(rate=4.0), 3)
+
+    assert clock.sleeps == pytest.approx([0.25, 0.25])
+
+
+def test_capacity_allows_a_burst(clock: _Clock) -> None:
+    """Keys up to the capacity go back to back."""
+    bucket: TokenBucket = TokenBucket(rate=2.0, capacity=3.0)
+    _acquire(bucket, 4)
+
+    assert clock.sleeps == pytest.approx([0.5])
+
+
+def test_tokens_accrue_whilst_idle(clock: _Clock) -> None:
+    """Time without keys refills the bucket, up to the capacity."""
+    bucket: TokenBucket = TokenBucket(rate=2.0, capacity=2.0)
+    _acquire(bucket, 2)
+    clock.now += 10
+    _acquire(bucket, 2)
+
+    assert clock.sleeps == []
+
+
+def test_rate_change_keeps_accrued_tokens(clock: _Clock) -> None:
+    """Tokens accrued at the old rate are kept when the rate changes."""
+    bucket: TokenBucket = TokenBucket(rate=1.0)
+    _acquire(bucket, 1)
+    clock.now += 0.5
+    bucket.rate = 10.0
+    _acquire(bucket, 1)
+
+    assert bucket.rate == 10.0
+    assert clock.sleeps == pytest.approx([0.05])
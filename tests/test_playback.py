@@ -0,0 +1,63 @@
+"""Tests for the remote playback state machine."""
+
+import pytest
+from playback import (
+    TRANSITIONS,
+    PlaybackStateMachine,
+    RemoteState,
+    Reply,
+    _transition_counter,
+)
+from pyvmtivo.metrics import Counter
+from ucapi.media_player import Commands as MediaPlayerCommands
+
+
+@pytest.mark.parametrize(
+    ("state", "trigger", "expected"),
+    [
+        (RemoteState.LIVE, MediaPlayerCommands.PLAY_PAUSE, RemoteState.PAUSED),
+        (RemoteState.PAUSED, MediaPlayerCommands.PLAY_PAUSE, RemoteState.LIVE),
+        (RemoteState.SPEEDING, MediaPlayerCommands.PLAY_PAUSE, RemoteState.LIVE),
+        (RemoteState.DVR, MediaPlayerCommands.PLAY_PAUSE, RemoteState.PAUSED_DVR),
+        (RemoteState.PAUSED_DVR, MediaPlayerCommands.PLAY_PAUSE, RemoteState.DVR),
+        (RemoteState.LIVE, MediaPlayerCommands.FAST_FORWARD, RemoteState.SPEEDING),
+        (RemoteState.DVR, MediaPlayerCommands.REWIND, RemoteState.SPEEDING_DVR),
+        (RemoteState.SPEEDING_DVR, "PLAY", RemoteState.DVR),
+        (RemoteState.PAUSED_DVR, "PAUSE", RemoteState.PAUSED_DVR),
+        (RemoteState.PAUSED_DVR, MediaPlayerCommands.STOP, RemoteState.LIVE),
+        (RemoteState.SPEEDING_DVR, MediaPlayerCommands.LIVE, RemoteState.LIVE),
+        (RemoteState.LIVE, Reply.CONNECTION_RESET, RemoteState.DVR),
+        (RemoteState.PAUSED, Reply.CONNECTION_RESET, RemoteState.PAUSED_DVR),
+        (RemoteState.SPEEDING_DVR, Reply.CHANNEL_STATUS, RemoteState.SPEEDING),
+        (RemoteState.DVR, Reply.CHANNEL_STATUS, RemoteState.LIVE),
+    ],
+)
+def test_transitions(state: RemoteState, trigger: str, expected: RemoteState) -> None:
+    """Each command or reply moves to the expected state."""
+    assert TRANSITIONS[(state, trigger)] is expected
+    assert PlaybackStateMachine(state).fire(trigger) is expected
+
+
+@pytest.mark.parametrize(
+    ("state", "trigger"),
+    [
+        (RemoteState.LIVE, Reply.CHANNEL_STATUS),
+        (RemoteState.DVR, Reply.CONNECTION_RESET),
+        (RemoteState.LIVE, MediaPlayerCommands.CURSOR_UP),
+    ],
+)
+def test_other_triggers_leave_state(state: RemoteState, trigger: str) -> None:
+    """Triggers not in the table leave the state as it is."""
+    assert (state, trigger) not in TRANSITIONS
+    assert PlaybackStateMachine(state).fire(trigger) is state
+
+
+def test_transitions_are_counted() -> None:
+    """Each transition made, but not staying put, is counted."""
+    counter: Counter = _transition_counter(RemoteState.LIVE, RemoteState.PAUSED)
+    before: float = counter.value
+    machine: PlaybackStateMachine = PlaybackStateMachine()
+    machine.fire(MediaPlayerCommands.PLAY_PAUSE)
+    machine.move_to(RemoteState.PAUSED)
+
+    assert counter.value == before + 1
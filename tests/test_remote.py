@@ -0,0 +1,69 @@
+"""Tests for the TiVo remote entity."""
+
+import asyncio
+
+from config import VmTivoDevice
+from remote import TivoRemote, ui_templates
+from ucapi.ui import EntityCommand
+
+
+def _remote(device_id: str, **kwargs) -> TivoRemote:
+    """Return a remote for a TiVo that is never contacted."""
+    return TivoRemote(
+        VmTivoDevice(
+            address="127.0.0.1",
+            id=device_id,
+            name=device_id,
+            port=31339,
+            serial=device_id,
+            **kwargs,
+        )
+    )
+
+
+def _mapping(remote: TivoRemote, button: str) -> dict:
+    """Return the mapping for the button on the remote."""
+    return next(
+        itm for itm in remote.options["button_mapping"] if itm["button"] == button
+    )
+
+
+def test_override_button_leaves_other_remotes_unchanged() -> None:
+    """Only the remote the button is overridden for changes."""
+
+    async def _run() -> tuple[TivoRemote, TivoRemote]:
+        return _remote("one"), _remote("two")
+
+    one, two = asyncio.run(_run())
+    shared: dict = dict(_mapping(two, "RED"))
+    one.override_button(
+        "RED",
+        short_press=EntityCommand(
+            cmd_id="remote.send_cmd", params={"command": "GUIDE"}
+        ),
+    )
+
+    assert _mapping(one, "RED")["short_press"]["params"] == {"command": "GUIDE"}
+    assert _mapping(two, "RED") == shared
+    assert _mapping(two, "RED") is next(
+        itm for itm in ui_templates().button_mapping if itm["button"] == "RED"
+    )
+    assert _mapping(one, "BLUE") is _mapping(two, "BLUE")
+
+
+def test_buttons_from_config() -> None:
+    """The buttons in the device configuration are overridden."""
+
+    async def _run() -> TivoRemote:
+        return _remote("one", buttons={"RED": {"long_press": "TEXT:bbc"}})
+
+    remote: TivoRemote = asyncio.run(_run())
+
+    assert _mapping(remote, "RED")["long_press"] == {
+        "cmd_id": "remote.send_cmd",
+        "params": {"command": "TEXT:bbc"},
+    }
+    assert _mapping(remote, "RED")["short_press"] == {
+        "cmd_id": "function_red",
+        "params": None,
+    }
@@ -0,0 +1,47 @@
+"""Tests for restoring the last known state of a TiVo."""
+
+import asyncio
+import json
+
+from config import VmTivoDevice
+from playback import RemoteState
+from remote import TivoRemote
+from snapshot import Snapshots
+from ucapi.remote import Attributes, States
+
+
+def test_restore_skips_unknown_states(tmp_path) -> None:
+    """A snapshot with states that aren't known restores the rest."""
+    path = tmp_path / "state.json"
+    path.write_text(
+        json.dumps(
+            {
+                "tivo": {
+                    "channel": 102,
+                    "power": "WARMING_UP",
+                    "previous_channel": 101,
+                    "remote_state": "rewinding",
+                    "rtt": 0.05,
+                }
+            }
+        ),
+        encoding="utf-8",
+    )
+    snapshots: Snapshots = Snapshots(str(path))
+    assert snapshots.load()
+
+    async def _run() -> TivoRemote:
+        return TivoRemote(
+            VmTivoDevice(
+                address="127.0.0.1", id="tivo", name="tivo", port=31339, serial="S"
+            )
+        )
+
+    remote: TivoRemote = asyncio.run(_run())
+    remote.restore(snapshots.get("tivo"))
+
+    assert remote.attributes[Attributes.STATE] is States.UNKNOWN
+    assert remote.playback.state is RemoteState.LIVE
+    assert remote.snapshot().channel == 102
+    assert remote.snapshot().previous_channel == 101
+    assert remote.snapshot().rtt == 0.05
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""Measure the cost per command of resolving what to send to the TiVo.
+
+The if/elif chain async_handle_command used to run on every command is
+compared with the DISPATCH_TABLE lookup that replaced it. Only the work done
+to decide what to send is timed, nothing is sent.
+
+python tools/bench_dispatch.py --iterations 200000
+"""
+
+import argparse
+import os
+import sys
+import timeit
+from typing import Any
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "intg-virginmediativo")
+)
+
+from const import AVAILABLE_COMMANDS, CodeDefinition, CodeTypes  # noqa: E402
+from playback import RemoteState  # noqa: E402
+from pyvmtivo.client import Client  # noqa: E402
+from remote import _DIRECT_COMMAND_IDS, DISPATCH_TABLE, Dispatch  # noqa: E402
+from ucapi.media_player import Commands as MediaPlayerCommands  # noqa: E402
+from ucapi.remote import Commands  # noqa: E402
+
+
+def _chain(cmd_id: str, params: dict[str, Any], state: RemoteState) -> Any:
+    """Resolve the command as the if/elif chain did."""
+    command: str | None
+    if cmd_id == Commands.OFF:
+        command = MediaPlayerCommands.OFF
+    elif cmd_id == Commands.ON:
+        command = MediaPlayerCommands.ON
+    elif cmd_id == Commands.SEND_CMD:
+        command = params.get("command")
+        if command not in AVAILABLE_COMMANDS:
+            return None
+    else:
+        return None
+
+    code_def: CodeDefinition | None
+    if (code_def := AVAILABLE_COMMANDS.get(command, None)) is None:
+        return None
+
+    if command == MediaPlayerCommands.PLAY_PAUSE:
+        if state != RemoteState.LIVE:
+            command = "PLAY"
+            code_def = AVAILABLE_COMMANDS.get(command, None)
+
+    if code_def.type == CodeTypes.IRCODE:
+        args = [code_def.code, code_def.wait if state is RemoteState.LIVE else False]
+        func = Client.send_ircode
+    if code_def.type == CodeTypes.TELEPORT:
+        args = [code_def.code]
+        func = Client.send_teleport
+
+    suppress_timeout: bool = str(command).lower().startswith("digit_")
+    next_state: RemoteState | None = None
+    if command in [MediaPlayerCommands.LIVE, "PLAY", MediaPlayerCommands.STOP]:
+        next_state = RemoteState.LIVE
+    elif command in [MediaPlayerCommands.FAST_FORWARD, MediaPlayerCommands.REWIND]:
+        next_state = RemoteState.SPEEDING
+    elif command == MediaPlayerCommands.PLAY_PAUSE:
+        next_state = RemoteState.PAUSED
+
+    return func, args, code_def, next_state, suppress_timeout
+
+
+def _table(cmd_id: str, params: dict[str, Any], state: RemoteState) -> Any:
+    """Resolve the command as async_handle_command does now."""
+    command: str | None
+    if cmd_id == Commands.SEND_CMD:
+        command = params.get("command")
+    elif cmd_id in _DIRECT_COMMAND_IDS:
+        command = cmd_id
+    else:
+        return None
+
+    dispatch: Dispatch | None
+    if (dispatch := DISPATCH_TABLE.get((command, state))) is None:
+        return None
+
+    return dispatch
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200000)
+    args = parser.parse_args()
+
+    calls: list[tuple[str, dict[str, Any], RemoteState]] = [
+        (Commands.SEND_CMD, {"command": command}, state)
+        for command in AVAILABLE_COMMANDS
+        for state in RemoteState
+    ]
+    calls += [
+        (cmd_id, {}, state)
+        for cmd_id in (Commands.ON, Commands.OFF)
+        for state in RemoteState
+    ]
+    number: int = max(args.iterations // len(calls), 1)
+
+    print(f"commands resolved: {len(calls) * number}")  # noqa: T201
+    for name, resolve in (("if/elif chain", _chain), ("dispatch table", _table)):
+        per_round: float = (
+            min(
+                timeit.repeat(
+                    lambda resolve=resolve: [resolve(*call) for call in calls],
+                    number=number,
+                    repeat=5,
+                )
+            )
+            / number
+        )
+        print(f"{name:<15}    {per_round / len(calls) * 1e9:.1f} ns per command")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
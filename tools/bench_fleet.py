@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""Measure how broadcasting a command scales with the number of TiVos.
+
+Each size is run one device at a time and then fanned out, against simulated
+TiVos on loopback aliases 127.0.0.2 onwards.
+
+    python tools/bench_fleet.py --sizes 1 10 50 100 200 --reply-delay 0.05
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "intg-virginmediativo")
+)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import fleet  # noqa: E402
+import remote  # noqa: E402
+import tivo_simulator  # noqa: E402
+from config import VmTivoDevice  # noqa: E402
+from const import FLEET_CONCURRENCY  # noqa: E402
+from ucapi.api_definitions import StatusCodes  # noqa: E402
+from ucapi.remote import Commands  # noqa: E402
+
+
+async def async_main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 50, 100, 200])
+    parser.add_argument("--command", default="live")
+    parser.add_argument("--concurrency", type=int, default=FLEET_CONCURRENCY)
+    parser.add_argument("--port", type=int, default=31339)
+    parser.add_argument("--reply-delay", type=float, default=0.05)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    addresses: list[str] = [f"127.0.0.{idx + 2}" for idx in range(max(args.sizes))]
+    _, servers = await tivo_simulator.async_start(
+        addresses, args.port, reply_delay=args.reply_delay
+    )
+    devices: list[remote.TivoRemote] = [
+        remote.TivoRemote(
+            VmTivoDevice(
+                address=address,
+                id=f"tivo{idx}",
+                name=f"TiVo {idx}",
+                port=args.port,
+                serial=f"TSN{idx}",
+            )
+        )
+        for idx, address in enumerate(addresses)
+    ]
+    params: dict[str, str] = {"command": args.command}
+
+    print(f"{'devices':>8} {'sequential':>12} {'fan-out':>12} {'speed-up':>9} {'ok':>5}")  # noqa: T201
+    for size in args.sizes:
+        start: float = time.perf_counter()
+        await fleet.async_broadcast(devices[:size], Commands.SEND_CMD, params, concurrency=1)
+        sequential: float = time.perf_counter() - start
+
+        start = time.perf_counter()
+        results = await fleet.async_broadcast(
+            devices[:size], Commands.SEND_CMD, params, concurrency=args.concurrency
+        )
+        fan_out: float = time.perf_counter() - start
+        ok: int = sum(result.status == StatusCodes.OK for result in results.values())
+
+        print(  # noqa: T201
+            f"{size:>8} {sequential * 1000:>10.1f}ms {fan_out * 1000:>10.1f}ms "
+            f"{sequential / fan_out:>8.1f}x {ok:>5}"
+        )
+
+    for server in servers:
+        server.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(async_main())
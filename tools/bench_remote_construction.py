@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""Measure the time and memory taken to create remote entities.
+
+python tools/bench_remote_construction.py --count 100
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "intg-virginmediativo")
+)
+
+import remote  # noqa: E402
+from config import VmTivoDevice  # noqa: E402
+
+
+async def async_main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=100)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    configs: list[VmTivoDevice] = [
+        VmTivoDevice(
+            address=f"127.0.0.{idx % 250 + 2}",
+            id=f"tivo{idx}",
+            name=f"TiVo {idx}",
+            port=31339,
+            serial=f"TSN{idx}",
+        )
+        for idx in range(args.count)
+    ]
+
+    tracemalloc.start()
+    started: float = time.perf_counter()
+    remotes: list[remote.TivoRemote] = [remote.TivoRemote(cfg) for cfg in configs]
+    elapsed: float = time.perf_counter() - started
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"remotes:           {len(remotes)}")  # noqa: T201
+    print(f"total time:        {elapsed * 1000:.2f} ms")  # noqa: T201
+    print(f"time per remote:   {elapsed / len(remotes) * 1e6:.1f} us")  # noqa: T201
+    print(f"retained memory:   {current / 1024:.1f} KiB")  # noqa: T201
+    print(f"peak memory:       {peak / 1024:.1f} KiB")  # noqa: T201
+    print(f"memory per remote: {current / len(remotes) / 1024:.2f} KiB")  # noqa: T201
+
+
+if __name__ == "__main__":
+    asyncio.run(async_main())
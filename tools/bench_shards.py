@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""Measure how command throughput scales with the number of shard processes.
+
+The fleet is first run in the driver's process and then spread over each
+number of shards, against simulated TiVos on loopback aliases 127.0.0.2
+onwards. The simulator runs in its own process so it doesn't compete with the
+driver for a core.
+
+    python tools/bench_shards.py --devices 200 --shards 2 4 --rounds 20
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "intg-virginmediativo")
+)
+
+import remote  # noqa: E402
+import shard  # noqa: E402
+import supervisor  # noqa: E402
+from config import VmTivoDevice  # noqa: E402
+from ucapi.api_definitions import StatusCodes  # noqa: E402
+from ucapi.remote import Commands  # noqa: E402
+
+# no polls whilst measuring
+POLL_INTERVAL: float = 3600.0
+
+
+async def _async_on_state(entity_id: str, attributes: dict) -> None:
+    """Ignore the state of the TiVos."""
+
+
+async def async_run(
+    configs: list[VmTivoDevice], shards: int, rounds: int, command: str
+) -> tuple[float, int]:
+    """Send each TiVo the command rounds times, returning the time taken."""
+    router: shard.ShardRouter | None = None
+    workers: supervisor.Supervisor | shard.ShardRouter
+    devices: list[remote.TivoRemote]
+    if shards:
+        router = workers = shard.ShardRouter(shards, None, _async_on_state)
+        router.start_processes()
+        devices = [shard.ShardedTivoRemote(itm, router) for itm in configs]
+    else:
+        workers = supervisor.Supervisor(_async_on_state)
+        devices = [remote.TivoRemote(itm) for itm in configs]
+    for device in devices:
+        workers.add(device)
+    workers.start(POLL_INTERVAL)
+    await asyncio.gather(*(device.async_warm_up() for device in devices))
+
+    params: dict[str, str] = {"command": command}
+    start: float = time.perf_counter()
+    results: list[StatusCodes] = await asyncio.gather(
+        *(
+            device.command(Commands.SEND_CMD, params)
+            for device in devices
+            for _ in range(rounds)
+        )
+    )
+    elapsed: float = time.perf_counter() - start
+
+    await workers.async_stop()
+    if router is not None:
+        await router.async_close()
+
+    return elapsed, sum(result == StatusCodes.OK for result in results)
+
+
+async def async_main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=200)
+    parser.add_argument("--shards", type=int, nargs="+", default=[2, 4])
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--command", default="live")
+    parser.add_argument("--port", type=int, default=31339)
+    parser.add_argument("--log-level", default="WARNING")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    os.environ["UC_LOG_LEVEL"] = args.log_level
+    addresses: list[str] = [f"127.0.0.{idx + 2}" for idx in range(args.devices)]
+    simulator: asyncio.subprocess.Process = await asyncio.create_subprocess_exec(
+        sys.executable,
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), "tivo_simulator.py"),
+        *addresses,
+        "--port",
+        str(args.port),
+        stderr=asyncio.subprocess.DEVNULL,
+    )
+    # give the simulator time to listen on every address
+    await asyncio.sleep(1 + args.devices / 200)
+    configs: list[VmTivoDevice] = [
+        VmTivoDevice(
+            address=address,
+            id=f"tivo{idx}",
+            name=f"TiVo {idx}",
+            port=args.port,
+            serial=f"TSN{idx}",
+            key_rate=1000.0,
+        )
+        for idx, address in enumerate(addresses)
+    ]
+
+    total: int = args.devices * args.rounds
+    print(f"{args.devices} TiVos, {total} commands, {os.cpu_count()} cores")  # noqa: T201
+    print(f"{'shards':>8} {'time':>10} {'commands/s':>11} {'speed-up':>9} {'ok':>6}")  # noqa: T201
+    baseline: float | None = None
+    try:
+        for shards in [0, *args.shards]:
+            elapsed, ok = await async_run(configs, shards, args.rounds, args.command)
+            baseline = baseline or elapsed
+            print(  # noqa: T201
+                f"{shards or 'none':>8} {elapsed:>9.2f}s {total / elapsed:>11.0f} "
+                f"{baseline / elapsed:>8.1f}x {ok:>6}"
+            )
+    finally:
+        simulator.terminate()
+        await simulator.wait()
+
+
+if __name__ == "__main__":
+    asyncio.run(async_main())
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""Simulate Virgin Media TiVo devices for development and benchmarking.
+
+Each simulated TiVo listens on its own address, loopback aliases such as
+127.0.0.2, 127.0.0.3 etc. work well on Linux.
+
+    python tools/tivo_simulator.py 127.0.0.2 127.0.0.3 --port 31339
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+
+_LOG: logging.Logger = logging.getLogger("tivo_simulator")
+
+DEFAULT_LINEUP: list[int] = [101, 102, 103, 104, 105, 106, 107, 108, 109, 110]
+VALID_IRCODES: set[str] = {
+    "ACTION_A",
+    "ACTION_B",
+    "ACTION_C",
+    "ACTION_D",
+    "CHANNELDOWN",
+    "CHANNELUP",
+    "CLEAR",
+    "DOWN",
+    "ENTER",
+    "EXIT",
+    "FORWARD",
+    "GUIDE",
+    "INFO",
+    "LEFT",
+    "NUM0",
+    "NUM1",
+    "NUM2",
+    "NUM3",
+    "NUM4",
+    "NUM5",
+    "NUM6",
+    "NUM7",
+    "NUM8",
+    "NUM9",
+    "PAUSE",
+    "PLAY",
+    "RECORD",
+    "REVERSE",
+    "RIGHT",
+    "SELECT",
+    "STANDBY",
+    "STOP",
+    "THUMBSDOWN",
+    "THUMBSUP",
+    "UP",
+}
+VALID_KEYBOARD: set[str] = {
+    *(chr(c) for c in range(ord("A"), ord("Z") + 1)),
+    *(f"NUM{d}" for d in range(10)),
+    "BACKQUOTE",
+    "BACKSLASH",
+    "BACKSPACE",
+    "COMMA",
+    "EQUALS",
+    "LBRACKET",
+    "MINUS",
+    "PERIOD",
+    "QUOTE",
+    "RBRACKET",
+    "SEMICOLON",
+    "SLASH",
+    "SPACE",
+}
+
+
+@dataclass
+class SimulatedTivo:
+    """State of a single simulated TiVo."""
+
+    address: str
+    port: int
+    lineup: list[int] = field(default_factory=lambda: list(DEFAULT_LINEUP))
+    channel: int = DEFAULT_LINEUP[0]
+    reply_delay: float = 0.0
+    max_key_rate: float | None = None
+    received: int = 0
+    dropped: int = 0
+    typed: list[str] = field(default_factory=list)
+    _last_key: float = 0.0
+
+    def _status(self) -> str:
+        return f"CH_STATUS {self.channel:04d} LOCAL"
+
+    def _step(self, direction: int) -> None:
+        idx: int = self.lineup.index(self.channel) if self.channel in self.lineup else 0
+        self.channel = self.lineup[(idx + direction) % len(self.lineup)]
+
+    def process(self, line: str) -> str | None:
+        """Process a single command returning the reply, if any."""
+        self.received += 1
+        verb, _, arg = line.strip().upper().partition(" ")
+        reply: str | None = None
+        if verb in ("IRCODE", "KEYBOARD") and self.max_key_rate:
+            now: float = time.monotonic()
+            if now - self._last_key < 1 / self.max_key_rate:
+                self.dropped += 1
+                return None
+            self._last_key = now
+        if verb == "IRCODE":
+            if arg not in VALID_IRCODES:
+                reply = "INVALID_KEY"
+            elif arg == "CHANNELUP":
+                self._step(1)
+                reply = self._status()
+            elif arg == "CHANNELDOWN":
+                self._step(-1)
+                reply = self._status()
+        elif verb == "KEYBOARD":
+            if arg not in VALID_KEYBOARD:
+                reply = "INVALID_KEY"
+            else:
+                self.typed.append(arg)
+        elif verb == "TELEPORT":
+            reply = self._status() if arg == "LIVETV" else None
+        elif verb == "SETCH":
+            if not arg.isdigit() or int(arg) not in self.lineup:
+                reply = "CH_FAILED INVALID_CHANNEL"
+            else:
+                self.channel = int(arg)
+                reply = self._status()
+        else:
+            reply = "INVALID_COMMAND"
+
+        return reply
+
+    async def handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Handle a client connection."""
+        if self.reply_delay:
+            await asyncio.sleep(self.reply_delay)
+        writer.write(f"{self._status()}\r".encode())
+        await writer.drain()
+        try:
+            while line := await reader.readuntil(b"\r"):
+                if (reply := self.process(line.decode())) is not None:
+                    if self.reply_delay:
+                        await asyncio.sleep(self.reply_delay)
+                    writer.write(f"{reply}\r".encode())
+                    await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+async def async_start(
+    addresses: list[str],
+    port: int,
+    reply_delay: float = 0.0,
+    max_key_rate: float | None = None,
+) -> tuple[list[SimulatedTivo], list[asyncio.Server]]:
+    """Start a simulated TiVo on each of the given addresses.
+
+    Keys arriving faster than max_key_rate are dropped, as a real TiVo does.
+    """
+    tivos: list[SimulatedTivo] = []
+    servers: list[asyncio.Server] = []
+    for address in addresses:
+        tivo: SimulatedTivo = SimulatedTivo(
+            address, port, reply_delay=reply_delay, max_key_rate=max_key_rate
+        )
+        servers.append(await asyncio.start_server(tivo.handle, address, port))
+        tivos.append(tivo)
+        _LOG.info("simulating TiVo on %s:%d", address, port)
+
+    return tivos, servers
+
+
+async def async_main() -> None:
+    """Run the simulator until interrupted."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("addresses", nargs="+", help="addresses to listen on")
+    parser.add_argument("--port", type=int, default=31339)
+    parser.add_argument("--reply-delay", type=float, default=0.0)
+    parser.add_argument("--max-key-rate", type=float, default=None)
+    args = parser.parse_args()
+
+    _, servers = await async_start(
+        args.addresses, args.port, args.reply_delay, args.max_key_rate
+    )
+    await asyncio.gather(*(server.serve_forever() for server in servers))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(async_main())